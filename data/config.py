@@ -11,10 +11,34 @@ WXPORT = '/dev/ttyAMA0'
 
 # WXBAUDRATE = 9600 # leave this line commented out UNLESS you have an old console with a default baudrate of 9600 
 
+# Network console (WeatherLink IP, or a serial-to-network bridge such as ser2net) instead of WXPORT.
+# WeatherLink IP listens on port 22222. The connection attempt is abandoned after WXCONNECTTIMEOUT seconds.
+# WXHOST = '192.168.1.50'
+# WXHOSTPORT = 22222
+# WXCONNECTTIMEOUT = 5.0
+
 
 # Number of "wakeup calls" to the console before giving up (Davis recommends three attempts).
 MAXATTEMPTS = 3
 
+# Serial reads return as soon as the expected response has arrived (blocking reads with a deadline).
+# WXFASTIO = False # uncomment for slow consoles, restores the fixed WXDELAY pauses after every command
+
+# The console is only woken up again if it has been silent for more than WXWAKEWINDOW seconds.
+# WXWAKEWINDOW = 0 # uncomment to wake up the console before every single request
+
+# Timeouts adapt to the observed response time of every console command, within WXTIMEOUTMIN and WXTIMEOUTMAX seconds.
+# WXTIMEOUTMAX = 10.0 # uncomment for very slow links
+
+# The console clock is read (GETTIME) every CLOCKSYNCINTERVAL seconds, timestamps in between are extrapolated.
+# The console clock is set to the local time when it is off by more than CLOCKMAXDRIFT seconds.
+# CLOCKSYNCINTERVAL = 3600
+# CLOCKMAXDRIFT = 5
+
+# After a (re)start or a lost connection, the console's archive records (DMPAFT) logged since the last line of the
+# CSV file are downloaded and merged into the CSV and rainfall history files, so that outages leave no gaps.
+# ARCHIVEBACKFILL = True # uncomment to fill the gaps after outages
+
 # ------ END: COMMUNICATION PARAMETERS ------
 
 
@@ -25,6 +49,33 @@ MAXATTEMPTS = 3
 # Set to True for Vantage Pro2 firmware >= 1.90, false to force old-style LOOP packet.
 # LPS = True is required for APRS weather-report generation and Weather Underground updates.
 LPS = True
+# LPSPAIR = True fetches LOOP and LOOP2 with a single LPS 3 2 request instead of LOOP 1 + LPS 2 1.
+# The console sends the two packets about 2 seconds apart, so every cycle takes ~2 s longer than the
+# default (the console is kept awake between the two requests). Falls back to LOOP 1 + LPS 2 1 on older firmware.
+# LPSPAIR = True
+
+# Set to True to stream LOOP (and LOOP2, if LPS = True) packets between the regular 30-second cycles.
+# The console then sends a packet every 2-2.5 seconds without being woken up and asked again,
+# wxshared.wxDict is updated with every packet. The stream is re-armed every LOOPSTREAMCOUNT packets.
+LOOPSTREAM = False
+# LOOPSTREAMCOUNT = 200
+
+# Set to True to also append every LOOP1, LOOP2 and HILOWS packet to TMPPATH/LOOP1.dump, LOOP2.dump and
+# HILOWS.dump for wospi.decodeDumps(). They grow by up to ~640 bytes per 30-second cycle (< 2 MB per day).
+# DUMPAPPEND = False
+
+# Set WXASYNC to True to poll LOOP (and LOOP2) packets every WXASYNCINTERVAL seconds between the regular 30-second
+# cycles using the asyncio console transport. Console info about to expire (RXCHECK, BARDATA) is refreshed
+# in between at a lower priority. Ignored if LOOPSTREAM = True.
+# WXASYNC = True
+# WXASYNCINTERVAL = 2.5
+
+# Number of recent observations (snapshots of wxDict) kept in memory in wxHistory, oldest first.
+# WXHISTORY = 2880
+
+# Seconds to keep the console's VER, NVER, BARDATA and RXCHECK responses before asking again.
+# None = until the serial port is reopened, 0 = ask every cycle. BARDATA is always read every cycle if LPS = False.
+# CONSOLEINFOTTL = {'VER': None, 'NVER': None, 'BARDATA': 300, 'RXCHECK': 300}
 
 # Correction factors for the UV and solar radiation sensors.
 # Valid range: [50.0, 150.0]. Default = 100.0 (retain 100% of the sensor reading).
@@ -85,6 +136,26 @@ WC_KEY = ''
 # Min/max values are also retrieved from the console at this interval.
 CSVINTERVAL = 10
 
+# The CSV file is kept open and lines can be collected in memory and written together, to save SD card writes.
+# Lines are written once CSVFLUSHCOUNT lines are pending or the oldest one is CSVFLUSHINTERVAL seconds old
+# (0 = no time limit); pending lines are included in the 24-hour plots. CSVFSYNC = True forces every write
+# onto the SD card. Once FLASHBUDGET SD card writes were made in a day, CSV lines, daily index files and the
+# CSV cache are held back until the next day (rainfall files are always written), 0 = no limit.
+# CSVFLUSHCOUNT = 6
+# CSVFLUSHINTERVAL = 3600
+# CSVFSYNC = False
+# FLASHBUDGET = 0
+
+# The yearly plots keep the parsed monthly CSV files in CSVCACHEFILE (default: TMPPATH + 'csvcache.dat'),
+# only the current month is read again. CSVCACHEMONTHS is the number of months kept.
+# CSVCACHEFILE = '/var/tmp/csvcache.dat'
+# CSVCACHEMONTHS = 15
+
+# The daily min/max/sum/count of the logged values are kept next to the CSV files in yyyy-mm-daily.csv
+# and used by the yearly plots; 'wospi.py --rebuild-index' rebuilds them. The file of the current month is
+# written at the end of the month and on shutdown, the plots add the lines logged since themselves.
+# DAILYINDEX = True
+
 
 # Your location - city/country description for various reports.
 MYLOCATION = 'Somewhere, Elsewhere'
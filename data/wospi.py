@@ -4,11 +4,22 @@
 #   Compiled at: 2019-11-27 08:35:35
 import os
 import sys
+import math
+import collections
+import collections.abc
+import binascii
+import bisect
+import itertools
+import signal
+import select
+import asyncio
 import time
 import datetime
 import subprocess
 import serial
 import struct
+import array
+import json
 import urllib.request
 import urllib.parse
 import urllib.error
@@ -33,6 +44,31 @@ WXSTOPBITS = serial.STOPBITS_ONE
 WXXONOFF = False
 WXTIMEOUT = 3
 WXDELAY = 0.2
+WXFASTIO = True
+LOOPSTREAM = False
+LOOPSTREAMCOUNT = 200
+DUMPAPPEND = False
+LPSPAIR = False
+WXWAKEWINDOW = 2.0
+CLOCKSYNCINTERVAL = 3600
+ARCHIVEBACKFILL = False
+WXTIMEOUTMIN = 0.5
+WXTIMEOUTMAX = 6.0
+WXASYNC = False
+WXASYNCINTERVAL = 2.5
+WXHISTORY = 2880
+WXHOST = ''
+WXHOSTPORT = 22222
+WXCONNECTTIMEOUT = 5.0
+CSVFLUSHCOUNT = 1
+CSVFLUSHINTERVAL = 0
+CSVFSYNC = False
+FLASHBUDGET = 0
+CSVCACHEFILE = None
+CSVCACHEMONTHS = 15
+DAILYINDEX = True
+CLOCKMAXDRIFT = 5
+CONSOLEINFOTTL = {'VER': None, 'NVER': None, 'BARDATA': 300, 'RXCHECK': 300}
 beaufortText = {
    0: 'Calm',
    1: 'Light air',
@@ -53,8 +89,9 @@ DEBUG = False
 from config import *
 
 wx = None
-wxDict = {}
-wxMinMax = {}
+flashWrite = 0
+shutdownRequested = False
+serialStatsRequested = False
 lastUpdateTime = datetime.date(1970, 1, 1)
 lastWxYearMonth = '1970-01'
 uptime = ''
@@ -65,6 +102,11 @@ PRESENTMONTH = ''
 L1 = ''
 L2 = ''
 HL = ''
+lpsPairFailures = 0
+lpsPairRetry = 0.0
+consoleInfoCache = {}
+wxLatency = {}
+asyncLoop = None
 
 
 class WxError(Exception):
@@ -76,6 +118,611 @@ class WxError(Exception):
         return repr(self.value)
 
 
+# keys of wxDict and wxMinMax, in the order in which a regular cycle sets them (the order of wxdata.xml)
+OBSERVATIONKEYS = (
+    'STATIONMODEL', 'CONDENSATION', 'FREEZE', 'DATAERROR', 'COMMISSIONDATE', 'PROGRAMVERSION',
+    'VER', 'NVER', 'TIMESTAMP', 'TIMESTAMP_WX', 'TIMESTAMP_APRS', 'BARDATA', 'DEWPOINT_F',
+    'DEWPOINT_C', 'CRC-CALC', 'CRC_PAD', 'TIMESTAMP_PC', 'BAROTREND', 'BAROTRENDTEXT',
+    'BAROMETER_INHG', 'BAROMETER_HPA', 'INTEMP_F', 'INTEMP_C', 'INHUM_P', 'OUTTEMP_F', 'OUTTEMP_C',
+    'AVGWIND10_MPH', 'AVGWIND10_KTS', 'AVGWIND10_MSEC', 'AVGWIND10_BF', 'WIND_MPH', 'WIND_KTS',
+    'WIND_MSEC', 'WIND_BF', 'WINDDIR', 'WIND_CARDINAL', 'OUTHUM_P', 'RAINRATE_MMHR', 'DAYRAIN_MM',
+    'STORMRAIN_MM', 'MONTHRAIN_MM', 'YEARRAIN_MM', 'STORMSTART', 'ET_DAY_MM', 'ET_MONTH_MM',
+    'ET_YEAR_MM', 'UVINDEX', 'SOLAR_W', 'FCICON', 'VOLTAGE', 'BATTERYSTATUS', 'FCRULE', 'FCTEXT',
+    'SUNRISE_LT', 'SUNSET_LT', 'AVGWIND2_MPH', 'AVGWIND2_KTS', 'AVGWIND2_MSEC', 'AVGWIND2_BF',
+    'GUST10_MPH', 'GUST10_KTS', 'GUST10_MSEC', 'GUST10_BF', 'GUST10DIR', 'GUST_CARDINAL',
+    'RAINFALL15_MM', 'RAINFALL60_MM', 'RAINFALL24H_MM', 'WC_F', 'WC_C', 'THSW_F', 'THSW_C',
+    'HINDEX_F', 'HINDEX_C', 'RXCHECK', 'CRC_CALC'
+    )
+HILOWSKEYS = (
+    'CRC-CALC', 'BAROMETER_DAY_MIN_INHG', 'BAROMETER_DAY_MIN_HPA', 'BAROMETER_DAY_MAX_INHG',
+    'BAROMETER_DAY_MAX_HPA', 'BAROMETER_MONTH_MIN_INHG', 'BAROMETER_MONTH_MIN_HPA',
+    'BAROMETER_MONTH_MAX_INHG', 'BAROMETER_MONTH_MAX_HPA', 'BAROMETER_YEAR_MIN_INHG',
+    'BAROMETER_YEAR_MIN_HPA', 'BAROMETER_YEAR_MAX_INHG', 'BAROMETER_YEAR_MAX_HPA',
+    'BAROMETER_MIN_TIME', 'BAROMETER_MAX_TIME', 'WINDSPEED_DAY_MAX_MPH', 'WINDSPEED_DAY_MAX_KTS',
+    'WINDSPEED_DAY_MAX_MSEC', 'WINDSPEED_MAX_TIME', 'WINDSPEED_MONTH_MAX_MPH',
+    'WINDSPEED_MONTH_MAX_KTS', 'WINDSPEED_MONTH_MAX_MSEC', 'WINDSPEED_YEAR_MAX_MPH',
+    'WINDSPEED_YEAR_MAX_KTS', 'WINDSPEED_YEAR_MAX_MSEC', 'OUTTEMP_DAY_MIN_F', 'OUTTEMP_DAY_MIN_C',
+    'OUTTEMP_DAY_MAX_F', 'OUTTEMP_DAY_MAX_C', 'OUTTEMP_MIN_TIME', 'OUTTEMP_MAX_TIME',
+    'OUTTEMP_MONTH_MAX_F', 'OUTTEMP_MONTH_MAX_C', 'OUTTEMP_MONTH_MIN_F', 'OUTTEMP_MONTH_MIN_C',
+    'OUTTEMP_YEAR_MAX_F', 'OUTTEMP_YEAR_MAX_C', 'OUTTEMP_YEAR_MIN_F', 'OUTTEMP_YEAR_MIN_C',
+    'DEWPOINT_DAY_MIN_F', 'DEWPOINT_DAY_MIN_C', 'DEWPOINT_DAY_MAX_F', 'DEWPOINT_DAY_MAX_C',
+    'DEWPOINT_MIN_TIME', 'DEWPOINT_MAX_TIME', 'DEWPOINT_MONTH_MAX_F', 'DEWPOINT_MONTH_MAX_C',
+    'DEWPOINT_MONTH_MIN_F', 'DEWPOINT_MONTH_MIN_C', 'DEWPOINT_YEAR_MAX_F', 'DEWPOINT_YEAR_MAX_C',
+    'DEWPOINT_YEAR_MIN_F', 'DEWPOINT_YEAR_MIN_C', 'SOLAR_MAX_DAY', 'SOLAR_MAX_TIME',
+    'SOLAR_MAX_MONTH', 'SOLAR_MAX_YEAR', 'UVINDEX_MAX_DAY', 'UVINDEX_MAX_TIME', 'UVINDEX_MAX_MONTH',
+    'UVINDEX_MAX_YEAR', 'RAINRATE_MAX_DAY_MMHR', 'RAINRATE_MAX_TIME', 'RAINRATE_MAX_HOUR_MMHR',
+    'RAINRATE_MAX_MONTH_MMHR', 'RAINRATE_MAX_YEAR_MMHR', 'OUTHUM_DAY_MIN', 'OUTHUM_DAY_MAX',
+    'OUTHUM_MIN_TIME', 'OUTHUM_MAX_TIME', 'OUTHUM_MONTH_MAX', 'OUTHUM_MONTH_MIN', 'OUTHUM_YEAR_MAX',
+    'OUTHUM_YEAR_MIN', 'TIMESTAMP', 'SOCTEMP'
+    )
+
+
+def slotName(key):
+    """Returns the attribute name of key in a Record ('CRC-CALC' is stored as CRC__CALC)."""
+    return key.replace('-', '__')
+
+
+# derived key suffix -> (suffix of the key it is computed from, conversion); only the base keys are
+# stored by the decoders, e.g. OUTTEMP_C is computed from OUTTEMP_F on first access
+DERIVEDUNITS = (
+    ('_C', '_F', lambda v: FtoC(v)),
+    ('_HPA', '_INHG', lambda v: round(v * 33.8639, 1)),
+    ('_KTS', '_MPH', lambda v: round(v * 0.868976, 1)),
+    ('_MSEC', '_MPH', lambda v: round(v * 0.44704, 1)),
+    ('_BF', '_KTS', lambda v: getBeaufortIndex(v)),
+    )
+
+
+def derivedKeys(keys):
+    """
+    Returns the DERIVEDUNITS of a Record with keys: key -> (base key, conversion) of every derived key,
+    and key -> slots of all keys derived from it (directly or via another derived key, e.g. _MPH -> _KTS -> _BF).
+    """
+    derived = {}
+    for key in keys:
+        for suffix, baseSuffix, func in DERIVEDUNITS:
+            base = key[:-len(suffix)] + baseSuffix
+            if key.endswith(suffix) and base in keys:
+                derived[key] = (base, func)
+                break
+    dependents = {}
+    for key in derived:
+        base = derived[key][0]
+        while base is not None:
+            dependents.setdefault(base, []).append(slotName(key))
+            base = derived.get(base, (None, ))[0]
+    return derived, {key: tuple(slots) for key, slots in dependents.items()}
+
+
+class Record(collections.abc.MutableMapping):
+    """
+    Observation record with a fixed set of fields in __slots__ (KEYS), read and written like a dict
+    (record['OUTTEMP_C']) or as attributes (record.OUTTEMP_C). Keys that are not set raise KeyError
+    as in a dict. Keys outside of KEYS (e.g. set by config.py functions) are kept in a small dict.
+    Derived keys (DERIVEDUNITS) are computed from their base key on first access by key and kept
+    until the base key is set again, so set and read them by key rather than as attributes.
+    """
+
+    __slots__ = ('_extra', '_derived')
+    KEYS = ()
+    SLOTS = {}
+    DERIVED = {}
+    DEPENDENTS = {}
+
+    def __init__(self, values=()):
+        self._extra = None
+        # slots of derived keys that hold a value (computed or set), dropped when their base key is set
+        self._derived = set()
+        if values:
+            self.update(values)
+
+    def __getitem__(self, key):
+        slot = self.SLOTS.get(key)
+        if slot is not None:
+            try:
+                return getattr(self, slot)
+            except AttributeError:
+                derived = self.DERIVED.get(key)
+                if derived is None:
+                    raise KeyError(key) from None
+            # a derived key: computed from its base key (KeyError if that is not set either)
+            value = derived[1](self[derived[0]])
+            setattr(self, slot, value)
+            self._derived.add(slot)
+            return value
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        slot = self.SLOTS.get(key)
+        if slot is not None:
+            setattr(self, slot, value)
+            if self._derived:
+                self._forget(key)
+            if key in self.DERIVED:
+                self._derived.add(slot)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        slot = self.SLOTS.get(key)
+        if slot is not None:
+            try:
+                delattr(self, slot)
+            except AttributeError:
+                raise KeyError(key) from None
+            self._derived.discard(slot)
+            self._forget(key)
+        elif self._extra is None:
+            raise KeyError(key)
+        else:
+            del self._extra[key]
+
+    def _forget(self, key):
+        """Drop the computed values of all keys derived from key."""
+        for slot in self.DEPENDENTS.get(key, ()):
+            if slot in self._derived:
+                delattr(self, slot)
+                self._derived.discard(slot)
+
+    def __contains__(self, key):
+        slot = self.SLOTS.get(key)
+        if slot is not None:
+            return hasattr(self, slot) or (key in self.DERIVED and self.DERIVED[key][0] in self)
+        return self._extra is not None and key in self._extra
+
+    def __iter__(self):
+        for key, slot in self.SLOTS.items():
+            if hasattr(self, slot) or (key in self.DERIVED and self.DERIVED[key][0] in self):
+                yield key
+        if self._extra:
+            yield from list(self._extra)
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, dict(self))
+
+    def get(self, key, default=None):
+        slot = self.SLOTS.get(key)
+        if slot is not None:
+            try:
+                return self[key]
+            except KeyError:
+                return default
+        if self._extra is None:
+            return default
+        return self._extra.get(key, default)
+
+    def copy(self):
+        """Returns an independent snapshot of the record, derived values not computed yet stay lazy."""
+        r = type(self)()
+        for slot in self.SLOTS.values():
+            try:
+                setattr(r, slot, getattr(self, slot))
+            except AttributeError:
+                pass
+        r._derived = set(self._derived)
+        if self._extra:
+            r._extra = dict(self._extra)
+        return r
+
+
+class Observation(Record):
+    """One weather observation (LOOP, LOOP2 and console info), the type of wxDict."""
+
+    __slots__ = tuple(slotName(key) for key in OBSERVATIONKEYS)
+    KEYS = OBSERVATIONKEYS
+    SLOTS = {key: slotName(key) for key in OBSERVATIONKEYS}
+    DERIVED, DEPENDENTS = derivedKeys(OBSERVATIONKEYS)
+
+
+class HiLows(Record):
+    """Highs and lows of the day, month and year (HILOWS), the type of wxMinMax."""
+
+    __slots__ = tuple(slotName(key) for key in HILOWSKEYS)
+    KEYS = HILOWSKEYS
+    SLOTS = {key: slotName(key) for key in HILOWSKEYS}
+    DERIVED, DEPENDENTS = derivedKeys(HILOWSKEYS)
+
+
+wxDict = Observation()
+wxMinMax = HiLows()
+# snapshots of the most recent observations, oldest first
+wxHistory = collections.deque(maxlen=WXHISTORY)
+
+
+class ConsoleSession:
+    """
+    Keeps track of whether the console is awake. Every byte received from the
+    console counts as activity; within WXWAKEWINDOW seconds of the last activity
+    commands are sent without a new wakeup call.
+    """
+
+    def __init__(self):
+        self.lastActivity = None
+
+    def awake(self):
+        """True if the console answered within the last WXWAKEWINDOW seconds."""
+        return self.lastActivity is not None and time.monotonic() - self.lastActivity < WXWAKEWINDOW
+
+    def touch(self):
+        """Record activity from the console."""
+        self.lastActivity = time.monotonic()
+
+    def invalidate(self):
+        """Forget the awake state, e.g. after a timeout or when the port is (re)opened."""
+        self.lastActivity = None
+
+    def ensureAwake(self):
+        """Wake up the console unless it is known to be awake. Returns True if the console is awake."""
+        if self.awake():
+            return True
+        if wake_console():
+            self.touch()
+            return True
+        self.invalidate()
+        return False
+
+
+wxSession = ConsoleSession()
+
+
+class ConsoleClock:
+    """
+    Model of the console clock. The console time is read with GETTIME every CLOCKSYNCINTERVAL
+    seconds and extrapolated with the monotonic clock of the host in between.
+    """
+
+    def __init__(self):
+        self.base = None
+        self.synced = None
+
+    def stale(self):
+        """True if the model has never been synced, or the last sync is older than CLOCKSYNCINTERVAL seconds."""
+        return self.synced is None or time.monotonic() - self.synced >= CLOCKSYNCINTERVAL
+
+    def sync(self, consoleTime):
+        """Anchor the model to consoleTime (datetime), returns the console clock drift in seconds (console - host)."""
+        self.base = consoleTime
+        self.synced = time.monotonic()
+        return (consoleTime - datetime.datetime.now()).total_seconds()
+
+    def invalidate(self):
+        """Force a sync on the next call of readWxData(), e.g. after SETTIME or when the port is (re)opened."""
+        self.synced = None
+
+    def now(self):
+        """Current console time (datetime, whole seconds)."""
+        t = self.base + datetime.timedelta(seconds=time.monotonic() - self.synced)
+        return t.replace(microsecond=0)
+
+
+wxClock = ConsoleClock()
+
+
+class RxRing:
+    """
+    Preallocated receive buffer for the console. Incoming bytes are read into one bytearray and
+    handed out as memoryviews into it, without copying. When the end is reached, the unread bytes are
+    copied to the start of a new buffer (twice the size if they fill the old one), so frames are always
+    contiguous and the views handed out keep their bytes. Views are only valid until the next
+    reset(), i.e. until the next request: copy (bytes(view)) anything that must be kept.
+    """
+
+    def __init__(self, size=4096):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.head = self.tail = 0
+
+    def reset(self):
+        """Discard all buffered bytes."""
+        self.head = self.tail = 0
+
+    def available(self):
+        """Number of buffered, unread bytes."""
+        return self.tail - self.head
+
+    def fill(self, deadline):
+        """Read everything wx has received, waiting for at least one byte until deadline (time.monotonic()). Returns the number of bytes read."""
+        if self.tail == len(self.buf):
+            n = self.tail - self.head
+            unread = self.view[self.head:self.tail]
+            self.buf = bytearray(2 * n if n == len(self.buf) else len(self.buf))
+            self.view = memoryview(self.buf)
+            self.buf[:n] = unread
+            self.head, self.tail = 0, n
+        free = len(self.buf) - self.tail
+        waiting = wx.in_waiting
+        if waiting:
+            data = wx.read(min(waiting, free))
+        else:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return 0
+            wxSetTimeout(remaining)
+            data = wx.read(1)
+        n = len(data)
+        if n:
+            self.buf[self.tail:self.tail + n] = data
+            self.tail += n
+            wxSession.touch()
+            serialStats.received(n)
+        return n
+
+    def skip(self, chars, deadline):
+        """Discard leading bytes contained in chars (e.g. stray LF/CR), waits for the first other byte until deadline. Returns the number of bytes skipped."""
+        skipped = 0
+        while True:
+            while self.head < self.tail and self.buf[self.head] in chars:
+                self.head += 1
+                skipped += 1
+            if self.head < self.tail or not self.fill(deadline):
+                return skipped
+
+    def read(self, size, deadline):
+        """Returns a view of the next size bytes, or of whatever arrived before deadline."""
+        while self.tail - self.head < size and self.fill(deadline):
+            pass
+        n = min(size, self.tail - self.head)
+        self.head += n
+        return self.view[self.head - n:self.head]
+
+    def readUntil(self, terminator, deadline):
+        """Returns a view of the bytes up to and including terminator, or of whatever arrived before deadline."""
+        searched = 0
+        while True:
+            i = self.buf.find(terminator, self.head + max(searched - len(terminator) + 1, 0), self.tail)
+            if i >= 0:
+                n = i + len(terminator) - self.head
+                break
+            searched = self.tail - self.head
+            if not self.fill(deadline):
+                n = self.tail - self.head
+                break
+        self.head += n
+        return self.view[self.head - n:self.head]
+
+
+rxRing = RxRing()
+
+
+class PacketSchema:
+    """
+    Declarative layout of a binary console packet. Every field is a tuple
+    (name, offset, format, scale, unit, sentinel): format is a struct code ('B', 'H', 'h'),
+    the raw value is divided by scale (None keeps the raw integer), and a raw value equal to
+    sentinel (e.g. 65535 for "no data") is returned as None. The fields are compiled into a
+    single struct.Struct, so one unpack_from() decodes the whole packet.
+    """
+
+    def __init__(self, fields):
+        self.fields = sorted(fields, key=lambda f: f[1])
+        fmt = '<'
+        pos = 0
+        for name, offset, code, scale, unit, sentinel in self.fields:
+            if offset < pos:
+                raise ValueError('Overlapping field %s at offset %d' % (name, offset))
+            fmt += 'x' * (offset - pos) + code
+            pos = offset + struct.calcsize('<' + code)
+        self.struct = struct.Struct(fmt)
+        self.names = tuple(f[0] for f in self.fields)
+        self.units = {f[0]: f[4] for f in self.fields}
+        self.sentinels = tuple((f[0], f[5]) for f in self.fields if f[5] is not None)
+        self.scales = tuple((f[0], f[3]) for f in self.fields if f[3] is not None)
+        self.conversions = None
+
+    def unpack(self, buffer, offset=0):
+        """Returns a dictionary name -> value of all fields, decoded from buffer at offset."""
+        values = dict(zip(self.names, self.struct.unpack_from(buffer, offset)))
+        for name, sentinel in self.sentinels:
+            if values[name] == sentinel:
+                values[name] = None
+        for name, scale in self.scales:
+            if values[name] is not None:
+                values[name] /= scale
+        return values
+
+    def unpackBatch(self, packets, start=0):
+        """
+        Decode N packets at once, packets is a NumPy uint8 array (N, packet size), see packetArray().
+        Returns a dictionary name -> NumPy array like unpack() for every packet: scaled fields and fields
+        with a sentinel are float arrays (sentinel values are NaN), the others keep the raw integers.
+        """
+        numpy = numpyModule()
+        dtype = numpy.dtype({'names': list(self.names), 'formats': ['<' + f[2] for f in self.fields],
+                             'offsets': [start + f[1] for f in self.fields], 'itemsize': packets.shape[1]})
+        rows = numpy.ascontiguousarray(packets).view(dtype).ravel()
+        columns = {}
+        for name, offset, code, scale, unit, sentinel in self.fields:
+            column = rows[name]
+            if sentinel is not None:
+                column = numpy.where(column == sentinel, numpy.nan, column)
+            if scale is not None:
+                column = column / scale
+            columns[name] = column
+        return columns
+
+    def convert(self, values, target):
+        """Store the decoded values in target (e.g. wxMinMax), converted by UNITCONVERSIONS to key name + suffix."""
+        if self.conversions is None:
+            # flattened on first use, (name, key, conversion), conversion None stores the value as is
+            self.conversions = tuple((name, name + suffix, func) for name in self.names
+                                     for suffix, func in UNITCONVERSIONS[self.units[name]])
+        for name, key, func in self.conversions:
+            target[key] = values[name] if func is None else func(values[name])
+
+
+class LatencyTracker:
+    """
+    Response time of one console command: smoothed mean and mean deviation (as for TCP round-trip
+    times). The timeout is mean + 4 * deviation within [WXTIMEOUTMIN, WXTIMEOUTMAX], doubled for
+    every consecutive timeout. After three failures in a row (timeouts, missing ACKs, CRC errors)
+    the command is not retried any more within the same call, until it succeeds again.
+    """
+
+    def __init__(self, initial):
+        self.initial = initial
+        self.mean = None
+        self.dev = 0.0
+        self.failures = 0
+        self.timeouts = 0
+
+    def record(self, seconds):
+        """Record the response time of a successful command."""
+        if self.mean is None:
+            self.mean = seconds
+            self.dev = seconds / 2
+        else:
+            self.dev = 0.75 * self.dev + 0.25 * abs(seconds - self.mean)
+            self.mean = 0.875 * self.mean + 0.125 * seconds
+        self.failures = 0
+        self.timeouts = 0
+
+    def fail(self, timedOut=False):
+        """Record a failed command (timeout, missing ACK or CRC error)."""
+        self.failures += 1
+        if timedOut:
+            self.timeouts += 1
+
+    def timeout(self):
+        """Timeout (seconds) for the next attempt."""
+        if self.mean is None:
+            t = self.initial
+        else:
+            t = self.mean + 4 * self.dev
+        t *= 2 ** min(self.timeouts, 3)
+        return min(max(t, WXTIMEOUTMIN), WXTIMEOUTMAX)
+
+    def retries(self, retries):
+        """Number of retries to spend on the next call, none while the command keeps failing."""
+        return 0 if self.failures >= 3 else retries
+
+    def backoff(self):
+        """Pause (seconds) before the next attempt after a failure."""
+        return min(self.timeout() / 2, 1.5)
+
+
+def latency(cmd, initial=2):
+    """Returns the LatencyTracker of cmd (e.g. 'LOOP 1', 'HILOWS', 'WAKE'), initial is the timeout until the first response."""
+    if cmd not in wxLatency:
+        wxLatency[cmd] = LatencyTracker(initial)
+    return wxLatency[cmd]
+
+
+class CommandStats:
+    """Counters and response time histogram of one console command."""
+
+    # upper bounds (seconds) of the histogram buckets, the last bucket takes everything above
+    BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+    def __init__(self):
+        self.requests = 0
+        self.responses = 0
+        self.failures = 0
+        self.retries = 0
+        self.crcErrors = 0
+        self.strayBytes = 0
+        self.bytesOut = 0
+        self.bytesIn = 0
+        self.totalTime = 0.0
+        self.maxTime = 0.0
+        self.histogram = [0] * (len(self.BUCKETS) + 1)
+
+    def record(self, seconds):
+        """Record the response time of a successful command."""
+        self.responses += 1
+        self.totalTime += seconds
+        self.maxTime = max(self.maxTime, seconds)
+        self.histogram[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+
+
+class SerialStats:
+    """
+    Per-command serial I/O statistics. Every command written to the console starts a new request,
+    the bytes received until the next command are counted for it. The response time runs from
+    the write until the caller reports the outcome with done(). The console wakeup is counted as
+    command WAKE, i.e. its failures are the failed wakeup calls.
+    """
+
+    def __init__(self):
+        self.commands = {}
+        self.current = None
+        self.started = 0.0
+
+    def get(self, cmd):
+        """Returns the CommandStats of cmd."""
+        if cmd not in self.commands:
+            self.commands[cmd] = CommandStats()
+        return self.commands[cmd]
+
+    def sent(self, cmd, size):
+        """Count size bytes written; a command name (not None) starts a new request."""
+        if cmd is not None:
+            self.current = cmd
+            self.started = time.monotonic()
+            self.get(cmd).requests += 1
+        if self.current is not None:
+            self.get(self.current).bytesOut += size
+
+    def received(self, size):
+        """Count size bytes received for the current command."""
+        if self.current is not None:
+            self.get(self.current).bytesIn += size
+
+    def done(self, ok=True):
+        """Report the outcome of the current command."""
+        if self.current is not None:
+            if ok:
+                self.get(self.current).record(time.monotonic() - self.started)
+            else:
+                self.get(self.current).failures += 1
+
+    def count(self, field, n=1):
+        """Add n to a counter (retries, crcErrors, strayBytes) of the current command."""
+        if self.current is not None:
+            stats = self.get(self.current)
+            setattr(stats, field, getattr(stats, field) + n)
+
+    def report(self):
+        """Returns the statistics as text table, one line per command."""
+        bounds = ['<%gms' % (b * 1000) for b in CommandStats.BUCKETS] + ['more']
+        lines = ['%-10s %6s %6s %5s %5s %4s %5s %8s %8s %7s %7s  ' % (
+            'CMD', 'REQ', 'OK', 'FAIL', 'RETRY', 'CRC', 'STRAY', 'IN', 'OUT', 'MEAN', 'MAX') +
+            ' '.join('%6s' % b for b in bounds)]
+        for cmd in sorted(self.commands):
+            c = self.commands[cmd]
+            mean = c.totalTime / c.responses if c.responses else 0.0
+            lines.append('%-10s %6d %6d %5d %5d %4d %5d %8d %8d %7.3f %7.3f  ' % (
+                cmd, c.requests, c.responses, c.failures, c.retries, c.crcErrors, c.strayBytes,
+                c.bytesIn, c.bytesOut, mean, c.maxTime) +
+                ' '.join('%6d' % n for n in c.histogram))
+        return '\n'.join(lines) + '\n'
+
+
+serialStats = SerialStats()
+
+
+def requestSerialStats(signum=None, frame=None):
+    """SIGUSR1 handler: only sets serialStatsRequested, the main loop calls writeSerialStats()."""
+    global serialStatsRequested
+    serialStatsRequested = True
+
+
+def writeSerialStats():
+    """Write the serial I/O statistics to TMPPATH/serialstats.txt."""
+    global serialStatsRequested
+    serialStatsRequested = False
+    text = serialStats.report()
+    with open(TMPPATH + 'serialstats.txt', 'w') as f:
+        f.write(tStamp() + 'Serial I/O statistics\n' + text)
+    print(tStamp() + 'Serial I/O statistics written to ' + TMPPATH + 'serialstats.txt')
+
+
 def blinkLED(value=0, duration=0):
     """Activate/deactivate BeagleBone USRLED, then wait duration. BeagleBone only."""
     if BEAGLEBONE == False:
@@ -141,24 +788,89 @@ def tStamp():
 
 
 def wxWrite(s, termChar='\n'):
-    """Write s to wx, terminate string with termChar, then DELAY execution."""
+    """Write s to wx, terminate string with termChar, then DELAY execution (only if WXFASTIO is disabled)."""
     if wx is not None:
         if isinstance(s, str):
             message = (s + termChar).encode('ascii')
+            # WRD is followed by binary bytes, the empty command is the wakeup call
+            name = 'WRD' if s.startswith('WRD') else s or 'WAKE'
         elif isinstance(s, bytes):
             message = s
+            name = None
         else:
             raise TypeError(f"wxWrite() expects str or bytes, got {type(s).__name__}")
 
+        serialStats.sent(name, len(message))
         wx.write(message)
         if isinstance(s, str) and s == 'VER':
-            time.sleep(WXDELAY * 3)
+            wxSettle(3)
         else:
-            time.sleep(WXDELAY)
+            wxSettle()
 
     return
 
 
+def wxSettle(factor=1):
+    """Fixed pause of factor * WXDELAY after a command. Only used for slow consoles (WXFASTIO = False)."""
+    if not WXFASTIO:
+        time.sleep(WXDELAY * factor)
+
+
+def wxSetTimeout(timeout):
+    """Set the read timeout of wx, the port is only reconfigured if the value changes."""
+    if wx.timeout != timeout:
+        wx.timeout = timeout
+
+
+def wxReadExact(size, timeout=None):
+    """Blocking read of size bytes from wx. Returns as soon as size bytes arrived, or whatever was received at timeout."""
+    if wx is None:
+        raise WxError("wx serial connection is not initialized")
+
+    deadline = time.monotonic() + (WXTIMEOUT if timeout is None else timeout)
+    return bytes(rxRing.read(size, deadline))
+
+
+def wxReadUntil(terminator=b'\n\r', timeout=None, idle=0):
+    """
+    Blocking read from wx until terminator has arrived, or timeout expired.
+    With idle > 0, keep on reading terminated lines as long as the next one
+    starts within idle seconds (multi-line responses of unknown length).
+    """
+    if wx is None:
+        raise WxError("wx serial connection is not initialized")
+
+    deadline = time.monotonic() + (WXTIMEOUT if timeout is None else timeout)
+    data = bytes(rxRing.readUntil(terminator, deadline))
+
+    if idle > 0 and data.endswith(terminator):
+        while True:
+            more = bytes(rxRing.readUntil(terminator, time.monotonic() + idle))
+            data += more
+            if not more.endswith(terminator):
+                break
+
+    return data
+
+
+def wxFlushInput():
+    """Discard everything received from wx so far (serial input buffer and rxRing)."""
+    wx.reset_input_buffer()
+    rxRing.reset()
+
+
+def wxReadOK(timeout=1.2):
+    """Read the response to an ASCII command answered with <LF><CR>OK<LF><CR>text<LF><CR>. Returns raw bytes."""
+    wxSettle()
+    if not WXFASTIO:
+        return wxRead(as_text=False)
+
+    raw = wxReadUntil(b'OK\n\r', timeout)
+    if raw.endswith(b'OK\n\r'):
+        raw += wxReadUntil(b'\n\r', timeout)
+    return raw
+
+
 def wxRead(as_text=True, encoding='ascii'):
     """Read all available data from wx. Return str or bytes based on as_text flag."""
     global wx
@@ -166,11 +878,12 @@ def wxRead(as_text=True, encoding='ascii'):
     if wx is None:
         raise WxError("wx serial connection is not initialized")
 
-    if wx.in_waiting == 0:
+    while rxRing.fill(0):
+        pass
+    raw = bytes(rxRing.read(rxRing.available(), 0))
+    if not raw:
         return '' if as_text else b''
 
-    raw = wx.read(wx.in_waiting)
-
     if as_text:
         try:
             return raw.decode(encoding, errors='replace')  # avoid crashing
@@ -181,20 +894,115 @@ def wxRead(as_text=True, encoding='ascii'):
         return raw
 
 
-def openWxComm():
-    """Open UART for communication with the Davis console."""
-    global wx, MAXATTEMPTS
+class TcpTransport:
+    """
+    Console connection over TCP (WeatherLink IP, or a serial-to-network bridge such as ser2net)
+    with the part of the serial.Serial interface used here: read() with timeout, write(), in_waiting,
+    the buffer resets and fileno() for the asyncio reader. The socket is non-blocking, all waits
+    are done with select(), so a dead connection can not hang a read or write.
+    """
+
+    def __init__(self, host, port, connectTimeout=5.0):
+        self.address = (host, port)
+        self.timeout = WXTIMEOUT
+        self.pending = bytearray()
+        self.is_open = False
+        try:
+            self.sock = socket.create_connection(self.address, connectTimeout)
+        except OSError as e:
+            raise WxError(f"Failed to connect to console at {host}:{port}: {e}")
+        self.sock.setblocking(False)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.fd = self.sock.fileno()
+        self.is_open = True
+
+    def fileno(self):
+        return self.fd
+
+    def receive(self, timeout):
+        """Move everything received into pending, waiting up to timeout seconds (None: no limit) for the first byte."""
+        if timeout != 0 and not select.select([self.sock], [], [], timeout)[0]:
+            return
+        while True:
+            try:
+                data = self.sock.recv(4096)
+            except (BlockingIOError, InterruptedError):
+                return
+            if not data:
+                self.close()
+                raise WxError('Connection closed by console at %s:%d.' % self.address)
+            self.pending += data
+
+    @property
+    def in_waiting(self):
+        self.receive(0)
+        return len(self.pending)
+
+    def read(self, size=1):
+        """Read size bytes, returns less if timeout expires first (as serial.Serial.read)."""
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        self.receive(0)
+        while len(self.pending) < size:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            self.receive(remaining)
+        data = bytes(self.pending[:size])
+        del self.pending[:size]
+        return data
+
+    def write(self, data):
+        """Send all of data, waiting at most WXTIMEOUT seconds for the socket to accept more."""
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[self.sock.send(view):]
+            except (BlockingIOError, InterruptedError):
+                if not select.select([], [self.sock], [], WXTIMEOUT)[1]:
+                    raise WxError('Timeout sending to console at %s:%d.' % self.address)
+        return len(data)
+
+    def reset_input_buffer(self):
+        self.receive(0)
+        self.pending.clear()
+
+    def reset_output_buffer(self):
+        # data handed to the socket can not be taken back
+        pass
+
+    def close(self):
+        if self.is_open:
+            self.is_open = False
+            self.sock.close()
+
+
+def openTransport():
+    """Returns the connection to the console: TcpTransport if WXHOST is set, otherwise the serial port WXPORT."""
+    if WXHOST:
+        print(tStamp() + 'Connecting to console at %s:%d.' % (WXHOST, WXHOSTPORT))
+        return TcpTransport(WXHOST, WXHOSTPORT, WXCONNECTTIMEOUT)
 
     if BEAGLEBONE == True:
         open('/sys/kernel/debug/omap_mux/' + WXRX_MUX, 'wb').write('%X' % (WXRECEIVE_ENABLE + WXMUX_MODE))
         open('/sys/kernel/debug/omap_mux/' + WXTX_MUX, 'wb').write('%X' % WXMUX_MODE)
 
     try:
-        wx = serial.Serial(WXPORT, WXBAUDRATE, WXBYTESIZE, WXPARITY, WXSTOPBITS, WXTIMEOUT, WXXONOFF)
+        return serial.Serial(WXPORT, WXBAUDRATE, WXBYTESIZE, WXPARITY, WXSTOPBITS, WXTIMEOUT, WXXONOFF)
     except serial.SerialException as e:
         raise WxError(f"Failed to open serial port {WXPORT}: {e}")
 
-    time.sleep(WXDELAY)
+
+def openWxComm():
+    """Open the connection (UART or TCP, see openTransport) for communication with the Davis console."""
+    global wx, MAXATTEMPTS
+
+    wx = openTransport()
+
+    wxSession.invalidate()
+    wxClock.invalidate()
+    rxRing.reset()
+    consoleInfoCache.clear()
+    wxSettle()
     if wx == None or not wx.is_open:
         return
     else:
@@ -204,20 +1012,26 @@ def openWxComm():
         for attemptNo in range(1, MAXATTEMPTS + 1):
             print(tStamp() + 'Console wakeup call, attempt no. %d of 3.' % attemptNo)
             wxWrite('')
-            time.sleep(WXDELAY)
+            wxSettle()
 
-            if wx.in_waiting == 2:
+            t0 = time.monotonic()
+            if len(wxReadExact(2, latency('WAKE', 1.2).timeout())) == 2:
+                latency('WAKE').record(time.monotonic() - t0)
+                serialStats.done()
                 dummyBuffer = wxRead()
                 print(tStamp() + 'Console is awake after %d wakeup call(s).' % attemptNo)
                 wakeUpSuccess = True
                 wxWrite('TEST')
-                time.sleep(WXDELAY)
-                dummyBuffer = wxRead()
+                wxSettle()
+                dummyBuffer = wxReadUntil(b'TEST\n\r', 1.2)
+                serialStats.done(dummyBuffer.endswith(b'TEST\n\r'))
                 break
             else:
                 print(tStamp() + 'Console NOT responding to wakeup call.')
+                latency('WAKE').fail(timedOut=True)
+                serialStats.done(False)
                 dummyBuffer = wxRead()
-                time.sleep(1.5)
+                time.sleep(latency('WAKE').backoff())
 
         if wakeUpSuccess == True:
             print(tStamp() + 'The console is responding.')
@@ -232,8 +1046,8 @@ def insertTestData(negative=0):
     """Populate global dictionaries wxDict and wxMinMax with test data."""
     global wxDict
     global wxMinMax
-    wxDict = {}
-    wxMinMax = {}
+    wxDict = Observation()
+    wxMinMax = HiLows()
     wxDict['VER'] = 'JAN 01 1942'
     wxDict['NVER'] = 'NVER TEST 1.42'
     wxDict['BARDATA'] = 'BARDATA TEST 42'
@@ -418,8 +1232,10 @@ def record_wc_update():
 
 def read_response_after_ok(strip_ok=True) -> str:
     """Read from wx after sending a command, and return everything after 'OK'."""
-    time.sleep(WXDELAY)
-    raw = wx.read(wx.in_waiting)
+    raw = wxReadOK()
+    serialStats.done(bool(raw))
+    if not raw:
+        wxSession.invalidate()
     decoded = raw.decode('ascii', errors='replace').replace('\n\r', ' ', 5)
 
     ok_index = decoded.find('OK')
@@ -428,98 +1244,155 @@ def read_response_after_ok(strip_ok=True) -> str:
     return decoded.strip()  # fallback: return all
 
 
-def wake_console(max_attempts=3, timeout=1.2):
+def consoleInfo(cmd, fetch):
+    """
+    Returns the console's response to cmd (VER, NVER, BARDATA, RXCHECK) from consoleInfoCache,
+    calling fetch() only if there is no response yet or it is older than CONSOLEINFOTTL[cmd] seconds.
+    A TTL of None keeps the response until the port is reopened, 0 (or a missing entry) disables caching.
+    """
+    if not consoleInfoStale(cmd):
+        return consoleInfoCache[cmd][0]
+
+    value = fetch()
+    if value:
+        consoleInfoCache[cmd] = (value, time.monotonic())
+    return value
+
+
+def consoleInfoStale(cmd, margin=0):
+    """True if there is no cached response to cmd, or it expires within margin seconds."""
+    if cmd not in consoleInfoCache:
+        return True
+    ttl = CONSOLEINFOTTL.get(cmd, 0)
+    return ttl is not None and time.monotonic() - consoleInfoCache[cmd][1] >= ttl - margin
+
+
+def readVersion(cmd):
+    """Send VER or NVER to the console, returns the text after OK (tries twice)."""
+    for attempt in range(2):
+        wxSession.ensureAwake()
+        wxWrite(cmd)
+        value = read_response_after_ok()
+        if value:
+            break
+    return value
+
+
+def readRxCheck():
+    """Send RXCHECK to the console, returns the five diagnostic counters as string ('' if no response)."""
+    wxWrite('RXCHECK')
+    raw_rx = wxReadOK()
+    rxcheckBytes = len(raw_rx)
+    serialStats.done(rxcheckBytes > 0)
+    print(tStamp() + '%d bytes received in RXCHECK response.' % rxcheckBytes)
+    if rxcheckBytes == 0:
+        return ''
+
+    rx_text = parseRxCheck(raw_rx)
+    print(tStamp() + 'RXCHECK: ' + rx_text)
+    return rx_text
+
+
+def parseRxCheck(raw):
+    """Returns the five RXCHECK counters from the raw response (bytes) as string."""
+    # Normalize whitespace, strip out 'OK'
+    return ' '.join(raw.decode('ascii', errors='replace').split()).replace('OK', '').strip()
+
+
+def wake_console(max_attempts=3, timeout=None):
     """
     Try to wake the Davis console by sending LF and expecting LF CR in response.
     Retries up to max_attempts. Returns True if wakeup successful.
+    Without timeout, the timeout is derived from the observed wakeup response times.
     """
+    tracker = latency('WAKE', 1.2)
     for attempt in range(1, max_attempts + 1):
-        wx.reset_input_buffer()
-        wxWrite('\n')
-
-        start_time = time.time()
-        buffer = b""
-
-        while time.time() - start_time < timeout:
-            if wx.in_waiting:
-                buffer += wx.read(wx.in_waiting)
-                # Look for LF CR pairs
-                if b"\x0A\x0D" in buffer:
-                    # Collapse multiple pairs if they exist
-                    pairs = buffer.count(b"\x0A\x0D")
-                    if DEBUG:
-                        print(tStamp() + f"Wakeup successful (attempt {attempt}). "
-                                         f"Got: {print_hex_bytes(buffer)} "
-                                         f"(pairs={pairs})")
-                    return True
-            time.sleep(0.01)
+        wxFlushInput()
+        wxWrite('')
+
+        t0 = time.monotonic()
+        buffer = wxReadUntil(b"\x0A\x0D", timeout or tracker.timeout())
+        # Look for LF CR pairs
+        if buffer.endswith(b"\x0A\x0D"):
+            tracker.record(time.monotonic() - t0)
+            serialStats.done()
+            if DEBUG:
+                print(tStamp() + f"Wakeup successful (attempt {attempt}). "
+                                 f"Got: {print_hex_bytes(buffer)}")
+            return True
 
+        tracker.fail(timedOut=True)
+        serialStats.done(False)
         if DEBUG:
             print(tStamp() + f"Wakeup attempt {attempt} failed (got {print_hex_bytes(buffer)})")
 
     return False
 
 
-def request_packet(cmd, expected_size, timeout=2, retries=1, check_header=None):
+def request_packet(cmd, expected_size, timeout=2, retries=1, check_header=None, frames=1, minTimeout=0):
     """
     Requests a packet from the console, checks CRC, and returns the payload.
     Payload starts with 'LOO' (if check_header is provided) and includes the CRC.
+    With frames > 1 the payload consists of that many equally sized frames
+    (e.g. LPS 3 2), each of them is checked for header and CRC.
     Returns (payload, raw) or (None, None) if timeout, bad header, or CRC error.
+    The timeout is the initial value, it adapts to the observed response times
+    of cmd (but stays >= minTimeout), and the retries are dropped while cmd keeps failing.
     """
 
+    tracker = latency(cmd, timeout)
+    retries = tracker.retries(retries)
     for attempt in range(retries + 1):
-        wx.reset_input_buffer()
+        wxFlushInput()
         wx.reset_output_buffer()
-        time.sleep(WXDELAY)
+        wxSettle()
 
-        # Proper wake-up sequence
-        if not wake_console():
+        # Wake up the console, unless it is still awake from the previous command
+        if not wxSession.ensureAwake():
             print(tStamp() + "Console did not wake up.")
             return None, None
 
         # Request the packet
+        t0 = time.monotonic()
         wxWrite(cmd)
-        time.sleep(WXDELAY)
+        wxSettle()
 
-        # Wait for enough bytes
-        start_time = time.time()
-        while wx.in_waiting < expected_size:
-            if time.time() - start_time > timeout:
-                print(tStamp() + f"Timeout: only {wx.in_waiting} bytes for {cmd}.")
-                break
-            time.sleep(0.01)
+        # Block until the first byte arrives, tolerate stray LF/CR before ACK
+        deadline = t0 + max(tracker.timeout(), minTimeout)
+        skipped = rxRing.skip(b'\x0A\x0D', deadline)
+        serialStats.count('strayBytes', skipped)
+        if DEBUG and skipped:
+            print(tStamp() + f"Skipped {skipped} stray LF/CR byte(s) before ACK.")
 
-        if wx.in_waiting < expected_size:
+        # Then block until the rest of the packet arrived (or the deadline passed),
+        # raw is a view into rxRing (valid until the next request)
+        raw = rxRing.read(expected_size, deadline)
+
+        if len(raw) < expected_size:
+            print(tStamp() + f"Timeout: only {len(raw)} bytes for {cmd}.")
+            wxSession.invalidate()
+            tracker.fail(timedOut=True)
+            serialStats.done(False)
             if attempt < retries:
                 print(tStamp() + f"Retrying {cmd} (attempt {attempt+1}/{retries})...")
+                serialStats.count('retries')
                 continue
             return None, None
 
-        raw = wx.read(expected_size)
-
-        # --- Guard against short packets ---
-        if len(raw) < expected_size:
-            print(tStamp() + f"{cmd} - Short packet: {len(raw)} < {expected_size}")
-            return None, None
-
-        # --- Tolerate stray LF/CR before ACK ---
-        while raw and raw[0] in (0x0A, 0x0D):
-            if DEBUG:
-                print(tStamp() + f"Skipping stray LF/CR before ACK: {raw[0]:02X}")
-            raw = raw[1:]
-
-        if not raw:
-            print(tStamp() + f"{cmd} - No data left after stripping LF/CR.")
-            return None, None
-
         # Verify ACK
         if raw[0] != 0x06:
             if 0x20 <= raw[0] <= 0x7E:  # ASCII instead of ACK
                 print(tStamp() + f"{cmd} - Got ASCII instead of ACK ({raw[0]:02X}), discarding and retrying...")
+                wxSession.invalidate()
+                serialStats.done(False)
+                serialStats.count('retries')
                 continue  # retry without failing
             else:
                 print(tStamp() + f"{cmd} - Expected ACK 0x06, got {raw[0]:02X}. "
                                  f"Full raw: {print_hex_bytes(raw)}")
+                wxSession.invalidate()
+                tracker.fail()
+                serialStats.done(False)
             return None, None
 
 
@@ -529,19 +1402,30 @@ def request_packet(cmd, expected_size, timeout=2, retries=1, check_header=None):
             r_str = str(print_hex_bytes(raw))
             print(tStamp() + f"DEBUG: ===== {cmd:<8} => raw =========: {r_str:<20}")
 
-        # Check header if required
-        if check_header is not None:
-            if payload[:len(check_header)] != check_header:
-                print(tStamp() + f"{cmd} - Invalid packet start: {payload[:len(check_header)]}")
+        frame_size = len(payload) // frames
+        for offset in range(0, frame_size * frames, frame_size):
+            frame = payload[offset:offset + frame_size]
+
+            # Check header if required
+            if check_header is not None:
+                if frame[:len(check_header)] != check_header:
+                    print(tStamp() + f"{cmd} - Invalid packet start: {bytes(frame[:len(check_header)])}")
+                    tracker.fail()
+                    serialStats.done(False)
+                    return None, None
+
+            # CRC check, the CRC over data + CRC is 0
+            if CRC(frame) != 0:
+                crc_received = int.from_bytes(frame[-2:], 'big')
+                crc_calculated = CRC(frame[:-2])
+                print(tStamp() + f"{cmd} - CRC error: received {crc_received}, calculated {crc_calculated}")
+                tracker.fail()
+                serialStats.count('crcErrors')
+                serialStats.done(False)
                 return None, None
 
-        # CRC check
-        crc_received = int.from_bytes(payload[-2:], 'big')
-        crc_calculated = CRC(payload[:-2])
-        if crc_calculated != crc_received:
-            print(tStamp() + f"{cmd} - CRC error: received {crc_received}, calculated {crc_calculated}")
-            return None, None
-
+        tracker.record(time.monotonic() - t0)
+        serialStats.done()
         print(tStamp() + f"{cmd} packet CRC is verified.")
         return payload, raw
 
@@ -549,31 +1433,28 @@ def request_packet(cmd, expected_size, timeout=2, retries=1, check_header=None):
 
 
 
-def read_ascii_block(cmd, timeout=2, terminator=b"\n\r"):
+def read_ascii_block(cmd, timeout=2, terminator=b"\n\r", last=None):
     """
     Send an ASCII command (e.g. 'BARDATA') and read the full response
-    until the last line ends with <LF><CR>.
+    until the last line ends with <LF><CR>. If the first word of the last
+    line is known (last), return as soon as that line is complete.
     Returns the full decoded string, or None on timeout.
     """
     wxWrite(cmd)
-    time.sleep(WXDELAY)
-
-    resp = b''
-    start_time = time.time()
-
-    while True:
-        if wx.in_waiting:
-            resp += wx.read(wx.in_waiting)
+    wxSettle()
 
-            # Heuristic: last line of BARDATA always ends with '\n\r'
-            if resp.endswith(terminator):
-                break
-
-        if time.time() - start_time > timeout:
-            print(tStamp() + f"{cmd} - Timeout while waiting for response.")
-            return None
+    if WXFASTIO and last is not None:
+        resp = wxReadUntil(last, timeout)
+        if resp.endswith(last):
+            resp += wxReadUntil(terminator, timeout)
+    else:
+        # unknown length: take lines as long as they keep coming
+        resp = wxReadUntil(terminator, timeout, idle=WXDELAY)
 
-        time.sleep(0.01)
+    serialStats.done(resp.endswith(terminator))
+    if not resp.endswith(terminator):
+        print(tStamp() + f"{cmd} - Timeout while waiting for response.")
+        return None
 
     return resp.decode('ascii', errors='ignore')
 
@@ -587,8 +1468,6 @@ def readWxData():
     """Populate global dictionary wxDict, returns size of received LOOP packet (should be 100). Also updates PRESENTMONTH."""
     global L1
     global PRESENTMONTH
-    global SOLARCF
-    global UVCF
     global lastWxYearMonth
     global wx
 
@@ -598,34 +1477,22 @@ def readWxData():
     i = j = 0
     s = t = ''
     wxDict['PROGRAMVERSION'] = PROGRAMVERSION
-    wxWrite('VER')
-    wxDict['VER'] = read_response_after_ok()
-
-    # Retry if empty
-    if not wxDict['VER']:
-        wxWrite('VER')
-        wxDict['VER'] = read_response_after_ok()
-
-    wxWrite('NVER')
-    wxDict['NVER'] = read_response_after_ok()
+    # firmware date and version never change while the port is open
+    wxDict['VER'] = consoleInfo('VER', lambda: readVersion('VER'))
+    wxDict['NVER'] = consoleInfo('NVER', lambda: readVersion('NVER'))
 
-    payload, raw = request_packet('GETTIME', 9, timeout=2, check_header=None)
-    if not payload or len(raw) < 9:
-        raise WxError("GETTIME packet too short")
+    if wxClock.stale():
+        syncConsoleClock()
 
-    # payload includes the whole 9 bytes (e.g. data + CRC at the end)
-    if CRC(payload[:-2]) != int.from_bytes(payload[-2:], 'big'):
-        raise WxError('Invalid CRC in GETTIME packet')
+    t = wxClock.now()
 
-    t = raw  # for unpack_from offsets
-
-    time_secs = str(struct.unpack_from('B', t, 1)[0])
-    time_mins = str(struct.unpack_from('B', t, 2)[0])
-    time_hrs = str(struct.unpack_from('B', t, 3)[0])
-    time_day = str(struct.unpack_from('B', t, 4)[0])
-    theMonth = struct.unpack_from('B', t, 5)[0]
+    time_secs = str(t.second)
+    time_mins = str(t.minute)
+    time_hrs = str(t.hour)
+    time_day = str(t.day)
+    theMonth = t.month
     time_month = str(theMonth)
-    time_year = str(struct.unpack_from('B', t, 6)[0] + 1900)
+    time_year = str(t.year)
 
     # Format output
     t_str = (
@@ -651,8 +1518,12 @@ def readWxData():
     wxDict['TIMESTAMP_APRS'] = aprsTime
 
     # read bardata
+    # without LOOP2 packets BARDATA is the only source of the dew point, fetch it every cycle then
     wxDict['BARDATA'] = ''
-    s = read_ascii_block('BARDATA')
+    if LPS:
+        s = consoleInfo('BARDATA', lambda: read_ascii_block('BARDATA', last=b'OFFSET'))
+    else:
+        s = read_ascii_block('BARDATA', last=b'OFFSET')
     if s:
         wxDict['BARDATA'] = s
 
@@ -662,7 +1533,6 @@ def readWxData():
             j = sub.find('\n\r')
             dew_f = float(sub[:j])
             wxDict['DEWPOINT_F'] = dew_f
-            wxDict['DEWPOINT_C'] = round(FtoC(dew_f), 1)
 
     ###
     #wxWrite('BARDATA')
@@ -680,7 +1550,13 @@ def readWxData():
 
     wxDict['CRC-CALC'] = 1
 
-    payload, q = request_packet('LOOP 1', 100, check_header=b'LOO')
+    loop2 = None
+    if LPS and LPSPAIR and (lpsPairFailures < 3 or time.monotonic() >= lpsPairRetry) and firmwareVersion() >= 1.90:
+        payload, loop2 = readLoopPair()
+        q = b'\x06' + payload if payload else None
+
+    if loop2 is None:
+        payload, q = request_packet('LOOP 1', 100, check_header=b'LOO')
 
     if not payload:
         print(tStamp() + 'Failed to get valid LOOP packet, aborting.')
@@ -690,548 +1566,24 @@ def readWxData():
         print(tStamp() + f"Error: LOOP1 raw packet too short ({len(q)} bytes, expected {expected_size}).")
         return None
 
-    crc_calc = wxDict['CRC-CALC']
     loop1Status = 1
 
     if payload:
-        # CRC check (bytes 1..100)
-        crc_calc = CRC(q[1:101])
-        wxDict['CRC-CALC'] = crc_calc
+        # the CRC (bytes 1..100) has already been verified by request_packet
+        wxDict['CRC-CALC'] = 0
         wxDict['CRC_PAD'] = struct.unpack_from('<H', q, 95)[0]  # little-endian CRC from packet
 
-        if crc_calc == 0:
-            lastUpdateTime = wxDict['TIMESTAMP_PC'] = datetime.datetime.now()
-            L1 = q[1:]  # Store the payload without the preamble byte
-            writeDump(TMPPATH + 'LOOP1', L1)
-            loop1Status = 0
-        else:
-            print(tStamp() + 'Invalid LOOP packet CRC.')
-            return 1
-
-        s = q[3:]  # Skip preamble + packet type + unused byte
-
-        j = wxDict['BAROTREND'] = struct.unpack_from('B', s, 1)[0]
-        t = 'Barometric pressure is '
-        if j == 0:
-            t += 'steady.'
-        elif j == 20:
-            t += 'rising slowly.'
-        elif j == 60:
-            t += 'rising rapidly.'
-        elif j == 196:
-            t += 'falling rapidly.'
-        elif j == 236:
-            t += 'falling slowly.'
-        else:
-            t = 'Barometric trend is not available.\n                                 Requires 3 hours of data.'
-        wxDict['BAROTRENDTEXT'] = t
-        j = wxDict['BAROMETER_INHG'] = round(struct.unpack_from('H', s, 5)[0] / 1000.0, 2)
-        wxDict['BAROMETER_HPA'] = round(j * 33.8639, 1)
-        j = wxDict['INTEMP_F'] = struct.unpack_from('H', s, 7)[0] / 10.0
-        wxDict['INTEMP_C'] = FtoC(j)
-        wxDict['INHUM_P'] = struct.unpack_from('B', s, 9)[0]
-        j = wxDict['OUTTEMP_F'] = struct.unpack_from('H', s, 10)[0] / 10.0
-        wxDict['OUTTEMP_C'] = FtoC(j)
-        j = wxDict['AVGWIND10_MPH'] = struct.unpack_from('B', s, 13)[0]
-        if j > 300:
-            j = 0
-            wxDict['AVGWIND10_MPH'] = 0
-        wxDict['AVGWIND10_KTS'] = round(j * 0.868976, 1)
-        wxDict['AVGWIND10_MSEC'] = round(j * 0.44704, 1)
-        wxDict['AVGWIND10_BF'] = getBeaufortIndex(wxDict['AVGWIND10_KTS'])
-        j = wxDict['WIND_MPH'] = struct.unpack_from('B', s, 12)[0]
-        wxDict['WIND_KTS'] = round(j * 0.868976, 1)
-        wxDict['WIND_MSEC'] = round(j * 0.44704, 1)
-        wxDict['WIND_BF'] = getBeaufortIndex(wxDict['WIND_KTS'])
-        t = str(struct.unpack_from('H', s, 14)[0])
-        if t == '0':
-            t = '000'
-        if len(t) < 3:
-            t = '0' + t
-        if len(t) < 3:
-            t = '0' + t
-        wxDict['WINDDIR'] = t
-        wxDict['WIND_CARDINAL'] = getCardinalDirection(int(t))
-        wxDict['OUTHUM_P'] = struct.unpack_from('B', s, 31)[0]
-        if wxDict['OUTHUM_P'] > 100:
-            print(tStamp() + 'Value out of range (manually verify console value) : OUTHUM_P = %d.' % wxDict['OUTHUM_P'])
-            wxDict['OUTHUM_P'] = -1
-            wxDict['DATAERROR'] = True
-        if INCHES == False:
-            wxDict['RAINRATE_MMHR'] = round(struct.unpack_from('H', s, 39)[0] * 0.2, 1)
-            wxDict['DAYRAIN_MM'] = round(struct.unpack_from('H', s, 48)[0] * 0.2, 1)
-            wxDict['STORMRAIN_MM'] = round(struct.unpack_from('H', s, 44)[0] * 0.2, 1)
-            wxDict['MONTHRAIN_MM'] = round(struct.unpack_from('H', s, 50)[0] * 0.2, 1)
-            wxDict['YEARRAIN_MM'] = round(struct.unpack_from('H', s, 52)[0] * 0.2, 1)
-        else:
-            wxDict['RAINRATE_MMHR'] = round(struct.unpack_from('H', s, 39)[0] * 0.01 * 25.4, 1)
-            wxDict['DAYRAIN_MM'] = round(struct.unpack_from('H', s, 48)[0] * 0.01 * 25.4, 1)
-            wxDict['STORMRAIN_MM'] = round(struct.unpack_from('H', s, 44)[0] * 0.01 * 25.4, 1)
-            wxDict['MONTHRAIN_MM'] = round(struct.unpack_from('H', s, 50)[0] * 0.01 * 25.4, 1)
-            wxDict['YEARRAIN_MM'] = round(struct.unpack_from('H', s, 52)[0] * 0.01 * 25.4, 1)
-        t = struct.unpack_from('H', s, 46)[0]
-        if t == 65535:
-            wxDict['STORMSTART'] = '01.01.1970'
-        else:
-            storm_year = t % 128
-            t = t - storm_year
-            storm_day = t % 4096
-            storm_day = storm_day >> 7
-            t = t - storm_day
-            t = t >> 12
-            storm_month = t
-            t = ''
-            if storm_day < 10:
-                t = '0'
-            t += str(storm_day) + '.'
-            if storm_month < 10:
-                t += '0'
-            t += str(storm_month) + '.'
-            t += str(2000 + storm_year)
-            wxDict['STORMSTART'] = t
-        t = 0
-        if INCHES == False:
-            t = wxDict['ET_DAY_MM'] = round(struct.unpack_from('H', s, 54)[0] * 0.0254, 1)
-            wxDict['ET_MONTH_MM'] = round(t + struct.unpack_from('H', s, 56)[0] * 0.254, 1)
-            wxDict['ET_YEAR_MM'] = round(t + struct.unpack_from('H', s, 58)[0] * 0.254, 1)
-        else:
-            t = wxDict['ET_DAY_MM'] = round(struct.unpack_from('H', s, 54)[0] * 0.001 * 25.4, 1)
-            wxDict['ET_MONTH_MM'] = round(t + struct.unpack_from('H', s, 56)[0] * 0.01 * 25.4, 1)
-            wxDict['ET_YEAR_MM'] = round(t + struct.unpack_from('H', s, 58)[0] * 0.01 * 25.4, 1)
-        if UVCF != 0 and (UVCF < 50 or UVCF > 150):
-            UVCF = 100
-        wxDict['UVINDEX'] = struct.unpack_from('B', s, 41)[0] / 10.0 * (UVCF / 100)
-        if wxDict['UVINDEX'] > 16:
-            print(tStamp() + 'Value out of range (UVCF too high?) : UVINDEX = %d.' % wxDict['UVINDEX'])
-            wxDict['UVINDEX'] = -1
-            wxDict['DATAERROR'] = True
-        if SOLARCF != 0 and (SOLARCF < 50 or SOLARCF > 100):
-            SOLARCF = 100
-        wxDict['SOLAR_W'] = int(struct.unpack_from('H', s, 42)[0] * (SOLARCF / 100))
-        if wxDict['SOLAR_W'] > 1800:
-            print(tStamp() + 'Value out of range (SOLARCF too high?) : SOLAR_W = %d.' % wxDict['SOLAR_W'])
-            wxDict['SOLAR_W'] = -1
-            wxDict['DATAERROR'] = True
-        wxDict['FCICON'] = struct.unpack_from('B', s, 87)[0]
-        wxDict['VOLTAGE'] = round(struct.unpack_from('H', s, 85)[0] * 300 / 512 / 100, 2)
-        wxDict['BATTERYSTATUS'] = struct.unpack_from('B', s, 84)[0]
-        wxDict['FCRULE'] = j = struct.unpack_from('B', s, 88)[0]
-        if j == 0:
-            t = 'Mostly clear and cooler.'
-        elif j == 1:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 2:
-            t = 'Mostly clear for 12 hours with little temperature change.'
-        elif j == 3:
-            t = 'Mostly clear for 12 to 24 hours and cooler.'
-        elif j == 4:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 5:
-            t = 'Partly cloudy and cooler.'
-        elif j == 6:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 7:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 8:
-            t = 'Mostly clear and warmer.'
-        elif j == 9:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 10:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 11:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 12:
-            t = 'Increasing clouds and warmer. Precipitation possible within 24 to 48 hours.'
-        elif j == 13:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 14:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 15:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 24 hours.'
-        elif j == 16:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 17:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 18:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 19:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 12 hours.'
-        elif j == 20:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 21:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 22:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 23:
-            t = 'Increasing clouds and warmer. Precipitation possible within 24 hours.'
-        elif j == 24:
-            t = 'Mostly clear and warmer. Increasing winds.'
-        elif j == 25:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 26:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 27:
-            t = 'Increasing clouds and warmer. Precipitation possible within 12 hours. Increasing winds.'
-        elif j == 28:
-            t = 'Mostly clear and warmer. Increasing winds.'
-        elif j == 29:
-            t = 'Increasing clouds and warmer.'
-        elif j == 30:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 31:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 32:
-            t = 'Increasing clouds and warmer. Precipitation possible within 12 hours. Increasing winds.'
-        elif j == 33:
-            t = 'Mostly clear and warmer. Increasing winds.'
-        elif j == 34:
-            t = 'Increasing clouds and warmer.'
-        elif j == 35:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 36:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 37:
-            t = 'Increasing clouds and warmer. Precipitation possible within 12 hours. Increasing winds.'
-        elif j == 38:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 39:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 40:
-            t = 'Mostly clear and warmer. Precipitation possible within 48 hours.'
-        elif j == 41:
-            t = 'Mostly clear and warmer.'
-        elif j == 42:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 43:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 44:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 24 to 48 hours.'
-        elif j == 45:
-            t = 'Increasing clouds with little temperature change.'
-        elif j == 46:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 47:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 48:
-            t = 'Increasing clouds and warmer. Precipitation possible within 12 to 24 hours.'
-        elif j == 49:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 50:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 51:
-            t = 'Increasing clouds and warmer. Precipitation possible within 12 to 24 hours. Windy.'
-        elif j == 52:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 53:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 54:
-            t = 'Increasing clouds and warmer. Precipitation possible within 12 to 24 hours. Windy.'
-        elif j == 55:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 56:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 57:
-            t = 'Increasing clouds and warmer. Precipitation possible within 6 to 12 hours.'
-        elif j == 58:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 59:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 60:
-            t = 'Increasing clouds and warmer. Precipitation possible within 6 to 12 hours. Windy.'
-        elif j == 61:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 62:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 63:
-            t = 'Increasing clouds and warmer. Precipitation possible within 12 to 24 hours. Windy.'
-        elif j == 64:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 65:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 66:
-            t = 'Increasing clouds and warmer. Precipitation possible within 12 hours.'
-        elif j == 67:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 68:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 69:
-            t = 'Increasing clouds and warmer. Precipitation likley.'
-        elif j == 70:
-            t = 'Clearing and cooler. Precipitation ending within 6 hours.'
-        elif j == 71:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 72:
-            t = 'Clearing and cooler. Precipitation ending within 6 hours.'
-        elif j == 73:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 74:
-            t = 'Clearing and cooler. Precipitation ending within 6 hours.'
-        elif j == 75:
-            t = 'Partly cloudy and cooler.'
-        elif j == 76:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 77:
-            t = 'Mostly clear and cooler.'
-        elif j == 78:
-            t = 'Clearing and cooler. Precipitation ending within 6 hours.'
-        elif j == 79:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 80:
-            t = 'Clearing and cooler. Precipitation ending within 6 hours.'
-        elif j == 81:
-            t = 'Mostly clear and cooler.'
-        elif j == 82:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 83:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 84:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 24 hours.'
-        elif j == 85:
-            t = 'Mostly cloudy and cooler. Precipitation continuing.'
-        elif j == 86:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 87:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 88:
-            t = 'Mostly cloudy and cooler. Precipitation likely.'
-        elif j == 89:
-            t = 'Mostly cloudy with little temperature change. Precipitation continuing.'
-        elif j == 90:
-            t = 'Mostly cloudy with little temperature change. Precipitation likely.'
-        elif j == 91:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 92:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 93:
-            t = 'Increasing clouds and cooler. Precipitation possible and windy within 6 hours.'
-        elif j == 94:
-            t = 'Increasing clouds with little temperature change. Precipitation possible and windy within 6 hours.'
-        elif j == 95:
-            t = 'Mostly cloudy and cooler. Precipitation continuing. Increasing winds.'
-        elif j == 96:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 97:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 98:
-            t = 'Mostly cloudy and cooler. Precipitation likely. Increasing winds.'
-        elif j == 99:
-            t = 'Mostly cloudy with little temperature change. Precipitation continuing. Increasing winds.'
-        elif j == 100:
-            t = 'Mostly cloudy with little temperature change. Precipitation likely. Increasing winds.'
-        elif j == 101:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 102:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 103:
-            t = 'Increasing clouds and cooler. Precipitation possible within 12 to 24 hours possible wind shift to the W, NW, or N.'
-        elif j == 104:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 12 to 24 hours possible wind shift to the W, NW, or N.'
-        elif j == 105:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 106:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 107:
-            t = 'Increasing clouds and cooler. Precipitation possible within 6 hours possible wind shift to the W, NW, or N.'
-        elif j == 108:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 6 hours possible wind shift to the W, NW, or N.'
-        elif j == 109:
-            t = 'Mostly cloudy and cooler. Precipitation ending within 12 hours possible wind shift to the W, NW, or N.'
-        elif j == 110:
-            t = 'Mostly cloudy and cooler. Possible wind shift to the W, NW, or N.'
-        elif j == 111:
-            t = 'Mostly cloudy with little temperature change. Precipitation ending within 12 hours possible wind shift to the W, NW, or N.'
-        elif j == 112:
-            t = 'Mostly cloudy with little temperature change. Possible wind shift to the W, NW, or N.'
-        elif j == 113:
-            t = 'Mostly cloudy and cooler. Precipitation ending within 12 hours possible wind shift to the W, NW, or N.'
-        elif j == 114:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 115:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 116:
-            t = 'Mostly cloudy and cooler. Precipitation possible within 24 hours possible wind shift to the W, NW, or N.'
-        elif j == 117:
-            t = 'Mostly cloudy with little temperature change. Precipitation ending within 12 hours possible wind shift to the W, NW, or N.'
-        elif j == 118:
-            t = 'Mostly cloudy with little temperature change. Precipitation possible within 24 hours possible wind shift to the W, NW, or N.'
-        elif j == 119:
-            t = 'Clearing, cooler and windy. Precipitation ending within 6 hours.'
-        elif j == 120:
-            t = 'Clearing, cooler and windy.'
-        elif j == 121:
-            t = 'Mostly cloudy and cooler. Precipitation ending within 6 hours. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 122:
-            t = 'Mostly cloudy and cooler. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 123:
-            t = 'Clearing, cooler and windy.'
-        elif j == 124:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 125:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 126:
-            t = 'Mostly cloudy with little temperature change. Precipitation possible within 12 hours. Windy.'
-        elif j == 127:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 128:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 129:
-            t = 'Increasing clouds and cooler. Precipitation possible within 12 hours, possibly heavy at times. Windy.'
-        elif j == 130:
-            t = 'Mostly cloudy and cooler. Precipitation ending within 6 hours. Windy.'
-        elif j == 131:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 132:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 133:
-            t = 'Mostly cloudy and cooler. Precipitation possible within 12 hours. Windy.'
-        elif j == 134:
-            t = 'Mostly cloudy and cooler. Precipitation ending in 12 to 24 hours.'
-        elif j == 135:
-            t = 'Mostly cloudy and cooler.'
-        elif j == 136:
-            t = 'Mostly cloudy and cooler. Precipitation continuing, possible heavy at times. Windy.'
-        elif j == 137:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 138:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 139:
-            t = 'Mostly cloudy and cooler. Precipitation possible within 6 to 12 hours. Windy.'
-        elif j == 140:
-            t = 'Mostly cloudy with little temperature change. Precipitation continuing, possibly heavy at times. Windy.'
-        elif j == 141:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 142:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 143:
-            t = 'Mostly cloudy with little temperature change. Precipitation possible within 6 to 12 hours. Windy.'
-        elif j == 144:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 145:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 146:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 12 hours, possibly heavy at times. Windy.'
-        elif j == 147:
-            t = 'Mostly cloudy and cooler. Windy.'
-        elif j == 148:
-            t = 'Mostly cloudy and cooler. Precipitation continuing, possibly heavy at times. Windy.'
-        elif j == 149:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 150:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 151:
-            t = 'Mostly cloudy and cooler. Precipitation likely, possibly heavy at times. Windy.'
-        elif j == 152:
-            t = 'Mostly cloudy with little temperature change. Precipitation continuing, possibly heavy at times. Windy.'
-        elif j == 153:
-            t = 'Mostly cloudy with little temperature change. Precipitation likely, possibly heavy at times. Windy.'
-        elif j == 154:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 155:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 156:
-            t = 'Increasing clouds and cooler. Precipitation possible within 6 hours. Windy.'
-        elif j == 157:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 6 hours. Windy'
-        elif j == 158:
-            t = 'Increasing clouds and cooler. Precipitation continuing. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 159:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 160:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 161:
-            t = 'Mostly cloudy and cooler. Precipitation likely. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 162:
-            t = 'Mostly cloudy with little temperature change. Precipitation continuing. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 163:
-            t = 'Mostly cloudy with little temperature change. Precipitation likely. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 164:
-            t = 'Increasing clouds and cooler. Precipitation possible within 6 hours. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 165:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 166:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 167:
-            t = 'Increasing clouds and cooler. Precipitation possible within 6 hours possible wind shift to the W, NW, or N.'
-        elif j == 168:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 6 hours. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 169:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 6 hours possible wind shift to the W, NW, or N.'
-        elif j == 170:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 171:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 172:
-            t = 'Increasing clouds and cooler. Precipitation possible within 6 hours. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 173:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 6 hours. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 174:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 175:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 176:
-            t = 'Increasing clouds and cooler. Precipitation possible within 12 to 24 hours. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 177:
-            t = 'Increasing clouds with little temperature change. Precipitation possible within 12 to 24 hours. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 178:
-            t = 'Mostly cloudy and cooler. Precipitation possibly heavy at times and ending within 12 hours. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 179:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 180:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 181:
-            t = 'Mostly cloudy and cooler. Precipitation possible within 6 to 12 hours, possibly heavy at times. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 182:
-            t = 'Mostly cloudy with little temperature change. Precipitation ending within 12 hours. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 183:
-            t = 'Mostly cloudy with little temperature change. Precipitation possible within 6 to 12 hours, possibly heavy at times. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 184:
-            t = 'Mostly cloudy and cooler. Precipitation continuing.'
-        elif j == 185:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 186:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 187:
-            t = 'Mostly cloudy and cooler. Precipitation likely. Windy with possible wind shift to the W, NW, or N.'
-        elif j == 188:
-            t = 'Mostly cloudy with little temperature change. Precipitation continuing.'
-        elif j == 189:
-            t = 'Mostly cloudy with little temperature change. Precipitation likely.'
-        elif j == 190:
-            t = 'Partly cloudy with little temperature change.'
-        elif j == 191:
-            t = 'Mostly clear with little temperature change.'
-        elif j == 192:
-            t = 'Mostly cloudy and cooler. Precipitation possible within 12 hours, possibly heavy at times. Windy.'
-        elif j == 193:
-            t = 'Forecast requires 3 hours of recent data.'
-        elif j == 194:
-            t = 'Mostly clear and cooler.'
-        elif j == 195:
-            t = 'Mostly clear and cooler.'
-        elif j == 196:
-            t = 'Mostly clear and cooler.'
-        else:
-            t = 'Forecast not available.'
-        wxDict['FCTEXT'] = t
-        wxDict['SUNRISE_LT'] = unpackTime(s, 89)
-        wxDict['SUNSET_LT'] = unpackTime(s, 91)
+        lastUpdateTime = wxDict['TIMESTAMP_PC'] = datetime.datetime.now()
+        L1 = bytes(q[1:])  # Store a copy of the payload without the preamble byte
+        writeDump(TMPPATH + 'LOOP1', L1)
+        loop1Status = 0
+
+        decodeLoop1(payload)
         loop2Status = 0
         if LPS:
-            loop2Status = readLoop2()
-
-        wxWrite('RXCHECK')
-        time.sleep(WXDELAY)
-        rxcheckBytes = wx.in_waiting
-        print(tStamp() + '%d bytes received in RXCHECK response.' % rxcheckBytes)
-        if rxcheckBytes > 0:
-            raw_rx = wx.read(rxcheckBytes).decode('ascii', errors='replace')
-
-            # Normalize whitespace, strip out 'OK'
-            rx_text = ' '.join(raw_rx.split()).replace('OK', '').strip()
-            wxDict['RXCHECK'] = rx_text
-            print(tStamp() + 'RXCHECK: ' + wxDict['RXCHECK'])
-        else:
-            wxDict['RXCHECK'] = 'Not available.'
+            loop2Status = readLoop2(loop2)
+
+        wxDict['RXCHECK'] = consoleInfo('RXCHECK', readRxCheck) or 'Not available.'
 
         if DEBUG:
             print(tStamp() + f'DEBUG: loop2Status = {loop2Status}, loop1Status = {loop1Status}')
@@ -1244,76 +1596,386 @@ def readWxData():
         else:
             result = loop2Status
 
+        if result == 100:
+            wxHistory.append(wxDict.copy())
         return result
 
 
-def readLoop2():
-    """Reads LOOP2 packet, inserting additional keys to wxDict."""
+# forecast text of FCRULE (LOOP byte 90), index = rule number
+FCRULETEXT = (
+    'Mostly clear and cooler.',
+    'Mostly clear with little temperature change.',
+    'Mostly clear for 12 hours with little temperature change.',
+    'Mostly clear for 12 to 24 hours and cooler.',
+    'Mostly clear with little temperature change.',
+    'Partly cloudy and cooler.',
+    'Partly cloudy with little temperature change.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear and warmer.',
+    'Partly cloudy with little temperature change.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 24 to 48 hours.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds with little temperature change. Precipitation possible within 24 hours.',
+    'Mostly clear with little temperature change.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds with little temperature change. Precipitation possible within 12 hours.',
+    'Mostly clear with little temperature change.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 24 hours.',
+    'Mostly clear and warmer. Increasing winds.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 12 hours. Increasing winds.',
+    'Mostly clear and warmer. Increasing winds.',
+    'Increasing clouds and warmer.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 12 hours. Increasing winds.',
+    'Mostly clear and warmer. Increasing winds.',
+    'Increasing clouds and warmer.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 12 hours. Increasing winds.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly clear and warmer. Precipitation possible within 48 hours.',
+    'Mostly clear and warmer.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds with little temperature change. Precipitation possible within 24 to 48 hours.',
+    'Increasing clouds with little temperature change.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 12 to 24 hours.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 12 to 24 hours. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 12 to 24 hours. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 6 to 12 hours.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 6 to 12 hours. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 12 to 24 hours. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation possible within 12 hours.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and warmer. Precipitation likley.',
+    'Clearing and cooler. Precipitation ending within 6 hours.',
+    'Partly cloudy with little temperature change.',
+    'Clearing and cooler. Precipitation ending within 6 hours.',
+    'Mostly clear with little temperature change.',
+    'Clearing and cooler. Precipitation ending within 6 hours.',
+    'Partly cloudy and cooler.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear and cooler.',
+    'Clearing and cooler. Precipitation ending within 6 hours.',
+    'Mostly clear with little temperature change.',
+    'Clearing and cooler. Precipitation ending within 6 hours.',
+    'Mostly clear and cooler.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds with little temperature change. Precipitation possible within 24 hours.',
+    'Mostly cloudy and cooler. Precipitation continuing.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy and cooler. Precipitation likely.',
+    'Mostly cloudy with little temperature change. Precipitation continuing.',
+    'Mostly cloudy with little temperature change. Precipitation likely.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and cooler. Precipitation possible and windy within 6 hours.',
+    'Increasing clouds with little temperature change. Precipitation possible and windy within 6 hours.',
+    'Mostly cloudy and cooler. Precipitation continuing. Increasing winds.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy and cooler. Precipitation likely. Increasing winds.',
+    'Mostly cloudy with little temperature change. Precipitation continuing. Increasing winds.',
+    'Mostly cloudy with little temperature change. Precipitation likely. Increasing winds.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and cooler. Precipitation possible within 12 to 24 hours possible wind shift to the W, NW, or N.',
+    'Increasing clouds with little temperature change. Precipitation possible within 12 to 24 hours possible wind shift to the W, NW, or N.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and cooler. Precipitation possible within 6 hours possible wind shift to the W, NW, or N.',
+    'Increasing clouds with little temperature change. Precipitation possible within 6 hours possible wind shift to the W, NW, or N.',
+    'Mostly cloudy and cooler. Precipitation ending within 12 hours possible wind shift to the W, NW, or N.',
+    'Mostly cloudy and cooler. Possible wind shift to the W, NW, or N.',
+    'Mostly cloudy with little temperature change. Precipitation ending within 12 hours possible wind shift to the W, NW, or N.',
+    'Mostly cloudy with little temperature change. Possible wind shift to the W, NW, or N.',
+    'Mostly cloudy and cooler. Precipitation ending within 12 hours possible wind shift to the W, NW, or N.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy and cooler. Precipitation possible within 24 hours possible wind shift to the W, NW, or N.',
+    'Mostly cloudy with little temperature change. Precipitation ending within 12 hours possible wind shift to the W, NW, or N.',
+    'Mostly cloudy with little temperature change. Precipitation possible within 24 hours possible wind shift to the W, NW, or N.',
+    'Clearing, cooler and windy. Precipitation ending within 6 hours.',
+    'Clearing, cooler and windy.',
+    'Mostly cloudy and cooler. Precipitation ending within 6 hours. Windy with possible wind shift to the W, NW, or N.',
+    'Mostly cloudy and cooler. Windy with possible wind shift to the W, NW, or N.',
+    'Clearing, cooler and windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy with little temperature change. Precipitation possible within 12 hours. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and cooler. Precipitation possible within 12 hours, possibly heavy at times. Windy.',
+    'Mostly cloudy and cooler. Precipitation ending within 6 hours. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy and cooler. Precipitation possible within 12 hours. Windy.',
+    'Mostly cloudy and cooler. Precipitation ending in 12 to 24 hours.',
+    'Mostly cloudy and cooler.',
+    'Mostly cloudy and cooler. Precipitation continuing, possible heavy at times. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy and cooler. Precipitation possible within 6 to 12 hours. Windy.',
+    'Mostly cloudy with little temperature change. Precipitation continuing, possibly heavy at times. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy with little temperature change. Precipitation possible within 6 to 12 hours. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds with little temperature change. Precipitation possible within 12 hours, possibly heavy at times. Windy.',
+    'Mostly cloudy and cooler. Windy.',
+    'Mostly cloudy and cooler. Precipitation continuing, possibly heavy at times. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy and cooler. Precipitation likely, possibly heavy at times. Windy.',
+    'Mostly cloudy with little temperature change. Precipitation continuing, possibly heavy at times. Windy.',
+    'Mostly cloudy with little temperature change. Precipitation likely, possibly heavy at times. Windy.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and cooler. Precipitation possible within 6 hours. Windy.',
+    'Increasing clouds with little temperature change. Precipitation possible within 6 hours. Windy',
+    'Increasing clouds and cooler. Precipitation continuing. Windy with possible wind shift to the W, NW, or N.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy and cooler. Precipitation likely. Windy with possible wind shift to the W, NW, or N.',
+    'Mostly cloudy with little temperature change. Precipitation continuing. Windy with possible wind shift to the W, NW, or N.',
+    'Mostly cloudy with little temperature change. Precipitation likely. Windy with possible wind shift to the W, NW, or N.',
+    'Increasing clouds and cooler. Precipitation possible within 6 hours. Windy with possible wind shift to the W, NW, or N.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and cooler. Precipitation possible within 6 hours possible wind shift to the W, NW, or N.',
+    'Increasing clouds with little temperature change. Precipitation possible within 6 hours. Windy with possible wind shift to the W, NW, or N.',
+    'Increasing clouds with little temperature change. Precipitation possible within 6 hours possible wind shift to the W, NW, or N.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and cooler. Precipitation possible within 6 hours. Windy with possible wind shift to the W, NW, or N.',
+    'Increasing clouds with little temperature change. Precipitation possible within 6 hours. Windy with possible wind shift to the W, NW, or N.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Increasing clouds and cooler. Precipitation possible within 12 to 24 hours. Windy with possible wind shift to the W, NW, or N.',
+    'Increasing clouds with little temperature change. Precipitation possible within 12 to 24 hours. Windy with possible wind shift to the W, NW, or N.',
+    'Mostly cloudy and cooler. Precipitation possibly heavy at times and ending within 12 hours. Windy with possible wind shift to the W, NW, or N.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy and cooler. Precipitation possible within 6 to 12 hours, possibly heavy at times. Windy with possible wind shift to the W, NW, or N.',
+    'Mostly cloudy with little temperature change. Precipitation ending within 12 hours. Windy with possible wind shift to the W, NW, or N.',
+    'Mostly cloudy with little temperature change. Precipitation possible within 6 to 12 hours, possibly heavy at times. Windy with possible wind shift to the W, NW, or N.',
+    'Mostly cloudy and cooler. Precipitation continuing.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy and cooler. Precipitation likely. Windy with possible wind shift to the W, NW, or N.',
+    'Mostly cloudy with little temperature change. Precipitation continuing.',
+    'Mostly cloudy with little temperature change. Precipitation likely.',
+    'Partly cloudy with little temperature change.',
+    'Mostly clear with little temperature change.',
+    'Mostly cloudy and cooler. Precipitation possible within 12 hours, possibly heavy at times. Windy.',
+    'Forecast requires 3 hours of recent data.',
+    'Mostly clear and cooler.',
+    'Mostly clear and cooler.',
+    'Mostly clear and cooler.',
+    )
+
+
+# offsets are relative to the packet type byte (Davis offset - 2), i.e. payload[2:]
+LOOP1SCHEMA = PacketSchema((
+    ('BAROTREND', 1, 'B', None, '', None),
+    ('BAROMETER', 5, 'H', 1000.0, 'inHg', None),
+    ('INTEMP', 7, 'H', 10.0, 'F', None),
+    ('INHUM', 9, 'B', None, '%', None),
+    ('OUTTEMP', 10, 'H', 10.0, 'F', None),
+    ('WIND', 12, 'B', None, 'mph', None),
+    ('AVGWIND10', 13, 'B', None, 'mph', None),
+    ('WINDDIR', 14, 'H', None, 'deg', None),
+    ('OUTHUM', 31, 'B', None, '%', None),
+    ('RAINRATE', 39, 'H', None, 'clicks/h', None),
+    ('UVINDEX', 41, 'B', 10.0, 'index', None),
+    ('SOLAR', 42, 'H', None, 'W/m2', None),
+    ('STORMRAIN', 44, 'H', None, 'clicks', None),
+    ('STORMSTART', 46, 'H', None, 'date', 65535),
+    ('DAYRAIN', 48, 'H', None, 'clicks', None),
+    ('MONTHRAIN', 50, 'H', None, 'clicks', None),
+    ('YEARRAIN', 52, 'H', None, 'clicks', None),
+    ('ET_DAY', 54, 'H', None, 'in/1000', None),
+    ('ET_MONTH', 56, 'H', None, 'in/100', None),
+    ('ET_YEAR', 58, 'H', None, 'in/100', None),
+    ('BATTERYSTATUS', 84, 'B', None, '', None),
+    ('VOLTAGE', 85, 'H', None, 'raw', None),
+    ('FCICON', 87, 'B', None, '', None),
+    ('FCRULE', 88, 'B', None, '', None),
+    ('SUNRISE', 89, 'H', None, 'hhmm', 65535),
+    ('SUNSET', 91, 'H', None, 'hhmm', 65535),
+    ))
+
+LOOP2SCHEMA = PacketSchema((
+    ('AVGWIND10', 16, 'H', 10.0, 'mph', None),
+    ('AVGWIND2', 18, 'H', 10.0, 'mph', None),
+    ('GUST10', 20, 'H', None, 'mph', None),
+    ('GUST10DIR', 22, 'H', None, 'deg', None),
+    ('DEWPOINT', 28, 'H', 1.0, 'F', None),
+    ('HINDEX', 33, 'H', 1.0, 'F', None),
+    ('WC', 35, 'H', 1.0, 'F', None),
+    ('THSW', 37, 'H', 1.0, 'F', None),
+    ('RAINFALL15', 50, 'H', None, 'clicks', None),
+    ('RAINFALL60', 52, 'H', None, 'clicks', None),
+    ('RAINFALL24H', 56, 'H', None, 'clicks', None),
+    ))
+
+
+def decodeLoop1(payload):
+    """Decode a CRC-verified LOOP packet (99 bytes, starting with 'LOO') into wxDict."""
+    global SOLARCF
+    global UVCF
+
+    v = LOOP1SCHEMA.unpack(payload, 2)
+
+    j = wxDict['BAROTREND'] = v['BAROTREND']
+    t = 'Barometric pressure is '
+    if j == 0:
+        t += 'steady.'
+    elif j == 20:
+        t += 'rising slowly.'
+    elif j == 60:
+        t += 'rising rapidly.'
+    elif j == 196:
+        t += 'falling rapidly.'
+    elif j == 236:
+        t += 'falling slowly.'
+    else:
+        t = 'Barometric trend is not available.\n                                 Requires 3 hours of data.'
+    wxDict['BAROTRENDTEXT'] = t
+    # _HPA, _C, _KTS, _MSEC and _BF are derived from these on access (DERIVEDUNITS)
+    wxDict['BAROMETER_INHG'] = round(v['BAROMETER'], 2)
+    wxDict['INTEMP_F'] = v['INTEMP']
+    wxDict['INHUM_P'] = v['INHUM']
+    wxDict['OUTTEMP_F'] = v['OUTTEMP']
+    j = v['AVGWIND10']
+    if j > 300:
+        j = 0
+    wxDict['AVGWIND10_MPH'] = j
+    wxDict['WIND_MPH'] = v['WIND']
+    wxDict['WINDDIR'] = '%03d' % v['WINDDIR']
+    wxDict['WIND_CARDINAL'] = getCardinalDirection(v['WINDDIR'])
+    wxDict['OUTHUM_P'] = v['OUTHUM']
+    if wxDict['OUTHUM_P'] > 100:
+        print(tStamp() + 'Value out of range (manually verify console value) : OUTHUM_P = %d.' % wxDict['OUTHUM_P'])
+        wxDict['OUTHUM_P'] = -1
+        wxDict['DATAERROR'] = True
+    if INCHES == False:
+        wxDict['RAINRATE_MMHR'] = round(v['RAINRATE'] * 0.2, 1)
+        wxDict['DAYRAIN_MM'] = round(v['DAYRAIN'] * 0.2, 1)
+        wxDict['STORMRAIN_MM'] = round(v['STORMRAIN'] * 0.2, 1)
+        wxDict['MONTHRAIN_MM'] = round(v['MONTHRAIN'] * 0.2, 1)
+        wxDict['YEARRAIN_MM'] = round(v['YEARRAIN'] * 0.2, 1)
+    else:
+        wxDict['RAINRATE_MMHR'] = round(v['RAINRATE'] * 0.01 * 25.4, 1)
+        wxDict['DAYRAIN_MM'] = round(v['DAYRAIN'] * 0.01 * 25.4, 1)
+        wxDict['STORMRAIN_MM'] = round(v['STORMRAIN'] * 0.01 * 25.4, 1)
+        wxDict['MONTHRAIN_MM'] = round(v['MONTHRAIN'] * 0.01 * 25.4, 1)
+        wxDict['YEARRAIN_MM'] = round(v['YEARRAIN'] * 0.01 * 25.4, 1)
+    t = v['STORMSTART']
+    if t is None:
+        wxDict['STORMSTART'] = '01.01.1970'
+    else:
+        # bits 15-12 month, 11-7 day, 6-0 year - 2000
+        wxDict['STORMSTART'] = '%02d.%02d.%d' % ((t >> 7) & 31, t >> 12, 2000 + (t & 127))
+    t = 0
+    if INCHES == False:
+        t = wxDict['ET_DAY_MM'] = round(v['ET_DAY'] * 0.0254, 1)
+        wxDict['ET_MONTH_MM'] = round(t + v['ET_MONTH'] * 0.254, 1)
+        wxDict['ET_YEAR_MM'] = round(t + v['ET_YEAR'] * 0.254, 1)
+    else:
+        t = wxDict['ET_DAY_MM'] = round(v['ET_DAY'] * 0.001 * 25.4, 1)
+        wxDict['ET_MONTH_MM'] = round(t + v['ET_MONTH'] * 0.01 * 25.4, 1)
+        wxDict['ET_YEAR_MM'] = round(t + v['ET_YEAR'] * 0.01 * 25.4, 1)
+    if UVCF != 0 and (UVCF < 50 or UVCF > 150):
+        UVCF = 100
+    wxDict['UVINDEX'] = v['UVINDEX'] * (UVCF / 100)
+    if wxDict['UVINDEX'] > 16:
+        print(tStamp() + 'Value out of range (UVCF too high?) : UVINDEX = %d.' % wxDict['UVINDEX'])
+        wxDict['UVINDEX'] = -1
+        wxDict['DATAERROR'] = True
+    if SOLARCF != 0 and (SOLARCF < 50 or SOLARCF > 100):
+        SOLARCF = 100
+    wxDict['SOLAR_W'] = int(v['SOLAR'] * (SOLARCF / 100))
+    if wxDict['SOLAR_W'] > 1800:
+        print(tStamp() + 'Value out of range (SOLARCF too high?) : SOLAR_W = %d.' % wxDict['SOLAR_W'])
+        wxDict['SOLAR_W'] = -1
+        wxDict['DATAERROR'] = True
+    wxDict['FCICON'] = v['FCICON']
+    wxDict['VOLTAGE'] = round(v['VOLTAGE'] * 300 / 512 / 100, 2)
+    wxDict['BATTERYSTATUS'] = v['BATTERYSTATUS']
+    wxDict['FCRULE'] = j = v['FCRULE']
+    wxDict['FCTEXT'] = FCRULETEXT[j] if j < len(FCRULETEXT) else 'Forecast not available.'
+    wxDict['SUNRISE_LT'] = formatTime(v['SUNRISE'])
+    wxDict['SUNSET_LT'] = formatTime(v['SUNSET'])
+
+
+def readConsoleTime():
+    """Read the console time with GETTIME, returns datetime."""
+    payload, raw = request_packet('GETTIME', 9, timeout=2, check_header=None)
+    if not payload or len(raw) < 9:
+        raise WxError("GETTIME packet too short")
+
+    secs, mins, hrs, day, month, year = struct.unpack_from('6B', raw, 1)
+    try:
+        return datetime.datetime(year + 1900, month, day, hrs, mins, secs)
+    except ValueError:
+        raise WxError('Invalid date/time in GETTIME packet')
+
+
+def syncConsoleClock():
+    """Sync wxClock with the console, sets the console time if it has drifted more than CLOCKMAXDRIFT seconds."""
+    drift = wxClock.sync(readConsoleTime())
+    print(tStamp() + 'Console clock synced, drift is %+d seconds.' % round(drift))
+    if abs(drift) > CLOCKMAXDRIFT:
+        setWxTime()
+        drift = wxClock.sync(readConsoleTime())
+        print(tStamp() + 'Console clock synced after SETTIME, drift is %+d seconds.' % round(drift))
+
+
+def readLoop2(payload=None):
+    """Reads LOOP2 packet (unless already received with readLoopPair), inserting additional keys to wxDict."""
     global L2
 
-    payload, q = request_packet('LPS 2 1', 100, retries=1, check_header=b'LOO')
+    if payload is None:
+        payload, q = request_packet('LPS 2 1', 100, retries=1, check_header=b'LOO')
 
     if not payload:
         print(tStamp() + 'Failed to get valid LOOP2 packet, aborting.')
         return 1  # or handle error gracefully
 
     if payload:
-        L2 = payload  # Save the verified payload
+        L2 = bytes(payload)  # Save a copy of the verified payload
         writeDump(TMPPATH + 'LOOP2', L2)
 
-        s = payload[2:]
-        j = struct.unpack_from('H', s, 16)[0] / 10.0
-        if j > 300:
-            j = 0
-        wxDict['AVGWIND10_MPH'] = j
-        wxDict['AVGWIND10_KTS'] = round(j * 0.868976, 1)
-        wxDict['AVGWIND10_MSEC'] = round(j * 0.44704, 1)
-        wxDict['AVGWIND10_BF'] = getBeaufortIndex(wxDict['AVGWIND10_KTS'])
-
-        j = struct.unpack_from('H', s, 18)[0] / 10.0
-        if j > 300:
-            j = 0
-        wxDict['AVGWIND2_MPH'] = j
-        wxDict['AVGWIND2_KTS'] = round(j * 0.868976, 1)
-        wxDict['AVGWIND2_MSEC'] = round(j * 0.44704, 1)
-        wxDict['AVGWIND2_BF'] = getBeaufortIndex(wxDict['AVGWIND2_KTS'])
-        j = wxDict['GUST10_MPH'] = struct.unpack_from('H', s, 20)[0]
-        wxDict['GUST10_KTS'] = round(j * 0.868976, 1)
-        wxDict['GUST10_MSEC'] = round(j * 0.44704, 1)
-        wxDict['GUST10_BF'] = getBeaufortIndex(wxDict['GUST10_KTS'])
-        t = str(struct.unpack_from('H', s, 22)[0])
-        if t == '0':
-            t = '000'
-        if len(t) < 3:
-            t = '0' + t
-        if len(t) < 3:
-            t = '0' + t
-        wxDict['GUST10DIR'] = t
-        wxDict['GUST_CARDINAL'] = getCardinalDirection(int(t))
-        if INCHES == False:
-            wxDict['RAINFALL15_MM'] = round(struct.unpack_from('H', s, 50)[0] * 0.2, 1)
-            wxDict['RAINFALL60_MM'] = round(struct.unpack_from('H', s, 52)[0] * 0.2, 1)
-            wxDict['RAINFALL24H_MM'] = round(struct.unpack_from('H', s, 56)[0] * 0.2, 1)
-        else:
-            wxDict['RAINFALL15_MM'] = inToMm(struct.unpack_from('H', s, 50)[0] * 0.01)
-            wxDict['RAINFALL60_MM'] = inToMm(struct.unpack_from('H', s, 52)[0] * 0.01)
-            wxDict['RAINFALL24H_MM'] = inToMm(struct.unpack_from('H', s, 56)[0] * 0.01)
-        j = wxDict['WC_F'] = struct.unpack_from('H', s, 35)[0] / 1.0
-        wxDict['WC_C'] = FtoC(j)
-        if wxDict['WC_F'] > wxDict['OUTTEMP_F']:
-            wxDict['WC_F'] = wxDict['OUTTEMP_F']
-            wxDict['WC_C'] = wxDict['OUTTEMP_C']
-        j = wxDict['DEWPOINT_F'] = struct.unpack_from('H', s, 28)[0] / 1.0
-        wxDict['DEWPOINT_C'] = FtoC(j)
-        if wxDict['DEWPOINT_C'] > 100:
-            print(tStamp() + 'Value out of range (manually verify console value) : DEWPOINT_C = %d.' % wxDict['DEWPOINT_C'])
-            wxDict['DEWPOINT_C'] = -1
-            wxDict['DEWPOINT_F'] = -1
-            wxDict['DATAERROR'] = True
-        j = wxDict['THSW_F'] = struct.unpack_from('H', s, 37)[0] / 1.0
-        wxDict['THSW_C'] = FtoC(j)
-        j = wxDict['HINDEX_F'] = struct.unpack_from('H', s, 33)[0] / 1.0
-        wxDict['HINDEX_C'] = FtoC(j)
+        decodeLoop2(payload)
 
     else:
         print(tStamp() + f'CRC error: received {crc_received}, calculated {crc_calculated}')
@@ -1322,40 +1984,509 @@ def readLoop2():
     return 0
 
 
-def CRC(inputData):
-    """CCITT-16 CRC implementation, function should return 0."""
-    crcTab = (0, 4129, 8258, 12387, 16516, 20645, 24774, 28903, 33032, 37161, 41290,
-              45419, 49548, 53677, 57806, 61935, 4657, 528, 12915, 8786, 21173, 17044,
-              29431, 25302, 37689, 33560, 45947, 41818, 54205, 50076, 62463, 58334,
-              9314, 13379, 1056, 5121, 25830, 29895, 17572, 21637, 42346, 46411,
-              34088, 38153, 58862, 62927, 50604, 54669, 13907, 9842, 5649, 1584,
-              30423, 26358, 22165, 18100, 46939, 42874, 38681, 34616, 63455, 59390,
-              55197, 51132, 18628, 22757, 26758, 30887, 2112, 6241, 10242, 14371,
-              51660, 55789, 59790, 63919, 35144, 39273, 43274, 47403, 23285, 19156,
-              31415, 27286, 6769, 2640, 14899, 10770, 56317, 52188, 64447, 60318,
-              39801, 35672, 47931, 43802, 27814, 31879, 19684, 23749, 11298, 15363,
-              3168, 7233, 60846, 64911, 52716, 56781, 44330, 48395, 36200, 40265,
-              32407, 28342, 24277, 20212, 15891, 11826, 7761, 3696, 65439, 61374,
-              57309, 53244, 48923, 44858, 40793, 36728, 37256, 33193, 45514, 41451,
-              53516, 49453, 61774, 57711, 4224, 161, 12482, 8419, 20484, 16421, 28742,
-              24679, 33721, 37784, 41979, 46042, 49981, 54044, 58239, 62302, 689,
-              4752, 8947, 13010, 16949, 21012, 25207, 29270, 46570, 42443, 38312,
-              34185, 62830, 58703, 54572, 50445, 13538, 9411, 5280, 1153, 29798,
-              25671, 21540, 17413, 42971, 47098, 34713, 38840, 59231, 63358, 50973,
-              55100, 9939, 14066, 1681, 5808, 26199, 30326, 17941, 22068, 55628,
-              51565, 63758, 59695, 39368, 35305, 47498, 43435, 22596, 18533, 30726,
-              26663, 6336, 2273, 14466, 10403, 52093, 56156, 60223, 64286, 35833,
-              39896, 43963, 48026, 19061, 23124, 27191, 31254, 2801, 6864, 10931,
-              14994, 64814, 60687, 56684, 52557, 48554, 44427, 40424, 36297, 31782,
-              27655, 23652, 19525, 15522, 11395, 7392, 3265, 61215, 65342, 53085,
-              57212, 44955, 49082, 36825, 40952, 28183, 32310, 20053, 24180, 11923,
-              16050, 3793, 7920)
-    crcAcc = 0
-    for byte in inputData:
-        ushort = (crcAcc << 8) & 0xFF00
-        crcAcc = ushort ^ crcTab[((crcAcc >> 8) ^ byte) & 0xFF]
+def readLoopPair():
+    """
+    Fetch LOOP and LOOP2 in one request (LPS 3 2) and demultiplex the two
+    99-byte frames by their packet type byte. Returns (loop1, loop2) payloads,
+    or (None, None) so that the caller falls back to LOOP 1 + LPS 2 1.
+    After three failures in a row the combined request is only tried again an hour later.
+    The console sends its LOOP packets about 2 seconds apart, so this takes one LOOP
+    interval (~2 s), LOOP 1 + LPS 2 1 on an awake console only milliseconds.
+    """
+    global lpsPairFailures, lpsPairRetry
+
+    loop1 = loop2 = None
+    # the second frame is paced by the console, keep the timeout well above the 2 seconds
+    payload, raw = request_packet('LPS 3 2', 199, timeout=5, retries=0, check_header=b'LOO', frames=2, minTimeout=3.5)
+    if payload:
+        for frame in (payload[:99], payload[99:]):
+            if frame[4] == 0:
+                loop1 = frame
+            elif frame[4] == 1:
+                loop2 = frame
+
+    if loop1 is None or loop2 is None:
+        lpsPairFailures += 1
+        if lpsPairFailures >= 3:
+            lpsPairRetry = time.monotonic() + 3600
+            print(tStamp() + 'LPS 3 2 failed %d times in a row, using LOOP 1 + LPS 2 1 for the next hour.' % lpsPairFailures)
+        return None, None
+
+    lpsPairFailures = 0
+    return loop1, loop2
+
+
+def firmwareVersion():
+    """Returns the console firmware version reported by NVER as float, 99.0 if unknown."""
+    try:
+        return float(wxDict.get('NVER', '').split()[-1])
+    except (ValueError, IndexError):
+        return 99.0
+
+
+def decodeLoop2(payload):
+    """Decode a CRC-verified LOOP2 packet (99 bytes, starting with 'LOO') into wxDict."""
+    v = LOOP2SCHEMA.unpack(payload, 2)
+    j = v['AVGWIND10']
+    if j > 300:
+        j = 0
+    wxDict['AVGWIND10_MPH'] = j
+
+    j = v['AVGWIND2']
+    if j > 300:
+        j = 0
+    wxDict['AVGWIND2_MPH'] = j
+    wxDict['GUST10_MPH'] = v['GUST10']
+    wxDict['GUST10DIR'] = '%03d' % v['GUST10DIR']
+    wxDict['GUST_CARDINAL'] = getCardinalDirection(v['GUST10DIR'])
+    if INCHES == False:
+        wxDict['RAINFALL15_MM'] = round(v['RAINFALL15'] * 0.2, 1)
+        wxDict['RAINFALL60_MM'] = round(v['RAINFALL60'] * 0.2, 1)
+        wxDict['RAINFALL24H_MM'] = round(v['RAINFALL24H'] * 0.2, 1)
+    else:
+        wxDict['RAINFALL15_MM'] = inToMm(v['RAINFALL15'] * 0.01)
+        wxDict['RAINFALL60_MM'] = inToMm(v['RAINFALL60'] * 0.01)
+        wxDict['RAINFALL24H_MM'] = inToMm(v['RAINFALL24H'] * 0.01)
+    wxDict['WC_F'] = min(v['WC'], wxDict['OUTTEMP_F'])
+    wxDict['DEWPOINT_F'] = v['DEWPOINT']
+    if wxDict['DEWPOINT_C'] > 100:
+        print(tStamp() + 'Value out of range (manually verify console value) : DEWPOINT_C = %d.' % wxDict['DEWPOINT_C'])
+        # both set, -1 is not derived from -1 F
+        wxDict['DEWPOINT_F'] = -1
+        wxDict['DEWPOINT_C'] = -1
+        wxDict['DATAERROR'] = True
+    wxDict['THSW_F'] = v['THSW']
+    wxDict['HINDEX_F'] = v['HINDEX']
+
+
+def startLoopStream(cmd):
+    """Send a LOOP/LPS command to the (awake) console, returns True when the console ACKs it."""
+    wxWrite(cmd)
+    ack = wxReadExact(1, 1.2)
+    while ack in (b'\x0A', b'\x0D'):
+        ack = wxReadExact(1, 1.2)
+    if ack != b'\x06':
+        print(tStamp() + f"{cmd} - Expected ACK 0x06, got {print_hex_bytes(ack)}.")
+        return False
+    return True
+
+
+def stopLoopStream():
+    """Cancel a running LOOP/LPS stream and discard any partial packet."""
+    if wx is None:
+        return
+    wxWrite('')
+    wxReadUntil(b'\n\r', 0.5)
+    wxFlushInput()
+
+
+def streamLoop(count=None):
+    """
+    Generator: start a LOOP n (LPS 3 n if LPS) stream and yield every CRC-verified
+    99-byte packet at the console's own cadence. The stream is re-armed when the last
+    packet of a batch arrives, before that packet is handed out, so it never runs dry.
+    Ends on timeout or when the console stops answering; the stream is always cancelled.
+    """
+    if count is None:
+        count = LOOPSTREAMCOUNT
+    if LPS:
+        cmd = 'LPS 3 %d' % count
+    else:
+        cmd = 'LOOP %d' % count
+
+    if not wxSession.ensureAwake():
+        print(tStamp() + "Console did not wake up.")
+        return
+
+    try:
+        if not startLoopStream(cmd):
+            return
+        remaining = count
+        while True:
+            # a view into rxRing, only valid until the next packet is read
+            packet = rxRing.read(99, time.monotonic() + 5)
+            if len(packet) < 99:
+                print(tStamp() + f"Timeout: only {len(packet)} bytes in {cmd} stream.")
+                return
+            remaining -= 1
+
+            if packet[:3] != b'LOO' or CRC(packet) != 0:
+                # framing may be lost, restart the stream
+                print(tStamp() + f"{cmd} - CRC error in stream, restarting.")
+                stopLoopStream()
+                if not startLoopStream(cmd):
+                    return
+                remaining = count
+                continue
+
+            if remaining == 0:
+                if not startLoopStream(cmd):
+                    yield packet
+                    return
+                remaining = count
+
+            yield packet
+    finally:
+        stopLoopStream()
+
+
+def streamWxData(duration):
+    """Stream LOOP/LOOP2 packets for duration seconds, keeping wxDict and wxshared.wxDict up to date."""
+    import wxshared
+
+    end = time.monotonic() + duration
+    packets = 0
+    try:
+        for packet in streamLoop():
+            if packet[4] == 1:
+                decodeLoop2(packet)
+            else:
+                decodeLoop1(packet)
+                wxDict['TIMESTAMP_PC'] = datetime.datetime.now()
+                wxHistory.append(wxDict.copy())
+            wxshared.wxDict = wxDict
+            packets += 1
+            if time.monotonic() >= end or shutdownRequested:
+                break
+    except Exception as e:
+        print(tStamp() + f'LOOP stream error: {e}')
+
+    print(tStamp() + 'Received %d LOOP packet(s) in stream mode.' % packets)
+    pause(end - time.monotonic())
+    return packets
+
+
+class AsyncConsole:
+    """
+    asyncio transport for the console. Incoming bytes are collected by a reader callback on the
+    file descriptor of the serial port, commands are executed one at a time by a worker task in
+    order of priority, e.g. packet = await console.loop(). Create it inside a running event loop (runAsync).
+    The port is read without blocking while the console is open, close() hands it back to the synchronous
+    readers. The regular cycle (readWxData, hiLows) stays synchronous, pollWxData uses it between cycles.
+    """
+
+    LOOP = 0
+    HILOWS = 1
+    INFO = 2
+
+    def __init__(self, port):
+        self.port = port
+        self.buffer = bytearray()
+        self.received = asyncio.Event()
+        self.queue = asyncio.PriorityQueue()
+        self.seq = 0
+        # set by the reader callback when the connection is lost, raised by the command running (and all after it)
+        self.error = None
+        self.eventLoop = asyncio.get_running_loop()
+        # reads are done by the reader callback only, never block in there
+        self.timeout = port.timeout
+        port.timeout = 0
+        self.eventLoop.add_reader(port.fileno(), self.readable)
+        self.worker = self.eventLoop.create_task(self.run())
+
+    def readable(self):
+        """Reader callback: move everything the port has received into the buffer."""
+        try:
+            data = self.port.read(self.port.in_waiting or 1)
+        except (WxError, OSError) as e:
+            # closed by the peer or gone: the fd would stay readable, stop watching it and fail the pending command
+            self.eventLoop.remove_reader(self.port.fileno())
+            self.error = e
+            self.received.set()
+            return
+        if data:
+            self.buffer += data
+            wxSession.touch()
+            serialStats.received(len(data))
+            self.received.set()
+
+    def close(self):
+        """Stop the worker task, remove the reader callback and restore the port timeout. Pending commands are cancelled."""
+        self.worker.cancel()
+        self.eventLoop.remove_reader(self.port.fileno())
+        self.port.timeout = self.timeout
+        while not self.queue.empty():
+            self.queue.get_nowait()[3].cancel()
+
+    async def run(self):
+        """Worker task: execute queued commands, highest priority (lowest number) first."""
+        while True:
+            priority, seq, job, future = await self.queue.get()
+            if future.cancelled():
+                continue
+            # the caller may have been cancelled while the job was running
+            try:
+                result = await job()
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    def submit(self, priority, job):
+        """Queue the coroutine function job, returns a future for its result."""
+        future = self.eventLoop.create_future()
+        self.seq += 1
+        self.queue.put_nowait((priority, self.seq, job, future))
+        return future
+
+    async def write(self, data):
+        """Write data (str commands are terminated with LF, the empty command is the wakeup call) to the console."""
+        name = None
+        if isinstance(data, str):
+            name = data or 'WAKE'
+            data = (data + '\n').encode('ascii')
+        if self.error is not None:
+            raise self.error
+        serialStats.sent(name, len(data))
+        self.port.write(data)
+        if not WXFASTIO:
+            await asyncio.sleep(WXDELAY)
+
+    async def read(self, size=None, terminator=None, timeout=2):
+        """Return size bytes, or everything up to and including terminator, or whatever arrived before timeout."""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.error is not None:
+                raise self.error
+            if terminator is not None:
+                i = self.buffer.find(terminator)
+                n = i + len(terminator) if i >= 0 else -1
+            else:
+                n = size if len(self.buffer) >= size else -1
+            remaining = deadline - time.monotonic()
+            if n >= 0 or remaining <= 0:
+                break
+            self.received.clear()
+            try:
+                await asyncio.wait_for(self.received.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        if n < 0:
+            n = len(self.buffer)
+        data = bytes(self.buffer[:n])
+        del self.buffer[:n]
+        return data
+
+    async def wake(self):
+        """Wake up the console unless wxSession knows it is awake. Returns True if the console is awake."""
+        if wxSession.awake():
+            return True
+        for attempt in range(3):
+            self.buffer.clear()
+            await self.write('')
+            if (await self.read(terminator=b'\n\r', timeout=1.2)).endswith(b'\n\r'):
+                serialStats.done()
+                return True
+            serialStats.done(False)
+        wxSession.invalidate()
+        return False
+
+    async def packet(self, cmd, size, timeout=2, check_header=None):
+        """Request a binary packet, returns the CRC-verified payload of size bytes (ACK removed), None on failure."""
+        for attempt in range(2):
+            if not await self.wake():
+                return None
+            self.buffer.clear()
+            await self.write(cmd)
+            ack = await self.read(1, timeout=timeout)
+            while ack in (b'\n', b'\r'):
+                serialStats.count('strayBytes')
+                ack = await self.read(1, timeout=timeout)
+            if ack == b'\x06':
+                payload = await self.read(size, timeout=timeout)
+                if len(payload) == size and CRC(payload) == 0:
+                    if check_header is None or payload.startswith(check_header):
+                        serialStats.done()
+                        return payload
+                elif len(payload) == size:
+                    serialStats.count('crcErrors')
+            print(tStamp() + f'{cmd} - No valid packet received (async).')
+            serialStats.done(False)
+            if attempt == 0:
+                serialStats.count('retries')
+            wxSession.invalidate()
+        return None
+
+    async def text(self, cmd, last=b'\n\r', timeout=2):
+        """Send an ASCII command answered with OK, returns the raw response up to the line starting with last."""
+        if not await self.wake():
+            return b''
+        self.buffer.clear()
+        await self.write(cmd)
+        raw = await self.read(terminator=b'OK\n\r', timeout=timeout)
+        if raw.endswith(b'OK\n\r'):
+            raw += await self.read(terminator=last, timeout=timeout)
+            if last != b'\n\r' and raw.endswith(last):
+                raw += await self.read(terminator=b'\n\r', timeout=timeout)
+        serialStats.done(raw.endswith(b'\n\r'))
+        return raw
+
+    def loop(self):
+        """Awaitable LOOP packet (payload for decodeLoop1), highest priority."""
+        return self.submit(self.LOOP, lambda: self.packet('LOOP 1', 99, check_header=b'LOO'))
+
+    def loop2(self):
+        """Awaitable LOOP2 packet (payload for decodeLoop2), highest priority."""
+        return self.submit(self.LOOP, lambda: self.packet('LPS 2 1', 99, check_header=b'LOO'))
+
+    def hilows(self):
+        """Awaitable HILOWS response including the ACK (for decodeHiLows)."""
+        async def job():
+            payload = await self.packet('HILOWS', 438, timeout=3)
+            return b'\x06' + payload if payload else None
+        return self.submit(self.HILOWS, job)
+
+    def command(self, cmd, last=b'\n\r'):
+        """Awaitable raw response to an ASCII command (VER, NVER, RXCHECK, BARDATA...), lowest priority."""
+        return self.submit(self.INFO, lambda: self.text(cmd, last))
+
+
+def runAsync(coroutine):
+    """Run coroutine to completion on the event loop kept for the whole process (created on first use)."""
+    global asyncLoop
+    if asyncLoop is None:
+        asyncLoop = asyncio.new_event_loop()
+        asyncio.set_event_loop(asyncLoop)
+    return asyncLoop.run_until_complete(coroutine)
+
+
+async def refreshConsoleInfo(console, margin):
+    """Refresh the cached RXCHECK (and BARDATA) responses that expire within margin seconds, at low priority."""
+    if consoleInfoStale('RXCHECK', margin):
+        raw = await console.command('RXCHECK')
+        if raw:
+            consoleInfoCache['RXCHECK'] = (parseRxCheck(raw), time.monotonic())
+    if LPS and consoleInfoStale('BARDATA', margin):
+        raw = await console.command('BARDATA', last=b'OFFSET')
+        if raw.endswith(b'\n\r'):
+            consoleInfoCache['BARDATA'] = (raw.decode('ascii', errors='ignore'), time.monotonic())
+
+
+async def pollWxData(duration):
+    """
+    Poll LOOP (and LOOP2) packets every WXASYNCINTERVAL seconds for duration seconds through
+    AsyncConsole, keeping wxDict and wxshared.wxDict up to date, while console info that would
+    expire before the next regular cycle is refreshed in between at low priority.
+    """
+    global wx
+    import wxshared
+
+    end = time.monotonic() + duration
+    console = AsyncConsole(wx)
+    info = asyncio.ensure_future(refreshConsoleInfo(console, duration + 5))
+    packets = 0
+    try:
+        while time.monotonic() < end and not shutdownRequested:
+            due = time.monotonic() + WXASYNCINTERVAL
+            payload = await console.loop()
+            if payload:
+                decodeLoop1(payload)
+                wxDict['TIMESTAMP_PC'] = datetime.datetime.now()
+                packets += 1
+            fresh = payload is not None
+            if LPS:
+                payload = await console.loop2()
+                if payload:
+                    decodeLoop2(payload)
+            if fresh:
+                wxHistory.append(wxDict.copy())
+            wxshared.wxDict = wxDict
+            await asyncio.sleep(max(min(due, end) - time.monotonic(), 0))
+        if not info.done():
+            info.cancel()
+    except (WxError, OSError) as e:
+        print(tStamp() + f'Console connection lost in async mode: {getattr(e, "value", e)}')
+        wx.close()
+        # reopened at the end of the main loop
+        wx = None
+    except Exception as e:
+        print(tStamp() + f'Async polling error: {e}')
+    finally:
+        console.close()
+
+    print(tStamp() + 'Received %d LOOP packet(s) in async mode.' % packets)
+    return packets
+
+
+# CCITT-16 table of the Davis protocol, binascii.crc_hqx is checked against it at import time
+CRCTABLE = (0, 4129, 8258, 12387, 16516, 20645, 24774, 28903, 33032, 37161, 41290,
+            45419, 49548, 53677, 57806, 61935, 4657, 528, 12915, 8786, 21173, 17044,
+            29431, 25302, 37689, 33560, 45947, 41818, 54205, 50076, 62463, 58334,
+            9314, 13379, 1056, 5121, 25830, 29895, 17572, 21637, 42346, 46411,
+            34088, 38153, 58862, 62927, 50604, 54669, 13907, 9842, 5649, 1584,
+            30423, 26358, 22165, 18100, 46939, 42874, 38681, 34616, 63455, 59390,
+            55197, 51132, 18628, 22757, 26758, 30887, 2112, 6241, 10242, 14371,
+            51660, 55789, 59790, 63919, 35144, 39273, 43274, 47403, 23285, 19156,
+            31415, 27286, 6769, 2640, 14899, 10770, 56317, 52188, 64447, 60318,
+            39801, 35672, 47931, 43802, 27814, 31879, 19684, 23749, 11298, 15363,
+            3168, 7233, 60846, 64911, 52716, 56781, 44330, 48395, 36200, 40265,
+            32407, 28342, 24277, 20212, 15891, 11826, 7761, 3696, 65439, 61374,
+            57309, 53244, 48923, 44858, 40793, 36728, 37256, 33193, 45514, 41451,
+            53516, 49453, 61774, 57711, 4224, 161, 12482, 8419, 20484, 16421, 28742,
+            24679, 33721, 37784, 41979, 46042, 49981, 54044, 58239, 62302, 689,
+            4752, 8947, 13010, 16949, 21012, 25207, 29270, 46570, 42443, 38312,
+            34185, 62830, 58703, 54572, 50445, 13538, 9411, 5280, 1153, 29798,
+            25671, 21540, 17413, 42971, 47098, 34713, 38840, 59231, 63358, 50973,
+            55100, 9939, 14066, 1681, 5808, 26199, 30326, 17941, 22068, 55628,
+            51565, 63758, 59695, 39368, 35305, 47498, 43435, 22596, 18533, 30726,
+            26663, 6336, 2273, 14466, 10403, 52093, 56156, 60223, 64286, 35833,
+            39896, 43963, 48026, 19061, 23124, 27191, 31254, 2801, 6864, 10931,
+            14994, 64814, 60687, 56684, 52557, 48554, 44427, 40424, 36297, 31782,
+            27655, 23652, 19525, 15522, 11395, 7392, 3265, 61215, 65342, 53085,
+            57212, 44955, 49082, 36825, 40952, 28183, 32310, 20053, 24180, 11923,
+            16050, 3793, 7920)
+
+
+def crcTable(inputData, crc=0):
+    """CCITT-16 CRC computed with CRCTABLE in Python (reference implementation of CRC)."""
+    crcAcc = crc
+    for byte in inputData:
+        ushort = (crcAcc << 8) & 0xFF00
+        crcAcc = ushort ^ CRCTABLE[((crcAcc >> 8) ^ byte) & 0xFF]
+
+    return crcAcc
+
+
+def numpyModule():
+    """Returns the numpy module for the batch decoders, NumPy is not needed for anything else."""
+    try:
+        import numpy
+    except ImportError:
+        raise WxError('The batch decoders require NumPy (pip3 install numpy).') from None
+    return numpy
+
+
+def packetArray(buffer, size):
+    """Returns the concatenated size-byte packets in buffer as a NumPy uint8 array (N, size), a trailing partial packet is ignored."""
+    numpy = numpyModule()
+    return numpy.frombuffer(buffer, numpy.uint8, len(buffer) // size * size).reshape(-1, size)
+
+
+def crcBatch(packets):
+    """CRC of every row of the uint8 array packets (N, packet size), 0 for packets that end with a valid CRC."""
+    numpy = numpyModule()
+    table = numpy.array(CRCTABLE, numpy.uint16)
+    crc = numpy.zeros(len(packets), numpy.uint16)
+    # one table lookup per byte position for all packets at once
+    for column in packets.T:
+        crc = (crc << 8) ^ table[(crc >> 8) ^ column]
+    return crc
+
+
+def CRC(inputData, crc=0):
+    """
+    CCITT-16 CRC implementation, function should return 0 (over data + CRC).
+    inputData is any bytes-like object (bytes, bytearray, memoryview). Pass the CRC of the
+    preceding chunks as crc to continue it, i.e. CRC(b, CRC(a)) == CRC(a + b).
+    """
+    return binascii.crc_hqx(inputData, crc)
+
 
-    return crcAcc
+if any(binascii.crc_hqx(bytes((i, )), 0) != CRCTABLE[i] for i in range(256)):
+    print(tStamp() + 'binascii.crc_hqx does not match the Davis CRC table, using the Python implementation.')
+    CRC = crcTable
 
 
 def padText(inText, minLength, padChar='0'):
@@ -1383,21 +2514,14 @@ def centerText(inText, lineLength):
 
 def unpackTime(theString, offset):
     """Returns time (HH:MM) from theString at offset."""
-    theTime = ''
-    j = struct.unpack_from('H', theString, offset)[0]
-    if j == 65535:
+    return formatTime(struct.unpack_from('H', theString, offset)[0])
+
+
+def formatTime(j):
+    """Returns time (HH:MM) from a console time value (hour * 100 + minute), '00:00' if not set (65535 or None)."""
+    if j is None or j == 65535:
         return '00:00'
-    hr = j // 100
-    mn = j % 100
-    z = str(hr)
-    if len(z) < 2:
-        z = '0' + z
-    theTime = z + ':'
-    z = str(mn)
-    if len(z) < 2:
-        z = '0' + z
-    theTime = theTime + z
-    return theTime
+    return '%02d:%02d' % (j // 100, j % 100)
 
 
 def hiLows():
@@ -1405,13 +2529,10 @@ def hiLows():
     global HL
 
     # Flush stale data from previous commands
-    wx.reset_input_buffer()
+    wxFlushInput()
 
-    # Send VER just to keep the console happy (discard its output)
-    wxWrite('VER')
-    time.sleep(WXDELAY)
-    if wx.in_waiting:
-        wx.read(wx.in_waiting)
+    # Make sure the console is awake (no extra round trip if it still is)
+    wxSession.ensureAwake()
 
     # Try to get the HILOWS packet with up to 2 attempts
     payload = None
@@ -1419,20 +2540,16 @@ def hiLows():
         try:
             payload, t = request_packet('HILOWS', 439, timeout=3)  # optionally pass timeout if you want longer wait
             if payload:
-                # CRC check
-                crc_val = CRC(t[1:439])
-                wxMinMax['CRC-CALC'] = crc_val
-                if crc_val == 0:
-                    HL = payload
-                    # Store the main body
-                    writeDump(TMPPATH + 'HILOWS', HL)
-                    break
-                else:
-                    raise WxError('Invalid CRC in HILOWS data packet')
+                # the CRC has already been verified by request_packet
+                wxMinMax['CRC-CALC'] = 0
+                HL = bytes(payload)
+                # Store the main body
+                writeDump(TMPPATH + 'HILOWS', HL)
+                break
 
         except Exception as e:
             print(tStamp() + f'HILOWS attempt {attempt+1} failed: {e}')
-        time.sleep(1.0)
+        time.sleep(latency('HILOWS', 3).backoff())
 
     if not payload:
         raise WxError('Failed to get valid HILOWS data packet after 2 attempts.')
@@ -1440,98 +2557,86 @@ def hiLows():
 
     packet_size = len(t)
     print(tStamp() + f'Read HILOWS packet from console, received {packet_size} bytes. CRC OK.')
+    decodeHiLows(t)
 
-    wxMinMax['BAROMETER_DAY_MIN_INHG'] = round(struct.unpack_from('H', t, 1)[0] / 1000.0, 2)
-    wxMinMax['BAROMETER_DAY_MAX_INHG'] = round(struct.unpack_from('H', t, 3)[0] / 1000.0, 2)
-    wxMinMax['BAROMETER_DAY_MIN_HPA'] = round(wxMinMax['BAROMETER_DAY_MIN_INHG'] * 33.8639, 1)
-    wxMinMax['BAROMETER_DAY_MAX_HPA'] = round(wxMinMax['BAROMETER_DAY_MAX_INHG'] * 33.8639, 1)
-    wxMinMax['BAROMETER_MONTH_MIN_INHG'] = round(struct.unpack_from('H', t, 5)[0] / 1000.0, 2)
-    wxMinMax['BAROMETER_MONTH_MAX_INHG'] = round(struct.unpack_from('H', t, 7)[0] / 1000.0, 2)
-    wxMinMax['BAROMETER_MONTH_MIN_HPA'] = round(wxMinMax['BAROMETER_MONTH_MIN_INHG'] * 33.8639, 1)
-    wxMinMax['BAROMETER_MONTH_MAX_HPA'] = round(wxMinMax['BAROMETER_MONTH_MAX_INHG'] * 33.8639, 1)
-    wxMinMax['BAROMETER_YEAR_MIN_INHG'] = round(struct.unpack_from('H', t, 9)[0] / 1000.0, 2)
-    wxMinMax['BAROMETER_YEAR_MAX_INHG'] = round(struct.unpack_from('H', t, 11)[0] / 1000.0, 2)
-    wxMinMax['BAROMETER_YEAR_MIN_HPA'] = round(wxMinMax['BAROMETER_YEAR_MIN_INHG'] * 33.8639, 1)
-    wxMinMax['BAROMETER_YEAR_MAX_HPA'] = round(wxMinMax['BAROMETER_YEAR_MAX_INHG'] * 33.8639, 1)
-    wxMinMax['BAROMETER_MIN_TIME'] = unpackTime(t, 13)
-    wxMinMax['BAROMETER_MAX_TIME'] = unpackTime(t, 15)
-    wxMinMax['WINDSPEED_DAY_MAX_MPH'] = struct.unpack_from('B', t, 17)[0]
-    wxMinMax['WINDSPEED_DAY_MAX_KTS'] = round(wxMinMax['WINDSPEED_DAY_MAX_MPH'] * 0.868976, 1)
-    wxMinMax['WINDSPEED_DAY_MAX_MSEC'] = round(wxMinMax['WINDSPEED_DAY_MAX_MPH'] * 0.44704, 1)
-    wxMinMax['WINDSPEED_MONTH_MAX_MPH'] = struct.unpack_from('B', t, 20)[0]
-    wxMinMax['WINDSPEED_MONTH_MAX_KTS'] = round(wxMinMax['WINDSPEED_MONTH_MAX_MPH'] * 0.868976, 1)
-    wxMinMax['WINDSPEED_MONTH_MAX_MSEC'] = round(wxMinMax['WINDSPEED_MONTH_MAX_MPH'] * 0.44704, 1)
-    wxMinMax['WINDSPEED_YEAR_MAX_MPH'] = struct.unpack_from('B', t, 21)[0]
-    wxMinMax['WINDSPEED_YEAR_MAX_KTS'] = round(wxMinMax['WINDSPEED_YEAR_MAX_MPH'] * 0.868976, 1)
-    wxMinMax['WINDSPEED_YEAR_MAX_MSEC'] = round(wxMinMax['WINDSPEED_YEAR_MAX_MPH'] * 0.44704, 1)
-    wxMinMax['WINDSPEED_MAX_TIME'] = unpackTime(t, 18)
-    j = wxMinMax['OUTTEMP_DAY_MIN_F'] = struct.unpack_from('H', t, 48)[0] / 10.0
-    wxMinMax['OUTTEMP_DAY_MIN_C'] = FtoC(j)
-    j = wxMinMax['OUTTEMP_DAY_MAX_F'] = struct.unpack_from('H', t, 50)[0] / 10.0
-    wxMinMax['OUTTEMP_DAY_MAX_C'] = FtoC(j)
-    j = wxMinMax['OUTTEMP_MONTH_MIN_F'] = struct.unpack_from('H', t, 58)[0] / 10.0
-    wxMinMax['OUTTEMP_MONTH_MIN_C'] = FtoC(j)
-    j = wxMinMax['OUTTEMP_MONTH_MAX_F'] = struct.unpack_from('H', t, 56)[0] / 10.0
-    wxMinMax['OUTTEMP_MONTH_MAX_C'] = FtoC(j)
-    j = wxMinMax['OUTTEMP_YEAR_MIN_F'] = struct.unpack_from('H', t, 62)[0] / 10.0
-    wxMinMax['OUTTEMP_YEAR_MIN_C'] = FtoC(j)
-    j = wxMinMax['OUTTEMP_YEAR_MAX_F'] = struct.unpack_from('H', t, 60)[0] / 10.0
-    wxMinMax['OUTTEMP_YEAR_MAX_C'] = FtoC(j)
-    wxMinMax['OUTTEMP_MAX_TIME'] = unpackTime(t, 54)
-    wxMinMax['OUTTEMP_MIN_TIME'] = unpackTime(t, 52)
-    j = wxMinMax['DEWPOINT_DAY_MIN_F'] = struct.unpack_from('H', t, 64)[0] / 1.0
-    wxMinMax['DEWPOINT_DAY_MIN_C'] = FtoC(j)
-    j = wxMinMax['DEWPOINT_DAY_MAX_F'] = struct.unpack_from('H', t, 66)[0] / 1.0
-    wxMinMax['DEWPOINT_DAY_MAX_C'] = FtoC(j)
-    j = wxMinMax['DEWPOINT_MONTH_MIN_F'] = struct.unpack_from('H', t, 74)[0] / 1.0
-    wxMinMax['DEWPOINT_MONTH_MIN_C'] = FtoC(j)
-    j = wxMinMax['DEWPOINT_MONTH_MAX_F'] = struct.unpack_from('H', t, 72)[0] / 1.0
-    wxMinMax['DEWPOINT_MONTH_MAX_C'] = FtoC(j)
-    j = wxMinMax['DEWPOINT_YEAR_MIN_F'] = struct.unpack_from('H', t, 78)[0] / 1.0
-    wxMinMax['DEWPOINT_YEAR_MIN_C'] = FtoC(j)
-    j = wxMinMax['DEWPOINT_YEAR_MAX_F'] = struct.unpack_from('H', t, 76)[0] / 1.0
-    wxMinMax['DEWPOINT_YEAR_MAX_C'] = FtoC(j)
-    wxMinMax['DEWPOINT_MIN_TIME'] = unpackTime(t, 68)
-    wxMinMax['DEWPOINT_MAX_TIME'] = unpackTime(t, 70)
-    wxMinMax['OUTHUM_DAY_MIN'] = struct.unpack_from('B', t, 277)[0]
-    wxMinMax['OUTHUM_DAY_MAX'] = struct.unpack_from('B', t, 285)[0]
-    wxMinMax['OUTHUM_MONTH_MIN'] = struct.unpack_from('B', t, 333)[0]
-    wxMinMax['OUTHUM_MONTH_MAX'] = struct.unpack_from('B', t, 325)[0]
-    wxMinMax['OUTHUM_YEAR_MIN'] = struct.unpack_from('B', t, 349)[0]
-    wxMinMax['OUTHUM_YEAR_MAX'] = struct.unpack_from('B', t, 341)[0]
-    wxMinMax['OUTHUM_MIN_TIME'] = unpackTime(t, 293)
-    wxMinMax['OUTHUM_MAX_TIME'] = unpackTime(t, 309)
-    wxMinMax['SOLAR_MAX_DAY'] = struct.unpack_from('H', t, 104)[0]
-    wxMinMax['SOLAR_MAX_MONTH'] = struct.unpack_from('H', t, 108)[0]
-    wxMinMax['SOLAR_MAX_YEAR'] = struct.unpack_from('H', t, 110)[0]
-    j = struct.unpack_from('H', t, 106)[0]
-    if j == 65535:
-        wxMinMax['SOLAR_MAX_TIME'] = '00:00'
-    else:
-        wxMinMax['SOLAR_MAX_TIME'] = unpackTime(t, 106)
-    wxMinMax['UVINDEX_MAX_DAY'] = struct.unpack_from('B', t, 112)[0] / 10.0
-    wxMinMax['UVINDEX_MAX_MONTH'] = struct.unpack_from('B', t, 115)[0] / 10.0
-    wxMinMax['UVINDEX_MAX_YEAR'] = struct.unpack_from('B', t, 116)[0] / 10.0
-    j = struct.unpack_from('H', t, 113)[0]
-    if j == 65535:
-        wxMinMax['UVINDEX_MAX_TIME'] = '00:00'
-    else:
-        wxMinMax['UVINDEX_MAX_TIME'] = unpackTime(t, 113)
+
+def rainRateToMm(clicks):
+    """Rain rate in mm/h from rain clicks per hour (0.2 mm or 0.01 in collector, see INCHES)."""
     if INCHES == False:
-        wxMinMax['RAINRATE_MAX_HOUR_MMHR'] = round(struct.unpack_from('H', t, 121)[0] * 0.2, 1)
-        wxMinMax['RAINRATE_MAX_DAY_MMHR'] = round(struct.unpack_from('H', t, 117)[0] * 0.2, 1)
-        wxMinMax['RAINRATE_MAX_MONTH_MMHR'] = round(struct.unpack_from('H', t, 123)[0] * 0.2, 1)
-        wxMinMax['RAINRATE_MAX_YEAR_MMHR'] = round(struct.unpack_from('H', t, 125)[0] * 0.2, 1)
-    else:
-        wxMinMax['RAINRATE_MAX_HOUR_MMHR'] = inToMm(round(struct.unpack_from('H', t, 121)[0] * 0.01, 1))
-        wxMinMax['RAINRATE_MAX_DAY_MMHR'] = inToMm(round(struct.unpack_from('H', t, 117)[0] * 0.01, 1))
-        wxMinMax['RAINRATE_MAX_MONTH_MMHR'] = inToMm(round(struct.unpack_from('H', t, 123)[0] * 0.01, 1))
-        wxMinMax['RAINRATE_MAX_YEAR_MMHR'] = inToMm(round(struct.unpack_from('H', t, 125)[0] * 0.01, 1))
-    j = struct.unpack_from('H', t, 119)[0]
-    if j == 65535:
-        wxMinMax['RAINRATE_MAX_TIME'] = '00:00'
-    else:
-        wxMinMax['RAINRATE_MAX_TIME'] = unpackTime(t, 119)
+        return round(clicks * 0.2, 1)
+    return inToMm(round(clicks * 0.01, 1))
+
+
+# unit of a decoded value -> (key suffix, conversion) of every key it is stored as, None stores the value as is;
+# the other units (_C, _HPA, _KTS, _MSEC) are derived on access, see DERIVEDUNITS
+UNITCONVERSIONS = {
+    'inHg': (('_INHG', lambda v: round(v, 2)), ),
+    'F': (('_F', None), ),
+    'mph': (('_MPH', None), ),
+    'clicks/h': (('_MMHR', rainRateToMm), ),
+    'hhmm': (('', formatTime), ),
+    '%': (('', None), ),
+    'W/m2': (('', None), ),
+    'index': (('', None), ),
+    }
+
+# offsets are Davis offsets, i.e. relative to the first byte after the ACK
+HILOWSSCHEMA = PacketSchema((
+    ('BAROMETER_DAY_MIN', 0, 'H', 1000.0, 'inHg', None),
+    ('BAROMETER_DAY_MAX', 2, 'H', 1000.0, 'inHg', None),
+    ('BAROMETER_MONTH_MIN', 4, 'H', 1000.0, 'inHg', None),
+    ('BAROMETER_MONTH_MAX', 6, 'H', 1000.0, 'inHg', None),
+    ('BAROMETER_YEAR_MIN', 8, 'H', 1000.0, 'inHg', None),
+    ('BAROMETER_YEAR_MAX', 10, 'H', 1000.0, 'inHg', None),
+    ('BAROMETER_MIN_TIME', 12, 'H', None, 'hhmm', 65535),
+    ('BAROMETER_MAX_TIME', 14, 'H', None, 'hhmm', 65535),
+    ('WINDSPEED_DAY_MAX', 16, 'B', None, 'mph', None),
+    ('WINDSPEED_MAX_TIME', 17, 'H', None, 'hhmm', 65535),
+    ('WINDSPEED_MONTH_MAX', 19, 'B', None, 'mph', None),
+    ('WINDSPEED_YEAR_MAX', 20, 'B', None, 'mph', None),
+    ('OUTTEMP_DAY_MIN', 47, 'H', 10.0, 'F', None),
+    ('OUTTEMP_DAY_MAX', 49, 'H', 10.0, 'F', None),
+    ('OUTTEMP_MIN_TIME', 51, 'H', None, 'hhmm', 65535),
+    ('OUTTEMP_MAX_TIME', 53, 'H', None, 'hhmm', 65535),
+    ('OUTTEMP_MONTH_MAX', 55, 'H', 10.0, 'F', None),
+    ('OUTTEMP_MONTH_MIN', 57, 'H', 10.0, 'F', None),
+    ('OUTTEMP_YEAR_MAX', 59, 'H', 10.0, 'F', None),
+    ('OUTTEMP_YEAR_MIN', 61, 'H', 10.0, 'F', None),
+    ('DEWPOINT_DAY_MIN', 63, 'H', 1.0, 'F', None),
+    ('DEWPOINT_DAY_MAX', 65, 'H', 1.0, 'F', None),
+    ('DEWPOINT_MIN_TIME', 67, 'H', None, 'hhmm', 65535),
+    ('DEWPOINT_MAX_TIME', 69, 'H', None, 'hhmm', 65535),
+    ('DEWPOINT_MONTH_MAX', 71, 'H', 1.0, 'F', None),
+    ('DEWPOINT_MONTH_MIN', 73, 'H', 1.0, 'F', None),
+    ('DEWPOINT_YEAR_MAX', 75, 'H', 1.0, 'F', None),
+    ('DEWPOINT_YEAR_MIN', 77, 'H', 1.0, 'F', None),
+    ('SOLAR_MAX_DAY', 103, 'H', None, 'W/m2', None),
+    ('SOLAR_MAX_TIME', 105, 'H', None, 'hhmm', 65535),
+    ('SOLAR_MAX_MONTH', 107, 'H', None, 'W/m2', None),
+    ('SOLAR_MAX_YEAR', 109, 'H', None, 'W/m2', None),
+    ('UVINDEX_MAX_DAY', 111, 'B', 10.0, 'index', None),
+    ('UVINDEX_MAX_TIME', 112, 'H', None, 'hhmm', 65535),
+    ('UVINDEX_MAX_MONTH', 114, 'B', 10.0, 'index', None),
+    ('UVINDEX_MAX_YEAR', 115, 'B', 10.0, 'index', None),
+    ('RAINRATE_MAX_DAY', 116, 'H', None, 'clicks/h', None),
+    ('RAINRATE_MAX_TIME', 118, 'H', None, 'hhmm', 65535),
+    ('RAINRATE_MAX_HOUR', 120, 'H', None, 'clicks/h', None),
+    ('RAINRATE_MAX_MONTH', 122, 'H', None, 'clicks/h', None),
+    ('RAINRATE_MAX_YEAR', 124, 'H', None, 'clicks/h', None),
+    ('OUTHUM_DAY_MIN', 276, 'B', None, '%', None),
+    ('OUTHUM_DAY_MAX', 284, 'B', None, '%', None),
+    ('OUTHUM_MIN_TIME', 292, 'H', None, 'hhmm', 65535),
+    ('OUTHUM_MAX_TIME', 308, 'H', None, 'hhmm', 65535),
+    ('OUTHUM_MONTH_MAX', 324, 'B', None, '%', None),
+    ('OUTHUM_MONTH_MIN', 332, 'B', None, '%', None),
+    ('OUTHUM_YEAR_MAX', 340, 'B', None, '%', None),
+    ('OUTHUM_YEAR_MIN', 348, 'B', None, '%', None),
+    ))
+
+
+def decodeHiLows(t):
+    """Decode a CRC-verified HILOWS response t (ACK + 436 bytes + CRC) into wxMinMax, sets the FREEZE and CONDENSATION flags."""
+    HILOWSSCHEMA.convert(HILOWSSCHEMA.unpack(t, 1), wxMinMax)
     if wxMinMax['OUTTEMP_DAY_MAX_C'] < -1.0:
         wxDict['FREEZE'] = True
     else:
@@ -1551,6 +2656,7 @@ def writeBatteryLog(fileName='/var/tmp/battery.log'):
     f = open(fileName, 'a')
     f.write(tStamp() + ' ISS battery should be replaced now.\n')
     f.close()
+    flashBudget.spend()
 
 
 def writeVersion():
@@ -1561,10 +2667,14 @@ def writeVersion():
 
 
 def writeDump(fileName, outData):
-    """Writes outData to fileName."""
+    """Writes outData to fileName. With DUMPAPPEND it is also appended to fileName.dump (see decodeDumps)."""
     f = open(fileName, 'wb')
     f.write(outData)
     f.close()
+    if DUMPAPPEND:
+        f = open(fileName + '.dump', 'ab')
+        f.write(outData)
+        f.close()
 
 
 def writeWxMinMaxAsText(fileName='minmax.txt'):
@@ -1870,32 +2980,353 @@ def writeWxDataAsText(fileName='wxdata.txt'):
     print(tStamp() + 'Wrote "' + fileName + '" to local disk, filesize = %d bytes.' % fileInfo.st_size)
 
 
-def writeWxDataAsCSV(fileName='wxdata.csv', SEP=','):
-    """Write/append essential data from wxDict to the specified CSV file, using SEP as field separator."""
-    global flashWrite
-    f = open(fileName, 'a')
-    oldSolar = wxDict['SOLAR_W']
-    oldUV = wxDict['UVINDEX']
-    if wxDict['SOLAR_W'] < 0:
-        wxDict['SOLAR_W'] = 0
-    if wxDict['UVINDEX'] < 0:
-        wxDict['UVINDEX'] = 0
-    s = ''
-    s = wxDict['TIMESTAMP'] + SEP + str(wxDict['OUTTEMP_C']) + SEP + str(wxDict['OUTHUM_P']) + SEP
-    s += str(wxDict['DEWPOINT_C']) + SEP + str(wxDict['BAROMETER_HPA']) + SEP + str(wxDict['WINDDIR']) + SEP
-    s += str(wxDict['WIND_KTS']) + SEP + str(wxDict['UVINDEX']) + SEP + str(wxDict['SOLAR_W']) + SEP
-    s += str(wxDict['RAINRATE_MMHR']) + SEP + str(wxDict['DAYRAIN_MM']) + SEP + str(wxDict['ET_DAY_MM']) + SEP
-    s += str(wxDict['ET_MONTH_MM']) + SEP + str(wxDict['AVGWIND10_KTS'])
-    wxDict['SOLAR_W'] = oldSolar
-    wxDict['UVINDEX'] = oldUV
+def formatCSVLine(d, SEP=','):
+    """Returns one line of the CSV file (archive of weather observations) for the observation in dictionary d."""
+    s = d['TIMESTAMP'] + SEP + str(d['OUTTEMP_C']) + SEP + str(d['OUTHUM_P']) + SEP
+    s += str(d['DEWPOINT_C']) + SEP + str(d['BAROMETER_HPA']) + SEP + str(d['WINDDIR']) + SEP
+    s += str(d['WIND_KTS']) + SEP + str(max(d['UVINDEX'], 0)) + SEP + str(max(d['SOLAR_W'], 0)) + SEP
+    s += str(d['RAINRATE_MMHR']) + SEP + str(d['DAYRAIN_MM']) + SEP + str(d['ET_DAY_MM']) + SEP
+    s += str(d['ET_MONTH_MM']) + SEP + str(d['AVGWIND10_KTS'])
     if LPS:
-        s += SEP + str(wxDict['AVGWIND2_KTS']) + SEP
-        s += str(wxDict['GUST10_KTS']) + SEP + str(wxDict['GUST10DIR'])
-    s += '\n'
-    f.write(s)
-    f.close()
-    print(tStamp() + 'Logged values in CSV file: %s' % fileName)
-    flashWrite += 1
+        s += SEP + str(d['AVGWIND2_KTS']) + SEP
+        s += str(d['GUST10_KTS']) + SEP + str(d['GUST10DIR'])
+    return s + '\n'
+
+
+class FlashBudget:
+    """
+    Counts the writes to the SD card (flashWrite) against FLASHBUDGET writes per day (0 = no limit).
+    Writers that can hold back their data stop writing while the budget is used up: CSV lines stay in csvWriter
+    until the next day, daily index files stay dirty and the CSV cache is not saved. The rainfall files, archive
+    backfill and the battery log are always written, but counted.
+    """
+
+    def __init__(self):
+        self.day = None
+        self.used = 0
+
+    def today(self):
+        """Start a new day's budget if the date has changed."""
+        today = datetime.date.today()
+        if today != self.day:
+            self.day = today
+            self.used = 0
+
+    def spend(self, writes=1):
+        """Account for writes to the SD card."""
+        global flashWrite
+        flashWrite += writes
+        self.today()
+        self.used += writes
+        if FLASHBUDGET > 0 and self.used == FLASHBUDGET:
+            print(tStamp() + 'FLASH write budget of %d writes per day used up, holding back CSV lines, daily index and CSV cache until tomorrow.' % FLASHBUDGET)
+
+    def exhausted(self):
+        self.today()
+        return FLASHBUDGET > 0 and self.used >= FLASHBUDGET
+
+
+flashBudget = FlashBudget()
+
+
+class ArchiveWriter:
+    """
+    Appends lines to the monthly CSV file, which is kept open. Lines are collected and written in one go
+    once CSVFLUSHCOUNT lines are pending or the oldest one is CSVFLUSHINTERVAL seconds old (default: every
+    line right away), CSVFSYNC = True also forces them onto the SD card. Lines for a new file (month) first
+    flush and close the previous one. While the FLASHBUDGET is used up, lines are held back until the next day
+    (or shutdown).
+    """
+
+    def __init__(self):
+        self.fileName = None
+        self.file = None
+        self.pending = []
+        self.since = None
+
+    def append(self, fileName, line):
+        """Queue line for fileName, writes the pending lines if the flush policy says so."""
+        if fileName != self.fileName:
+            self.close()
+            self.fileName = fileName
+        self.pending.append(line)
+        if self.since is None:
+            self.since = time.monotonic()
+        if self.due():
+            self.flush()
+        else:
+            print(tStamp() + 'Queued values for CSV file: %s (%d line(s) pending).' % (fileName, len(self.pending)))
+
+    def due(self):
+        """True if the pending lines should be written now."""
+        if flashBudget.exhausted():
+            return False
+        return len(self.pending) >= CSVFLUSHCOUNT or (CSVFLUSHINTERVAL > 0 and time.monotonic() - self.since >= CSVFLUSHINTERVAL)
+
+    def pendingLines(self, fileName):
+        """Lines queued for fileName and not written yet (e.g. for the plots)."""
+        return list(self.pending) if fileName == self.fileName else []
+
+    def flush(self):
+        """Write all pending lines with a single write()."""
+        if not self.pending:
+            return
+        if self.file is None:
+            self.file = open(self.fileName, 'a')
+        self.file.write(''.join(self.pending))
+        self.file.flush()
+        if CSVFSYNC:
+            os.fsync(self.file.fileno())
+        flashBudget.spend()
+        print(tStamp() + 'Logged %d line(s) in CSV file: %s' % (len(self.pending), self.fileName))
+        if DAILYINDEX:
+            dailyIndex.append(self.fileName, self.pending)
+        self.pending = []
+        self.since = None
+
+    def close(self):
+        """Flush and close the current file."""
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+csvWriter = ArchiveWriter()
+
+
+class DailyIndex:
+    """
+    Daily aggregates of the monthly CSV files in CSVPATH/yyyy-mm-daily.csv: min, max, sum and count of the
+    FIELDS per day (mean = sum / count). The rain total of a day is the max of DAYRAIN_MM, the max gust that
+    of GUST10_KTS. An index file holds the size and the last timestamp of the CSV file it covers: lines
+    appended since are added when the month is read, a CSV file that was rewritten is read again from the start.
+    The lines csvWriter logs are added in memory only, the index file of the month is written when the next
+    month starts, on shutdown (flush) or by a reader that added lines, not with every CSV write.
+    """
+
+    # field name, column in the CSV file (see formatCSVLine)
+    FIELDS = (
+        ('OUTTEMP_C', 1), ('OUTHUM_P', 2), ('DEWPOINT_C', 3), ('BAROMETER_HPA', 4),
+        ('WIND_KTS', 6), ('UVINDEX', 7), ('SOLAR_W', 8), ('RAINRATE_MMHR', 9),
+        ('DAYRAIN_MM', 10), ('ET_DAY_MM', 11), ('AVGWIND10_KTS', 13), ('GUST10_KTS', 15),
+        )
+    FIELD = {name: i for i, (name, column) in enumerate(FIELDS)}
+
+    def __init__(self):
+        # month 'yyyy-mm' -> [size of the CSV file covered, timestamp of its last line, {date: [[min, max, sum, count] per field]}]
+        self.months = {}
+        # months with lines added since their index file was written
+        self.dirty = set()
+
+    def fileName(self, month):
+        return CSVPATH + month + '-daily.csv'
+
+    def csvName(self, month):
+        return dataset.fileName(month)
+
+    def add(self, days, line):
+        """Add the CSV line to the daily aggregates days."""
+        fields = line.split(',')
+        if len(fields) < 2:
+            return
+        day = days.get(fields[0][0:10])
+        if day is None:
+            day = days[fields[0][0:10]] = [[None, None, 0.0, 0] for field in self.FIELDS]
+        for stats, (name, column) in zip(day, self.FIELDS):
+            try:
+                value = float(fields[column])
+            except (IndexError, ValueError):
+                continue
+            if stats[3] == 0 or value < stats[0]:
+                stats[0] = value
+            if stats[3] == 0 or value > stats[1]:
+                stats[1] = value
+            stats[2] += value
+            stats[3] += 1
+
+    def read(self, month, entry):
+        """
+        Add the lines of the CSV file of month after the ones covered by entry. Returns False if the file
+        does not continue the covered lines (it was rewritten).
+        """
+        size, last, days = entry
+        with open(self.csvName(month), 'rb') as f:
+            if size > 0:
+                f.seek(max(size - 512, 0))
+                data = f.read(size - max(size - 512, 0))
+                if not data.endswith(b'\n') or data[data.rfind(b'\n', 0, -1) + 1:][:19].decode('ascii', errors='replace') != last:
+                    return False
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        lines = data[:end].decode('ascii', errors='replace').splitlines()
+        for line in lines:
+            self.add(days, line)
+        if lines:
+            entry[0] = size + end
+            entry[1] = lines[-1][:19]
+        return True
+
+    def load(self, month):
+        """Returns [size, last, days] from the index file of month, None if there is none or it can not be read."""
+        try:
+            with open(self.fileName(month), 'r') as f:
+                lines = f.readlines()
+            header = lines[0].split(None, 3)
+            size = int(header[2])
+            last = header[3].rstrip('\n') if len(header) > 3 else ''
+            days = {}
+            for line in lines[2:]:
+                v = line.rstrip('\n').split(',')
+                days[v[0]] = [[float(v[i]) if v[i] else None, float(v[i + 1]) if v[i + 1] else None, float(v[i + 2]), int(v[i + 3])]
+                              for i in range(1, 4 * len(self.FIELDS), 4)]
+            return [size, last, days]
+        except (OSError, IndexError, ValueError) as e:
+            return None
+
+    def save(self, month):
+        """Write the index file of month, or keep it dirty while the FLASHBUDGET is used up."""
+        if flashBudget.exhausted():
+            self.dirty.add(month)
+            return
+        size, last, days = self.months[month]
+        lines = ['# ' + os.path.basename(self.csvName(month)) + ' ' + str(size) + ' ' + last + '\n',
+                 '# date,' + ','.join(name + ' min,' + name + ' max,' + name + ' sum,' + name + ' count' for name, column in self.FIELDS) + '\n']
+        for date in sorted(days, key=lambda date: date[6:10] + date[3:5] + date[0:2]):
+            lines.append(date + ''.join(',%s,%s,%r,%d' % ('' if stats[0] is None else repr(stats[0]), '' if stats[1] is None else repr(stats[1]), stats[2], stats[3])
+                                        for stats in days[date]) + '\n')
+        try:
+            with open(self.fileName(month) + '.tmp', 'w') as f:
+                f.writelines(lines)
+            os.replace(self.fileName(month) + '.tmp', self.fileName(month))
+            flashBudget.spend()
+            self.dirty.discard(month)
+        except OSError as e:
+            print(tStamp() + 'Could not write daily index %s: %s' % (self.fileName(month), e))
+
+    def flush(self):
+        """Write the index files of the months with lines added in memory only."""
+        for month in sorted(self.dirty):
+            self.save(month)
+
+    def month(self, month, rebuild=False, save=True):
+        """
+        Returns the daily aggregates {date: stats} of month, brought up to date with its CSV file (and saved
+        if that added lines, unless save is False). rebuild reads the whole CSV file again. None if there is no CSV file.
+        """
+        try:
+            size = os.stat(self.csvName(month)).st_size
+        except OSError:
+            return None
+        entry = None if rebuild else self.months.get(month) or self.load(month)
+        if entry is None or entry[0] > size:
+            entry = [0, '', {}]
+        if entry[0] < size or rebuild:
+            covered = entry[0]
+            if not self.read(month, entry):
+                entry = [0, '', {}]
+                self.read(month, entry)
+            self.months[month] = entry
+            if (entry[0] != covered or rebuild) and save:
+                self.save(month)
+            elif entry[0] != covered or rebuild:
+                self.dirty.add(month)
+        self.months[month] = entry
+        return entry[2]
+
+    def append(self, fileName, lines):
+        """Add lines that were just appended to the CSV file fileName (in memory, see flush)."""
+        month = os.path.basename(fileName)[0:7]
+        if fileName != self.csvName(month):
+            return
+        for other in sorted(self.dirty - {month}):
+            self.save(other)
+        entry = self.months.get(month) or self.load(month)
+        try:
+            size = os.stat(fileName).st_size
+        except OSError:
+            return
+        if entry is not None and entry[0] + len(''.join(lines).encode()) == size:
+            for line in lines:
+                self.add(entry[2], line)
+            entry[0] = size
+            entry[1] = lines[-1][:19]
+            self.months[month] = entry
+            self.dirty.add(month)
+        else:
+            self.month(month, save=False)
+
+    def rebuild(self, fileName):
+        """Read the CSV file fileName, which was rewritten, again."""
+        month = os.path.basename(fileName)[0:7]
+        if fileName == self.csvName(month):
+            self.month(month, rebuild=True)
+
+    def days(self, months):
+        """Returns the daily aggregates {date: stats} of months ('yyyy-mm')."""
+        result = {}
+        for month in months:
+            days = self.month(month)
+            if days is None:
+                continue
+            for date, day in days.items():
+                if date not in result:
+                    result[date] = day
+                    continue
+                merged = []
+                for a, b in zip(result[date], day):
+                    values = [v for v in (a[0], a[1], b[0], b[1]) if v is not None]
+                    merged.append([min(values) if values else None, max(values) if values else None, a[2] + b[2], a[3] + b[3]])
+                result[date] = merged
+        return result
+
+    def summary(self, day, name):
+        """Returns (min, max, mean, count) of field name from the daily aggregates day (None if there were no values)."""
+        minValue, maxValue, total, count = day[self.FIELD[name]]
+        return minValue, maxValue, total / count if count else None, count
+
+
+dailyIndex = DailyIndex()
+
+
+def rebuildDailyIndex():
+    """wospi.py --rebuild-index: Write the daily index files of all monthly CSV files in CSVPATH from scratch."""
+    months = sorted(name[0:7] for name in os.listdir(CSVPATH) if name[7:] == '-' + CSVFILESUFFIX)
+    for month in months:
+        days = dailyIndex.month(month, rebuild=True)
+        print(tStamp() + 'Daily index %s: %d day(s).' % (dailyIndex.fileName(month), len(days)))
+
+
+def requestShutdown(signum=None, frame=None):
+    """SIGTERM handler: only sets shutdownRequested, the main loop calls shutdown() between two cycles."""
+    global shutdownRequested
+    shutdownRequested = True
+
+
+def pause(seconds):
+    """time.sleep(seconds), cut short once a shutdown has been requested. Writes the serial I/O statistics if requested."""
+    end = time.monotonic() + seconds
+    while not shutdownRequested:
+        if serialStatsRequested:
+            writeSerialStats()
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            break
+        time.sleep(min(remaining, 0.5))
+
+
+def shutdown():
+    """Write the CSV lines still pending in csvWriter and the dirty daily index files, then exit."""
+    print(tStamp() + 'Terminating, writing pending CSV lines.')
+    csvWriter.close()
+    if DAILYINDEX:
+        dailyIndex.flush()
+    sys.exit(0)
+
+
+def writeWxDataAsCSV(fileName='wxdata.csv', SEP=','):
+    """Write/append essential data from wxDict to the specified CSV file (through csvWriter), using SEP as field separator."""
+    csvWriter.append(fileName, formatCSVLine(wxDict, SEP))
 
 
 def writeUIViewFile(fileName='uiview.txt'):
@@ -2007,7 +3438,6 @@ def updateRainFile(fileName, rainEntries):
 
 def storeRainAsCSV():
     """Compares, and if required: updates the monthly rainfall data file (yyyy-mm.rain)."""
-    global flashWrite
     monthFile = CSVPATH + datetime.datetime.now().strftime('%Y-%m') + '.rain'
     rainEntries = readFile(monthFile)
     currentEntry = datetime.datetime.now().strftime('%d.%m.%Y') + ', ' + str(wxDict['DAYRAIN_MM']) + ', ' + str(wxDict['MONTHRAIN_MM']) + ', ' + str(wxDict['YEARRAIN_MM']) + '\n'
@@ -2015,7 +3445,7 @@ def storeRainAsCSV():
         rainEntries.append(currentEntry)
         updateRainFile(monthFile, rainEntries)
         print(tStamp() + 'NEW rainfall entry added to NEW rainfall history file %s' % monthFile)
-        flashWrite += 1
+        flashBudget.spend()
     else:
         lastEntry = rainEntries[len(rainEntries) - 1]
         if lastEntry != currentEntry:
@@ -2023,38 +3453,479 @@ def storeRainAsCSV():
                 rainEntries[len(rainEntries) - 1] = currentEntry
                 updateRainFile(monthFile, rainEntries)
                 print(tStamp() + 'Rainfall data UPDATED in rainfall history file %s' % monthFile)
-                flashWrite += 1
+                flashBudget.spend()
             else:
                 rainEntries.append(currentEntry)
                 updateRainFile(monthFile, rainEntries)
                 print(tStamp() + 'NEW rainfall entry APPENDED to rainfall history file %s' % monthFile)
-                flashWrite += 1
+                flashBudget.spend()
+
+
+# rain collector type (top 4 bits of the archive rain field) => mm per click
+RAINCOLLECTOR_MM = {0x0000: 2.54, 0x1000: 0.254, 0x2000: 0.2, 0x3000: 1.0, 0x6000: 0.1}
+
+
+def dewPointC(tempC, hum):
+    """Dew point (degrees C) from temperature (degrees C) and relative humidity (%), Magnus formula."""
+    g = math.log(max(hum, 1) / 100.0) + 17.62 * tempC / (243.12 + tempC)
+    return 243.12 * g / (17.62 - g)
+
+
+def archiveTime(r):
+    """Returns the timestamp (datetime, console time) of the 52-byte archive record r."""
+    d, t = struct.unpack_from('<HH', r, 0)
+    return datetime.datetime(2000 + (d >> 9), (d >> 5) & 15, d & 31, t // 100, t % 100)
+
+
+# 52-byte Rev B archive record (the fields used by WOSPi), for the batch decoder
+ARCHIVESCHEMA = PacketSchema((
+    ('DATESTAMP', 0, 'H', None, '', None),
+    ('TIMESTAMP', 2, 'H', None, '', None),
+    ('OUTTEMP', 4, 'h', 10.0, 'F', 32767),
+    ('OUTTEMP_HI', 6, 'h', 10.0, 'F', -32768),
+    ('OUTTEMP_LO', 8, 'h', 10.0, 'F', 32767),
+    ('RAIN', 10, 'H', None, 'clicks', None),
+    ('RAINRATE_HI', 12, 'H', None, 'clicks/h', None),
+    ('BAROMETER', 14, 'H', 1000.0, 'inHg', 0),
+    ('SOLAR', 16, 'H', None, 'W/m2', 32767),
+    ('WINDSAMPLES', 18, 'H', None, '', None),
+    ('INTEMP', 20, 'h', 10.0, 'F', 32767),
+    ('INHUM', 22, 'B', None, '%', 255),
+    ('OUTHUM', 23, 'B', None, '%', 255),
+    ('AVGWIND', 24, 'B', None, 'mph', 255),
+    ('GUST', 25, 'B', None, 'mph', None),
+    ('GUSTDIR', 26, 'B', None, 'code', 255),
+    ('WINDDIR', 27, 'B', None, 'code', 255),
+    ('UVINDEX', 28, 'B', 10.0, 'index', 255),
+    ('ET', 29, 'B', 1000.0, 'in', None),
+    ('SOLAR_HI', 30, 'H', None, 'W/m2', None),
+    ('UVINDEX_HI', 32, 'B', 10.0, 'index', None),
+    ('FCRULE', 33, 'B', None, '', None),
+    ))
+
+
+def archiveDirection(code):
+    """Convert an archive record wind direction code (0-15, 255 = no wind) to degrees, formatted like WINDDIR."""
+    if code > 15:
+        return '000'
+    return padText(str(int(code * 22.5 + 0.5)), 3)
+
+
+def decodeArchiveRecord(r):
+    """
+    Decode a 52-byte Rev B archive record into a dictionary with the wxDict keys logged in the
+    CSV file, plus RAIN_MM and ET_MM for the archive interval. The daily/monthly totals are not
+    part of the record and must be accumulated by the caller. Returns None for records without
+    outside temperature/humidity (these are not logged).
+    """
+    outTemp = struct.unpack_from('<h', r, 4)[0]
+    outHum = r[23]
+    if outTemp == 32767 or outHum > 100:
+        return None
+
+    d = {}
+    d['TIMESTAMP'] = archiveTime(r).strftime('%d.%m.%Y %H:%M:%S')
+    d['OUTTEMP_C'] = FtoC(outTemp / 10.0)
+    d['OUTHUM_P'] = outHum
+    # the console reports the dew point in whole degrees F
+    d['DEWPOINT_C'] = FtoC(round(CtoF(dewPointC((outTemp / 10.0 - 32) * 5 / 9, outHum))))
+    d['BAROMETER_HPA'] = round(round(struct.unpack_from('<H', r, 14)[0] / 1000.0, 2) * 33.8639, 1)
+    d['WINDDIR'] = archiveDirection(r[27])
+    d['WIND_KTS'] = d['AVGWIND10_KTS'] = d['AVGWIND2_KTS'] = round(r[24] * 0.868976, 1)
+    d['GUST10_KTS'] = round(r[25] * 0.868976, 1)
+    d['GUST10DIR'] = archiveDirection(r[26])
+    d['UVINDEX'] = 0.0
+    if r[28] != 255:
+        d['UVINDEX'] = r[28] / 10.0 * (UVCF / 100)
+    d['SOLAR_W'] = 0
+    solar = struct.unpack_from('<H', r, 16)[0]
+    if solar != 32767:
+        d['SOLAR_W'] = int(solar * (SOLARCF / 100))
+
+    rain = struct.unpack_from('<H', r, 10)[0]
+    mmPerClick = RAINCOLLECTOR_MM.get(rain & 0xF000, 0.254 if INCHES else 0.2)
+    d['RAIN_MM'] = (rain & 0x0FFF) * mmPerClick
+    d['RAINRATE_MMHR'] = round(struct.unpack_from('<H', r, 12)[0] * mmPerClick, 1)
+    d['ET_MM'] = r[29] * 0.0254
+    return d
+
+
+def downloadArchive(since):
+    """
+    Download the archive records newer than since (datetime, console time) with DMPAFT.
+    Returns a list of (datetime, record) tuples in timestamp order, empty list on failure.
+    """
+    records = []
+    if not wxSession.ensureAwake():
+        print(tStamp() + 'Console did not wake up.')
+        return records
+
+    wxFlushInput()
+    wxWrite('DMPAFT')
+    ack = wxReadExact(1, 2)
+    if ack != b'\x06':
+        print(tStamp() + f'DMPAFT - Expected ACK 0x06, got {print_hex_bytes(ack)}.')
+        serialStats.done(False)
+        return records
+
+    stamp = struct.pack('<HH', since.day + since.month * 32 + (since.year - 2000) * 512, since.hour * 100 + since.minute)
+    wxWrite(stamp + struct.pack('>H', CRC(stamp)))
+    header = wxReadExact(7, 2)
+    if len(header) < 7 or header[0] != 0x06 or CRC(header[1:]) != 0:
+        print(tStamp() + f'DMPAFT - Invalid response to timestamp: {print_hex_bytes(header)}.')
+        serialStats.done(False)
+        return records
+
+    pages, first = struct.unpack_from('<HH', header, 1)
+    if pages == 0:
+        wxWrite(b'\x1b')
+        serialStats.done()
+        return records
+
+    print(tStamp() + 'DMPAFT - Downloading %d archive page(s).' % pages)
+    wxWrite(b'\x06')
+    for n in range(pages):
+        for attempt in range(3):
+            page = wxReadExact(267, 2)
+            if len(page) == 267 and CRC(page) == 0:
+                break
+            # ask for the same page again
+            serialStats.count('retries')
+            if len(page) == 267:
+                serialStats.count('crcErrors')
+            wxFlushInput()
+            wxWrite(b'\x21')
+        else:
+            print(tStamp() + 'DMPAFT - Giving up after page %d of %d.' % (n, pages))
+            wxWrite(b'\x1b')
+            serialStats.done(False)
+            break
+
+        for i in range(first if n == 0 else 0, 5):
+            r = page[1 + 52 * i:53 + 52 * i]
+            if r[:2] in (b'\xff\xff', b'\x00\x00'):
+                continue
+            try:
+                ts = archiveTime(r)
+            except ValueError:
+                continue
+            # a full archive wraps around, older records follow the newest one
+            if ts > since:
+                records.append((ts, r))
+        wxWrite(b'\x06')
+    else:
+        serialStats.done()
+
+    records.sort()
+    return records
+
+
+# dump file (writeDump) -> (schema, packet size, schema offset in the packet, packet type at byte 4 or None)
+DUMPLAYOUTS = {
+    'LOOP1': (LOOP1SCHEMA, 99, 2, 0),
+    'LOOP2': (LOOP2SCHEMA, 99, 2, 1),
+    'HILOWS': (HILOWSSCHEMA, 438, 0, None),
+    }
+
+
+def decodeDumps(buffer, kind):
+    """
+    Batch decoder (NumPy) for concatenated LOOP1, LOOP2 or HILOWS packets (kind), e.g. the TMPPATH/LOOP1.dump,
+    LOOP2.dump and HILOWS.dump files writeDump() appends to with DUMPAPPEND = True (TMPPATH/LOOP1 etc. hold
+    only the last packet).
+    Packets with a CRC error or, for LOOP packets, the wrong header are dropped. Returns a dictionary
+    name -> NumPy array with one element per valid packet, see PacketSchema.unpackBatch().
+    """
+    schema, size, start, packetType = DUMPLAYOUTS[kind]
+    packets = packetArray(buffer, size)
+    ok = crcBatch(packets) == 0
+    if packetType is not None:
+        ok &= (packets[:, 0] == 76) & (packets[:, 1] == 79) & (packets[:, 2] == 79) & (packets[:, 4] == packetType)
+    if not ok.all():
+        print(tStamp() + '%s - Dropped %d of %d packets (CRC error or wrong header).' % (kind, len(ok) - ok.sum(), len(ok)))
+    return schema.unpackBatch(packets[ok], start)
+
+
+def decodeArchiveBatch(buffer, pages=False):
+    """
+    Batch decoder (NumPy) for archive records: buffer holds concatenated 52-byte records (e.g. joined
+    from downloadArchive()) or, with pages=True, raw 267-byte DMPAFT pages, pages with a CRC error are
+    dropped. Empty record slots are dropped, older records of a wrapped archive are not. Returns a dictionary
+    name -> NumPy array per record (ARCHIVESCHEMA), plus TIME (datetime64, console time). RAIN holds the clicks
+    without the rain collector type bits, RAIN_MM and RAINRATE_MMHR are converted like decodeArchiveRecord().
+    """
+    numpy = numpyModule()
+    if pages:
+        records = packetArray(buffer, 267)
+        records = records[crcBatch(records) == 0][:, 1:261].reshape(-1, 52)
+    else:
+        records = packetArray(buffer, 52)
+    columns = ARCHIVESCHEMA.unpackBatch(records)
+    d = columns['DATESTAMP']
+    t = columns['TIMESTAMP']
+    month = (d >> 5) & 15
+    keep = (d != 0xFFFF) & (d != 0) & (month >= 1) & (month <= 12) & (d & 31 >= 1) & (t // 100 < 24) & (t % 100 < 60)
+    columns = {name: column[keep] for name, column in columns.items()}
+    d = columns['DATESTAMP'].astype(numpy.int64)
+    t = columns['TIMESTAMP'].astype(numpy.int64)
+    months = ((d >> 9) + 30) * 12 + ((d >> 5) & 15) - 1
+    columns['TIME'] = (months.astype('datetime64[M]').astype('datetime64[D]') + (d & 31) - 1
+                       ).astype('datetime64[m]') + (t // 100) * 60 + t % 100
+    rain = columns['RAIN'].astype(numpy.int64)
+    mmPerClick = numpy.full(len(rain), 0.254 if INCHES else 0.2)
+    for collector, mm in RAINCOLLECTOR_MM.items():
+        mmPerClick[rain & 0xF000 == collector] = mm
+    columns['RAIN'] = rain & 0x0FFF
+    columns['RAIN_MM'] = columns['RAIN'] * mmPerClick
+    columns['RAINRATE_MMHR'] = numpy.round(columns['RAINRATE_HI'] * mmPerClick, 1)
+    return columns
+
+
+def csvLineTime(line):
+    """Returns the timestamp (datetime) of a line in the CSV file."""
+    return datetime.datetime.strptime(line[:19], '%d.%m.%Y %H:%M:%S')
+
+
+def csvTimeKey(line):
+    """Returns the timestamp of a line in the CSV file as 'yyyymmddHH:MM:SS', which sorts like the time."""
+    return line[6:10] + line[3:5] + line[0:2] + line[11:19]
+
+
+class Dataset:
+    """
+    The monthly CSV files (CSVPATH/yyyy-mm-CSVFILESUFFIX) as one series of lines, read by datetime range:
+    only the files of the months in the range are opened, each once. The lines of a file are in timestamp
+    order (see mergeCSVLines), so the first line in range is found by bisecting the file and reading stops
+    after the last one. The timestamps are local time though: at the DST fall-back an hour is logged twice,
+    the file goes back in time once. Reading therefore starts and stops SLACK before and after the range,
+    which covers both copies of the hour.
+    """
+
+    SLACK = datetime.timedelta(hours=3)
+
+    def fileName(self, month):
+        """The CSV file of month ('yyyy-mm')."""
+        return CSVPATH + month + '-' + CSVFILESUFFIX
+
+    def months(self, start, end):
+        """The months ('yyyy-mm') of the datetime range start to end."""
+        return monthRange(start.month, start.year, end.month, end.year)
+
+    def lineStart(self, f, offset):
+        """Move the binary file f to the first line starting at or after offset."""
+        f.seek(max(offset - 1, 0))
+        if offset > 0:
+            f.readline()
+
+    def seek(self, f, key):
+        """Move the binary file f to its first line with a timestamp of key (see csvTimeKey) or later."""
+        f.seek(0, os.SEEK_END)
+        lo, hi = 0, f.tell()
+        while lo < hi:
+            mid = (lo + hi) // 2
+            self.lineStart(f, mid)
+            line = f.readline()
+            if not line or csvTimeKey(line.decode('ascii', errors='replace')) >= key:
+                hi = mid
+            else:
+                lo = mid + 1
+        self.lineStart(f, lo)
+
+    def lines(self, start, end):
+        """Yields the CSV lines with a timestamp from datetime start to end."""
+        startKey = start.strftime('%Y%m%d%H:%M:%S')
+        endKey = end.strftime('%Y%m%d%H:%M:%S')
+        stopKey = (end + self.SLACK).strftime('%Y%m%d%H:%M:%S')
+        for month in self.months(start, end):
+            try:
+                f = open(self.fileName(month), 'rb')
+            except OSError:
+                continue
+            with f:
+                self.seek(f, (start - self.SLACK).strftime('%Y%m%d%H:%M:%S'))
+                for line in f:
+                    line = line.decode('ascii', errors='replace')
+                    key = csvTimeKey(line)
+                    if key > stopKey:
+                        break
+                    if startKey <= key <= endKey:
+                        yield line
+
+    def records(self, start, end, *columns):
+        """
+        Yields (timestamp, value, ...) of columns (see formatCSVLine) for the CSV lines from datetime start
+        to end, lines without a number in one of the columns are skipped.
+        """
+        for line in self.lines(start, end):
+            fields = line.split(',')
+            try:
+                values = tuple(float(fields[c]) for c in columns)
+            except (IndexError, ValueError):
+                continue
+            yield (fields[0][0:19], ) + values
+
+
+dataset = Dataset()
+
+
+def lastCSVLine():
+    """Returns the most recent line of the CSV files of this or the previous month, None if there is none."""
+    thisMonth = datetime.datetime.now()
+    for month in (thisMonth, thisMonth - relativedelta(months=1)):
+        lines = [line for line in readFile(CSVPATH + month.strftime('%Y-%m') + '-' + CSVFILESUFFIX) if line.strip()]
+        if lines:
+            return lines[-1]
+    return None
+
+
+def lastRainEntry(since):
+    """Returns (date, dayRain, monthRain, yearRain) of the last rainfall history entry up to the month of since, or None."""
+    for month in (since, since - relativedelta(months=1)):
+        lines = [line for line in readFile(CSVPATH + month.strftime('%Y-%m') + '.rain') if line.strip()]
+        if lines:
+            f = lines[-1].split(',')
+            return datetime.datetime.strptime(f[0], '%d.%m.%Y').date(), float(f[1]), float(f[2]), float(f[3])
+    return None
+
+
+def mergeCSVLines(fileName, newLines):
+    """Merge newLines into the CSV file fileName in timestamp order. Existing lines win over new lines with the same timestamp."""
+    lines = readFile(fileName)
+    if not lines or csvLineTime(lines[-1]) < csvLineTime(newLines[0]):
+        f = open(fileName, 'a')
+        f.writelines(newLines)
+        f.close()
+        if DAILYINDEX:
+            dailyIndex.append(fileName, newLines)
+    else:
+        merged = {}
+        for line in newLines + [line for line in lines if line.strip()]:
+            merged[line[:19]] = line
+        f = open(fileName, 'w')
+        f.writelines(sorted(merged.values(), key=csvLineTime))
+        f.close()
+        if DAILYINDEX:
+            dailyIndex.rebuild(fileName)
+    flashBudget.spend()
+
+
+def backfillArchive():
+    """
+    Download the archive records logged by the console since the last line of the CSV file (DMPAFT)
+    and merge them into the monthly CSV and rainfall history files. The daily/monthly rain and ET totals
+    are carried forward from the last CSV line and rainfall entry. Returns the number of lines added.
+    """
+    if wx == None or not ARCHIVEBACKFILL:
+        return 0
+
+    # the last line may still be pending in csvWriter
+    csvWriter.flush()
+
+    last = lastCSVLine()
+    if last is None:
+        print(tStamp() + 'No CSV data found, skipping archive backfill.')
+        return 0
+
+    try:
+        lastTime = csvLineTime(last)
+        records = downloadArchive(lastTime)
+    except (WxError, serial.SerialException, OSError, ValueError) as e:
+        print(tStamp() + 'Archive backfill failed: %s' % e)
+        return 0
+
+    if not records:
+        print(tStamp() + 'No archive records to backfill since %s.' % last[:19])
+        return 0
+
+    fields = last.split(',')
+    dayRain, etDay, etMonth = float(fields[10]), float(fields[11]), float(fields[12])
+    monthRain = yearRain = dayRain
+    entry = lastRainEntry(lastTime)
+    if entry is not None and entry[0].year == lastTime.year:
+        if entry[0] == lastTime.date():
+            yearRain = entry[3] + max(dayRain - entry[1], 0)
+            monthRain = entry[2] + max(dayRain - entry[1], 0)
+        else:
+            yearRain = entry[3] + dayRain
+            if entry[0].month == lastTime.month:
+                monthRain = entry[2] + dayRain
+
+    csvLines = {}
+    rainEntries = {}
+    day = (lastTime - datetime.timedelta(minutes=1)).date()
+    lastLogged = lastTime
+    interval = datetime.timedelta(minutes=CSVINTERVAL)
+    for ts, r in records:
+        d = decodeArchiveRecord(r)
+        # a record covers the interval ending at its timestamp, 00:00 belongs to the day before
+        recordDay = (ts - datetime.timedelta(minutes=1)).date()
+        if recordDay != day:
+            if recordDay.year != day.year:
+                yearRain = 0.0
+            if recordDay.month != day.month:
+                monthRain = etMonth = 0.0
+            dayRain = etDay = 0.0
+            day = recordDay
+        if d is None:
+            continue
+
+        dayRain += d['RAIN_MM']
+        monthRain += d['RAIN_MM']
+        yearRain += d['RAIN_MM']
+        etDay += d['ET_MM']
+        etMonth += d['ET_MM']
+        rainEntries[day] = day.strftime('%d.%m.%Y') + ', ' + str(round(dayRain, 1)) + ', ' + str(round(monthRain, 1)) + ', ' + str(round(yearRain, 1)) + '\n'
+
+        if ts - lastLogged < interval:
+            continue
+        lastLogged = ts
+        d['DAYRAIN_MM'] = round(dayRain, 1)
+        d['ET_DAY_MM'] = round(etDay, 1)
+        d['ET_MONTH_MM'] = round(etMonth, 1)
+        csvLines.setdefault(ts.strftime('%Y-%m'), []).append(formatCSVLine(d))
+
+    count = 0
+    for yearMonth, newLines in sorted(csvLines.items()):
+        mergeCSVLines(CSVPATH + yearMonth + '-' + CSVFILESUFFIX, newLines)
+        count += len(newLines)
+
+    for yearMonth in sorted(set(day.strftime('%Y-%m') for day in rainEntries)):
+        monthFile = CSVPATH + yearMonth + '.rain'
+        entries = {}
+        for line in readFile(monthFile):
+            if line.strip():
+                entries[line[:10]] = line
+        for day, line in rainEntries.items():
+            if day.strftime('%Y-%m') == yearMonth:
+                entries[line[:10]] = line
+        updateRainFile(monthFile, list(entries.values()))
+        flashBudget.spend()
+
+    print(tStamp() + 'Archive backfill: %d record(s) downloaded, %d line(s) added to the CSV file(s).' % (len(records), count))
+    return count
+
+
+# ALT text of the forecast icons (FCICON), any other value shows wxIcon_99.png
+FCICONTEXT = {
+    2: 'Mostly cloudy',
+    3: 'Mostly cloudy, rain within 12 hours',
+    6: 'Partially cloudy',
+    7: 'Partially cloudy, rain within 12 hours',
+    8: 'Mostly clear',
+    18: 'Mostly cloudy, snow/slush wossible within 12 hours',
+    19: 'Mostly cloudy, rain or snow within 12 hours',
+    22: 'Partially cloudy, snow/slush possible within 12 hours',
+    23: 'Partially cloudy, rain or snow within 12 hours',
+    }
 
 
 def writeWxIconFile(fileName='wxIcon.html'):
     """Writes IMG SRC = weather ICON to fileName, including ALT text."""
     fc = wxDict['FCICON']
-    ft = 'N/A'
-    if fc == 2:
-        ft = 'Mostly cloudy'
-    elif fc == 3:
-        ft = 'Mostly cloudy, rain within 12 hours'
-    elif fc == 6:
-        ft = 'Partially cloudy'
-    elif fc == 7:
-        ft = 'Partially cloudy, rain within 12 hours'
-    elif fc == 8:
-        ft = 'Mostly clear'
-    elif fc == 18:
-        ft = 'Mostly cloudy, snow/slush wossible within 12 hours'
-    elif fc == 19:
-        ft = 'Mostly cloudy, rain or snow within 12 hours'
-    elif fc == 22:
-        ft = 'Partially cloudy, snow/slush possible within 12 hours'
-    elif fc == 23:
-        ft = 'Partially cloudy, rain or snow within 12 hours'
-    else:
+    ft = FCICONTEXT.get(fc)
+    if ft is None:
         fc = 99
+        ft = 'N/A'
     f = open(fileName, 'w')
     s = '<div class="forecastIcon">\n'
     s += '<a href="./index.shtml">\n'
@@ -2074,31 +3945,32 @@ def setWxTime():
         t = time.localtime()
         ts = struct.pack('<BBBBBB', t.tm_sec, t.tm_min, t.tm_hour, t.tm_mday, t.tm_mon, t.tm_year - 1900)
         ts = ts + struct.pack('>H', CRC(ts))
-        wx.reset_input_buffer()
+        wxFlushInput()
         wx.reset_output_buffer()
+        wxSession.ensureAwake()
         wxWrite('SETTIME')
-        time.sleep(WXDELAY * 3)
-        i = wx.in_waiting
-        if i != 1:
-            wx.reset_input_buffer()
+        wxSettle(3)
+        s = wxReadExact(1, 1.2)
+        if s != b'\x06':
+            wxFlushInput()
             wx.reset_output_buffer()
-            time.sleep(WXDELAY)
+            wxSettle()
             wxWrite('SETTIME')
-            time.sleep(WXDELAY * 3)
-            i = wx.in_waiting
-        s = wx.read(i)
+            wxSettle(3)
+            s = wxReadExact(1, 1.2)
         if len(s) > 0 and s[0] == 0x06:
             print(tStamp() + 'Console SETTIME, first ACK received.')
         else:
             print(tStamp() + f'Console SETTIME, first ACK NOT RECEIVED. Got: {s}')
         wxWrite(ts)
-        time.sleep(WXDELAY * 3)
-        i = wx.in_waiting
-        s = wx.read(i)
+        wxSettle(3)
+        s = wxReadExact(1, 1.2)
+        serialStats.done(len(s) > 0 and s[0] == 0x06)
         if len(s) > 0 and s[0] == 0x06:
             print(tStamp() + 'Console SETTIME, second ACK received. Console time set OK.')
         else:
             print(tStamp() + f'Console SETTIME, second ACK NOT RECEIVED. Console time NOT SET. Got: {s}')
+        wxClock.invalidate()
         return
 
 
@@ -2127,23 +3999,12 @@ def getPreviousRainMonth(thisMonth, thisYear):
 
 
 def prepareData(thisDay, thisMonth, thisYear):
-    """GNUPLOT SUPPORT."""
-    d = needPreviousMonth(thisDay, thisMonth, thisYear)
-    nowFile = CSVPATH + str(thisYear) + '-'
-    if thisMonth < 10:
-        nowFile += '0'
-    nowFile += str(thisMonth) + '-' + CSVFILESUFFIX
-    s = ''
-    if d == '':
-        s = CSVPATH + str(thisYear) + '-'
-        if thisMonth < 10:
-            s += '0'
-        s += str(thisMonth)
-        s += '-' + CSVFILESUFFIX
-        s = 'cp ' + s + ' ' + TMPPATH + 'plotdata.tmp'
-    else:
-        s = 'tail -n 144 ' + CSVPATH + d + '-' + CSVFILESUFFIX + ' > ' + TMPPATH + 'prevdata.tmp; cat ' + TMPPATH + 'prevdata.tmp ' + nowFile + ' > ' + TMPPATH + 'plotdata.tmp; rm ' + TMPPATH + 'prevdata.tmp'
-    os.system(s)
+    """GNUPLOT SUPPORT. Writes the CSV lines of the last 24 hours (see fromTime), including those pending in csvWriter."""
+    end = datetime.datetime.now()
+    f = open(TMPPATH + 'plotdata.tmp', 'w')
+    f.writelines(dataset.lines(end - datetime.timedelta(hours=24), end))
+    f.writelines(csvWriter.pendingLines(dataset.fileName('%d-%02d' % (thisYear, thisMonth))))
+    f.close()
 
 
 def prepareRainData(thisDay, thisMonth, thisYear):
@@ -2166,8 +4027,8 @@ def prepareRainData(thisDay, thisMonth, thisYear):
     os.system(s)
 
 
-def prepareTemperatureData(fromMonth, fromYear, toMonth, toYear):
-    """GNUPLOT SUPPORT."""
+def monthRange(fromMonth, fromYear, toMonth, toYear):
+    """Returns the months from fromMonth/fromYear to toMonth/toYear as 'yyyy-mm' strings."""
     theRange = []
     d1 = datetime.date(fromYear, fromMonth, 1)
     d2 = datetime.date(toYear, toMonth, 1) + relativedelta(day=31)
@@ -2178,222 +4039,286 @@ def prepareTemperatureData(fromMonth, fromYear, toMonth, toYear):
         theDate = theDate.replace(day=1)
 
     theRange.sort()
-    maxValue = {}
-    minValue = {}
-    iFile = None
-    for d in theRange:
-        try:
-            iFile = open(CSVPATH + d + '-wxdata.csv', 'r')
-            csvData = iFile.readlines()
-            for dataLine in csvData:
-                dataDate = dataLine.split(',')[0][0:10]
-                evalValue = float(dataLine.split(',')[1])
-                if dataDate not in list(maxValue.keys()):
-                    maxValue[dataDate] = evalValue
-                elif evalValue > maxValue[dataDate]:
-                    maxValue[dataDate] = evalValue
-                if dataDate not in list(minValue.keys()):
-                    minValue[dataDate] = evalValue
-                elif evalValue < minValue[dataDate]:
-                    minValue[dataDate] = evalValue
-
-            iFile.close()
-        except Exception as e:
-            pass
+    return theRange
 
-    theData = []
-    for date in list(minValue.keys()):
-        oLine = date[6:10] + '.' + date[3:5] + '.' + date[0:2] + ', ' + str(minValue[date]) + ', ' + str(maxValue[date]) + '\n'
-        theData.append(oLine)
-
-    maxValue = {}
-    minValue = {}
-    theData.sort()
-    oFile = open(TMPPATH + 'plotminmax.tmp', 'w')
-    oFile.writelines(theData[-365:])
-    oFile.close()
-    return
 
+class MonthCache:
+    """
+    Parsed monthly CSV files for the yearly plots: the timestamps and the numeric columns in COLUMNS.
+    A file is parsed again only if its mtime or size has changed, i.e. in practice only the current month.
+    The most recently used CSVCACHEMONTHS files are kept in memory, the months before the current one
+    also in CSVCACHEFILE (default TMPPATH/csvcache.dat) for the next run of the plot scripts: one line of
+    JSON (paths, keys, timestamps, bad lines) followed by the raw bytes of the column arrays. Nothing in it
+    is executed when it is read, TMPPATH may be world-writable.
+    """
 
-def prepareTemperatureAndSolarData(fromMonth, fromYear, toMonth, toYear):
-    """GNUPLOT SUPPORT."""
-    theRange = []
-    d1 = datetime.date(fromYear, fromMonth, 1)
-    d2 = datetime.date(toYear, toMonth, 1) + relativedelta(day=31)
-    theDate = d1
-    while theDate < d2:
-        theRange.append(theDate.strftime('%Y-%m'))
-        theDate = theDate + datetime.timedelta(days=31)
-        theDate = theDate.replace(day=1)
+    COLUMNS = (1, 5, 6, 7, 8)
+    VERSION = 4
 
-    theRange.sort()
-    maxSolar = {}
-    maxTemp = {}
-    iFile = None
-    for d in theRange:
+    def __init__(self):
+        # path -> ((mtime, size), timestamps, {column: array of values}, {column: lines without a number})
+        self.months = collections.OrderedDict()
+        self.loaded = False
+        self.changed = False
+
+    def fileName(self):
+        return CSVCACHEFILE or TMPPATH + 'csvcache.dat'
+
+    def load(self):
+        """Read the cache file once, a missing, unreadable or outdated file starts an empty cache."""
+        self.loaded = True
         try:
-            iFile = open(CSVPATH + d + '-wxdata.csv', 'r')
-            csvData = iFile.readlines()
-            for dataLine in csvData:
-                dataDate = dataLine.split(',')[0][0:10]
-                evalTemp = float(dataLine.split(',')[1])
-                evalSolar = float(dataLine.split(',')[8])
-                if dataDate not in list(maxSolar.keys()):
-                    maxSolar[dataDate] = evalSolar
-                elif evalSolar > maxSolar[dataDate]:
-                    maxSolar[dataDate] = evalSolar
-                if dataDate not in list(maxTemp.keys()):
-                    maxTemp[dataDate] = evalTemp
-                elif evalTemp > maxTemp[dataDate]:
-                    maxTemp[dataDate] = evalTemp
-
-            iFile.close()
-        except Exception as e:
+            with open(self.fileName(), 'rb') as f:
+                header = json.loads(f.readline())
+                data = f.read()
+            if header['version'] != self.VERSION or header['byteorder'] != sys.byteorder:
+                return
+            months = collections.OrderedDict()
+            offset = 0
+            for path, key, timestamps, bad in header['months']:
+                if not all(isinstance(t, str) for t in timestamps):
+                    raise ValueError('timestamps')
+                columns = {}
+                for c in self.COLUMNS:
+                    columns[c] = array.array('d')
+                    size = len(timestamps) * columns[c].itemsize
+                    if offset + size > len(data):
+                        raise ValueError('truncated')
+                    columns[c].frombytes(data[offset:offset + size])
+                    offset += size
+                bad = {c: [int(i) for i in bad[str(c)]] for c in self.COLUMNS}
+                months[str(path)] = ((int(key[0]), int(key[1])), timestamps, columns, bad)
+            self.months.update(months)
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
             pass
 
-    theData = []
-    for date in list(maxSolar.keys()):
-        oLine = date[6:10] + '.' + date[3:5] + '.' + date[0:2] + ', ' + str(maxTemp[date]) + ', ' + str(maxSolar[date]) + '\n'
-        theData.append(oLine)
-
-    maxTemp = {}
-    maxSolar = {}
-    theData.sort()
-    oFile = open(TMPPATH + 'plottempsolar.tmp', 'w')
-    oFile.writelines(theData[-365:])
-    oFile.close()
-    return
+    def closed(self, path):
+        """True for the file of a month before the current one (yyyy-mm-wxdata.csv), which does not change any more."""
+        return os.path.basename(path)[:7] < datetime.date.today().strftime('%Y-%m')
+
+    def save(self):
+        """Write the months before the current one to the cache file, if a new one was parsed and the FLASHBUDGET allows."""
+        if not self.changed or flashBudget.exhausted():
+            return
+        header = {'version': self.VERSION, 'byteorder': sys.byteorder, 'months': []}
+        blobs = []
+        for path, (key, timestamps, columns, bad) in self.months.items():
+            if self.closed(path):
+                header['months'].append([path, list(key), timestamps, {str(c): bad[c] for c in self.COLUMNS}])
+                blobs.extend(columns[c].tobytes() for c in self.COLUMNS)
+        try:
+            with open(self.fileName() + '.tmp', 'wb') as f:
+                f.write(json.dumps(header).encode('utf-8') + b'\n')
+                f.writelines(blobs)
+            os.replace(self.fileName() + '.tmp', self.fileName())
+            flashBudget.spend()
+            self.changed = False
+        except OSError as e:
+            print(tStamp() + 'Could not write CSV cache %s: %s' % (self.fileName(), e))
+
+    def parse(self, path):
+        """
+        Returns (timestamps, columns, bad) of the CSV file path, None if the file can not be read.
+        A line on which a column is not a number holds 0.0 there and its index is listed in bad[column].
+        """
+        try:
+            with open(path, 'r') as f:
+                lines = f.readlines()
+        except Exception as e:
+            return None
+        timestamps = []
+        columns = {c: array.array('d') for c in self.COLUMNS}
+        bad = {c: [] for c in self.COLUMNS}
+        for i, line in enumerate(lines):
+            fields = line.split(',')
+            timestamps.append(fields[0][0:19])
+            for c in self.COLUMNS:
+                try:
+                    value = float(fields[c])
+                except (IndexError, ValueError):
+                    value = 0.0
+                    bad[c].append(i)
+                columns[c].append(value)
+        return timestamps, columns, bad
+
+    def stop(self, parsed, *columns):
+        """Index of the first line of parsed on which one of columns is not a number (the plots stop reading there)."""
+        timestamps, values, bad = parsed
+        return min([bad[c][0] for c in columns if bad[c]] + [len(timestamps)])
+
+    def get(self, path):
+        """Returns (timestamps, columns, bad) of the CSV file path, from the cache if the file is unchanged."""
+        if not self.loaded:
+            self.load()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        entry = self.months.get(path)
+        if entry is None or entry[0] != key:
+            parsed = self.parse(path)
+            if parsed is None:
+                return None
+            entry = self.months[path] = (key, ) + parsed
+            self.changed = self.changed or self.closed(path)
+        self.months.move_to_end(path)
+        while len(self.months) > CSVCACHEMONTHS:
+            self.months.popitem(last=False)
+        return entry[1:]
+
+    def rows(self, path, *columns):
+        """Returns (timestamp, value, ...) of columns for every line of path, up to the first line where one of them is not a number."""
+        parsed = self.get(path)
+        if parsed is None:
+            return ()
+        return itertools.islice(zip(parsed[0], *(parsed[1][c] for c in columns)), self.stop(parsed, *columns))
+
+
+csvCache = MonthCache()
+
+
+# day record of aggregateCSV(): the daily values of a plot file (index into the record)
+DAILYPLOTS = {
+    'plotminmax.tmp': (0, 1),
+    'plottempsolar.tmp': (2, 3),
+    'plotsolar.tmp': (4, 5),
+    }
+YEARLYPLOTS = ('plotminmax.tmp', 'plottempsolar.tmp', 'plotsolar.tmp', 'plotannualwind.tmp')
 
 
-def prepareSolarData(fromMonth, fromYear, toMonth, toYear):
-    """GNUPLOT SUPPORT."""
-    theRange = []
-    d1 = datetime.date(fromYear, fromMonth, 1)
-    d2 = datetime.date(toYear, toMonth, 1) + relativedelta(day=31)
-    theDate = d1
-    while theDate < d2:
-        theRange.append(theDate.strftime('%Y-%m'))
-        theDate = theDate + datetime.timedelta(days=31)
-        theDate = theDate.replace(day=1)
+def aggregateCSV(months, outputs=YEARLYPLOTS):
+    """
+    One pass over the monthly CSV files of months ('yyyy-mm') for the yearly plots outputs. Returns (days, wind):
+    days maps 'dd.mm.yyyy' to [min temp, max temp, max temp, max solar, max UV, max solar] and wind maps the
+    timestamps to [direction, speed]. Every pair of values ends at the first line of a file without a number
+    in one of its columns (None if there was none on that day), as in the separate passes before.
+    """
+    days = {}
+    wind = {}
+    if not outputs:
+        return days, wind
+    for d in months:
+        parsed = csvCache.get(dataset.fileName(d))
+        if parsed is None:
+            continue
+        timestamps, columns, bad = parsed
+        temp, windDir, windSpd, uv, solar = (columns[c] for c in MonthCache.COLUMNS)
+        nMinMax = csvCache.stop(parsed, 1) if 'plotminmax.tmp' in outputs else 0
+        nTempSolar = csvCache.stop(parsed, 1, 8) if 'plottempsolar.tmp' in outputs else 0
+        nSolar = csvCache.stop(parsed, 7, 8) if 'plotsolar.tmp' in outputs else 0
+        nWind = csvCache.stop(parsed, 5, 6) if 'plotannualwind.tmp' in outputs else 0
+        for i in range(max(nMinMax, nTempSolar, nSolar, nWind)):
+            dataDateTime = timestamps[i]
+            dataDate = dataDateTime[0:10]
+            day = days.get(dataDate)
+            if day is None:
+                day = days[dataDate] = [None] * 6
+            if i < nMinMax:
+                t = temp[i]
+                if day[0] is None or t < day[0]:
+                    day[0] = t
+                if day[1] is None or t > day[1]:
+                    day[1] = t
+            if i < nTempSolar:
+                t = temp[i]
+                s = solar[i]
+                if day[2] is None or t > day[2]:
+                    day[2] = t
+                if day[3] is None or s > day[3]:
+                    day[3] = s
+            if i < nSolar:
+                u = uv[i]
+                s = solar[i]
+                if day[4] is None or u > day[4]:
+                    day[4] = u
+                if day[5] is None or s > day[5]:
+                    day[5] = s
+            if i < nWind:
+                wind[dataDateTime] = [windDir[i], windSpd[i]]
+    csvCache.save()
+    return days, wind
+
+
+def indexedPlotDays(months):
+    """Returns the days of the DAILYPLOTS like aggregateCSV(), from the daily index (dailyIndex) of months."""
+    days = {}
+    for date, day in dailyIndex.days(months).items():
+        temp = day[DailyIndex.FIELD['OUTTEMP_C']]
+        uv = day[DailyIndex.FIELD['UVINDEX']]
+        solar = day[DailyIndex.FIELD['SOLAR_W']]
+        days[date] = [temp[0], temp[1], temp[1] if solar[3] else None, solar[1] if temp[3] else None,
+                      uv[1] if solar[3] else None, solar[1] if uv[3] else None]
+    return days
+
+
+def writeYearlyPlots(days, wind, baro, outputs):
+    """Writes the plot input files outputs (in TMPPATH) from the result of aggregateCSV() and the barometer series baro."""
+    for name in outputs:
+        if name in DAILYPLOTS:
+            a, b = DAILYPLOTS[name]
+            theData = [date[6:10] + '.' + date[3:5] + '.' + date[0:2] + ', ' + str(values[a]) + ', ' + str(values[b]) + '\n'
+                       for date, values in days.items() if values[a] is not None]
+        elif name == 'plotannualwind.tmp':
+            theData = [dateTime[6:10] + '.' + dateTime[3:5] + '.' + dateTime[0:2] + ' ' + dateTime[11:20] + ', ' + str(values[0]) + ', ' + str(values[1]) + '\n'
+                       for dateTime, values in wind.items()]
+        else:
+            theData = [dateTime[6:10] + '.' + dateTime[3:5] + '.' + dateTime[0:2] + ' ' + dateTime[11:20] + ', ' + str(value) + '\n'
+                       for dateTime, value in baro.items()]
+        theData.sort()
+        if name != 'barodata.tmp':
+            theData = theData[-365:]
+        oFile = open(TMPPATH + name, 'w')
+        oFile.writelines(theData)
+        oFile.close()
 
-    theRange.sort()
-    maxSolar = {}
-    maxUV = {}
-    iFile = None
-    for d in theRange:
-        try:
-            iFile = open(CSVPATH + d + '-wxdata.csv', 'r')
-            csvData = iFile.readlines()
-            for dataLine in csvData:
-                dataDate = dataLine.split(',')[0][0:10]
-                evalUV = float(dataLine.split(',')[7])
-                evalSolar = float(dataLine.split(',')[8])
-                if dataDate not in list(maxSolar.keys()):
-                    maxSolar[dataDate] = evalSolar
-                elif evalSolar > maxSolar[dataDate]:
-                    maxSolar[dataDate] = evalSolar
-                if dataDate not in list(maxUV.keys()):
-                    maxUV[dataDate] = evalUV
-                elif evalUV > maxUV[dataDate]:
-                    maxUV[dataDate] = evalUV
-
-            iFile.close()
-        except Exception as e:
-            pass
 
-    theData = []
-    for date in list(maxSolar.keys()):
-        oLine = date[6:10] + '.' + date[3:5] + '.' + date[0:2] + ', ' + str(maxUV[date]) + ', ' + str(maxSolar[date]) + '\n'
-        theData.append(oLine)
-
-    maxUV = {}
-    maxSolar = {}
-    theData.sort()
-    oFile = open(TMPPATH + 'plotsolar.tmp', 'w')
-    oFile.writelines(theData[-365:])
-    oFile.close()
+def prepareYearlyData(fromMonth, fromYear, toMonth, toYear, outputs=YEARLYPLOTS, baroRange=None):
+    """
+    GNUPLOT AND PYTHON-MATLIBPLOT SUPPORT. Writes the yearly plot input files outputs with one pass over the CSV files,
+    and barodata.tmp for the datetime range baroRange (start, end). With DAILYINDEX the DAILYPLOTS are read from the daily index.
+    """
+    theRange = monthRange(fromMonth, fromYear, toMonth, toYear)
+    if DAILYINDEX:
+        fromCSV = [name for name in outputs if name not in DAILYPLOTS]
+    else:
+        fromCSV = outputs
+    days, wind = aggregateCSV(theRange, fromCSV)
+    if len(fromCSV) < len(outputs):
+        days = indexedPlotDays(theRange)
+    baro = {}
+    if baroRange is not None:
+        baro = dict(dataset.records(baroRange[0], baroRange[1], 4))
+        outputs = tuple(outputs) + ('barodata.tmp', )
+    writeYearlyPlots(days, wind, baro, outputs)
     return
 
 
-def prepareAnnualWindData(fromMonth, fromYear, toMonth, toYear):
-    """PYTHON-MATLIBPLOT SUPPORT."""
-    theRange = []
-    d1 = datetime.date(fromYear, fromMonth, 1)
-    d2 = datetime.date(toYear, toMonth, 1) + relativedelta(day=31)
-    theDate = d1
-    while theDate < d2:
-        theRange.append(theDate.strftime('%Y-%m'))
-        theDate = theDate + datetime.timedelta(days=31)
-        theDate = theDate.replace(day=1)
+def prepareTemperatureData(fromMonth, fromYear, toMonth, toYear):
+    """GNUPLOT SUPPORT."""
+    prepareYearlyData(fromMonth, fromYear, toMonth, toYear, ('plotminmax.tmp', ))
 
-    theRange.sort()
-    windData = {}
-    iFile = None
-    for d in theRange:
-        try:
-            iFile = open(CSVPATH + d + '-wxdata.csv', 'r')
-            csvData = iFile.readlines()
-            for dataLine in csvData:
-                dataDateTime = dataLine.split(',')[0][0:19]
-                windDir = float(dataLine.split(',')[5])
-                windSpd = float(dataLine.split(',')[6])
-                windData[dataDateTime] = [
-                 windDir, windSpd]
-
-            iFile.close()
-        except Exception as e:
-            pass
 
-    theData = []
-    for dateTime in list(windData.keys()):
-        oLine = dateTime[6:10] + '.' + dateTime[3:5] + '.' + dateTime[0:2] + ' ' + dateTime[11:20] + ', ' + str(windData[dateTime][0]) + ', ' + str(windData[dateTime][1]) + '\n'
-        theData.append(oLine)
+def prepareTemperatureAndSolarData(fromMonth, fromYear, toMonth, toYear):
+    """GNUPLOT SUPPORT."""
+    prepareYearlyData(fromMonth, fromYear, toMonth, toYear, ('plottempsolar.tmp', ))
+
 
-    windData = {}
-    theData.sort()
-    oFile = open(TMPPATH + 'plotannualwind.tmp', 'w')
-    oFile.writelines(theData[-365:])
-    oFile.close()
-    return
+def prepareSolarData(fromMonth, fromYear, toMonth, toYear):
+    """GNUPLOT SUPPORT."""
+    prepareYearlyData(fromMonth, fromYear, toMonth, toYear, ('plotsolar.tmp', ))
+
+
+def prepareAnnualWindData(fromMonth, fromYear, toMonth, toYear):
+    """PYTHON-MATLIBPLOT SUPPORT."""
+    prepareYearlyData(fromMonth, fromYear, toMonth, toYear, ('plotannualwind.tmp', ))
 
 
 def prepareBaroData(fromDay, fromMonth, fromYear, toDay, toMonth, toYear):
     """GNUPLOT SUPPORT."""
-    theRange = []
     d1 = datetime.datetime(fromYear, fromMonth, fromDay, 0, 0, 0)
     d2 = datetime.datetime(toYear, toMonth, toDay, 23, 59, 59)
-    theDate = d1
-    while theDate < d2:
-        theRange.append(theDate.strftime('%Y-%m-%d'))
-        theDate = theDate + datetime.timedelta(days=1)
-
-    theRange.sort()
-    baroData = {}
-    iFile = None
-    for d in theRange:
-        try:
-            iFile = open(CSVPATH + d[0:7] + '-wxdata.csv', 'r')
-            csvData = iFile.readlines()
-            for dataLine in csvData:
-                dataDateTime = dataLine.split(',')[0][0:19]
-                if dataDateTime[0:10] == d[8:10] + '.' + d[5:7] + '.' + d[0:4]:
-                    baroData[dataDateTime] = float(dataLine.split(',')[4])
-
-            iFile.close()
-        except Exception as e:
-            pass
-
-    theData = []
-    for dateTime in list(baroData.keys()):
-        oLine = dateTime[6:10] + '.' + dateTime[3:5] + '.' + dateTime[0:2] + ' ' + dateTime[11:20] + ', ' + str(baroData[dateTime]) + '\n'
-        theData.append(oLine)
-
-    baroData = {}
-    theData.sort()
-    oFile = open(TMPPATH + 'barodata.tmp', 'w')
-    oFile.writelines(theData)
-    oFile.close()
-    return
+    prepareYearlyData(fromMonth, fromYear, toMonth, toYear, (), (d1, d2))
 
 
 def runGnuplot(GPC, TMP, unlink_tmp=True):
@@ -2462,6 +4387,29 @@ def plotBaroWeek():
     runGnuplot(TMPPATH + 'plotBaroWeek.gpc', TMPPATH + 'barodata.tmp')
 
 
+def yearlyPlots(names):
+    """
+    wospi.py --yearly-plots minmax|solar|tempsolar|annualwind ...: Prepares the input files of the named yearly plots
+    for the last twelve months in one pass over the CSV files, then plots and transfers them one by one.
+    """
+    jobs = {'minmax': ('plotminmax.tmp', plotMinMaxTemp, PLOTMINMAXTEMP, SCPCOMMAND_PLOTMINMAXTEMP),
+            'solar': ('plotsolar.tmp', plotSolar, PLOTSOLAR, SCPCOMMAND_PLOTSOLAR),
+            'tempsolar': ('plottempsolar.tmp', plotTempSolar, PLOTTEMPSOLAR, SCPCOMMAND_PLOTTEMPSOLAR),
+            'annualwind': ('plotannualwind.tmp', plotAnnualWind, PLOTANNUALWIND, SCPCOMMAND_PLOTANNUALWIND)}
+    names = [name for name in names if name in jobs]
+    if len(names) == 0:
+        print(tStamp() + 'No yearly plots given, choose from: ' + ', '.join(jobs))
+        return
+    today = datetime.date.today()
+    prepareYearlyData(today.month, today.year - 1, today.month, today.year, tuple(jobs[name][0] for name in names))
+    for name in names:
+        output, plot, plotFile, scpCommand = jobs[name]
+        plot()
+        print(tStamp() + 'Initiating SCP file transfer of ' + plotFile + '...')
+        os.system(scpCommand)
+        os.system('rm ' + plotFile)
+
+
 def sunTimes():
     """GNUPLOT SUPPORT."""
     try:
@@ -2622,35 +4570,13 @@ def plotData():
     runGnuplot(TMPPATH + 'plotRainPerMonth.gpc', TMPPATH + 'dummy.tmp')
 
 
+# upper wind speed limits (knots) of Beaufort 0..11, anything above is 12
+BEAUFORTLIMITS = (0, 3, 6, 10, 16, 21, 27, 33, 40, 47, 55, 63)
+
+
 def getBeaufortIndex(windSpeedKTS):
     """Helper function for the getBeaufort function. Returns dictionary index [0,12] for windSpeedKTS."""
-    w = windSpeedKTS
-    if w <= 0:
-        return 0
-    if w <= 3:
-        return 1
-    if w <= 6:
-        return 2
-    if w <= 10:
-        return 3
-    if w <= 16:
-        return 4
-    if w <= 21:
-        return 5
-    if w <= 27:
-        return 6
-    if w <= 33:
-        return 7
-    if w <= 40:
-        return 8
-    if w <= 47:
-        return 9
-    if w <= 55:
-        return 10
-    if w <= 63:
-        return 11
-    if w > 63:
-        return 12
+    return bisect.bisect_left(BEAUFORTLIMITS, windSpeedKTS)
 
 
 def getBeaufort(windSpeedKTS):
@@ -2658,71 +4584,36 @@ def getBeaufort(windSpeedKTS):
     return beaufortText[getBeaufortIndex(windSpeedKTS)]
 
 
+# lower limits (degrees) of the cardinal directions NNE..NNW and the northern half of N
+CARDINALLIMITS = (11.25, 33.75, 56.25, 78.75, 101.25, 123.75, 146.25, 168.75,
+                  191.25, 213.75, 236.25, 258.75, 281.25, 303.75, 326.25, 348.75)
+CARDINALNAMES = ('N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE',
+                 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW', 'N')
+
+
 def getCardinalDirection(direction):
     """Returns cardinal wind direction."""
-    s = '-'
-    if direction >= 0 and direction < 11.25:
-        s = 'N'
-    elif direction >= 11.25 and direction < 33.75:
-        s = 'NNE'
-    elif direction >= 33.75 and direction < 56.25:
-        s = 'NE'
-    elif direction >= 56.25 and direction < 78.75:
-        s = 'ENE'
-    elif direction >= 78.75 and direction < 101.25:
-        s = 'E'
-    elif direction >= 101.25 and direction < 123.75:
-        s = 'ESE'
-    elif direction >= 123.75 and direction < 146.25:
-        s = 'SE'
-    elif direction >= 146.25 and direction < 168.75:
-        s = 'SSE'
-    elif direction >= 168.75 and direction < 191.25:
-        s = 'S'
-    elif direction >= 191.25 and direction < 213.75:
-        s = 'SSW'
-    elif direction >= 213.75 and direction < 236.25:
-        s = 'SW'
-    elif direction >= 236.25 and direction < 258.75:
-        s = 'WSW'
-    elif direction >= 258.75 and direction < 281.25:
-        s = 'W'
-    elif direction >= 281.25 and direction < 303.75:
-        s = 'WNW'
-    elif direction >= 303.75 and direction < 326.25:
-        s = 'NW'
-    elif direction >= 326.25 and direction < 348.75:
-        s = 'NNW'
-    elif direction >= 348.75 and direction <= 360:
-        s = 'N'
-    return s
+    if direction < 0 or direction > 360:
+        return '-'
+    return CARDINALNAMES[bisect.bisect_right(CARDINALLIMITS, direction)]
+
+
+DAVISTYPES = {
+    17: 'Vantage Vue',
+    16: 'Vantage Pro/Vantage Pro2',
+    6: 'Health Enviromonitor',
+    5: 'Energy Enviromonitor',
+    4: 'GroWeather',
+    3: 'Perception',
+    2: 'Monitor',
+    1: 'Wizard II',
+    0: 'Wizard III',
+    }
 
 
 def getDavisType(stationType):
     """Returns textual description of Davis console model number as provided in numeric value stationType."""
-    s = stationType
-    u = ''
-    if s == 17:
-        u = 'Vantage Vue'
-    elif s == 16:
-        u = 'Vantage Pro/Vantage Pro2'
-    elif s == 6:
-        u = 'Health Enviromonitor'
-    elif s == 5:
-        u = 'Energy Enviromonitor'
-    elif s == 4:
-        u = 'GroWeather'
-    elif s == 3:
-        u = 'Perception'
-    elif s == 2:
-        u = 'Monitor'
-    elif s == 1:
-        u = 'Wizard II'
-    elif s == 0:
-        u = 'Wizard III'
-    else:
-        u = 'Unknown'
-    return u + ' (%d)' % stationType
+    return DAVISTYPES.get(stationType, 'Unknown') + ' (%d)' % stationType
 
 
 def updateWUnderground():
@@ -2960,8 +4851,17 @@ def updateWeatherCloud():
 
 
 if __name__ == '__main__':
+    if '--rebuild-index' in sys.argv[1:]:
+        rebuildDailyIndex()
+        sys.exit(0)
+    if '--yearly-plots' in sys.argv[1:]:
+        yearlyPlots(sys.argv[sys.argv.index('--yearly-plots') + 1:])
+        sys.exit(0)
     writeVersion()
     socket.setdefaulttimeout(10)
+    # kill -USR1 <pid> writes the serial I/O statistics to TMPPATH/serialstats.txt
+    signal.signal(signal.SIGUSR1, requestSerialStats)
+    signal.signal(signal.SIGTERM, requestShutdown)
     print('==============================================================================')
     print('STARTING ' + PROGRAMNAME + ' by Torkel M. Jodalen <tmj@bitwrap.no>')
     if LPS:
@@ -2989,20 +4889,25 @@ if __name__ == '__main__':
     cnt = 0
     intervalCSV = datetime.timedelta(minutes=CSVINTERVAL)
     prevCSV = datetime.datetime.now() - intervalCSV
-    wx = openWxComm()
+    try:
+        wx = openWxComm()
+    except WxError as e:
+        print(tStamp() + 'Could not connect to the console (%s), retrying in the next cycle.' % e.value)
+        wx = None
     try:
         wxWrite('ID')
-        time.sleep(WXDELAY)
-        idStr = wxRead().strip()
+        wxSettle()
+        idStr = wxReadUntil(b'\n\r', 1.2, idle=WXDELAY).decode('ascii', errors='replace').strip()
+        serialStats.done(bool(idStr))
         if not idStr:
             idStr = 'Not available'
         wrdStr = 'WRD' + chr(18) + chr(77)
         wxWrite(wrdStr)
-        time.sleep(WXDELAY)
-        wrdBytes = wx.in_waiting
-        wrdResponse = b''
+        wxSettle()
+        wrdResponse = wxReadExact(2, 1.2)
+        wrdBytes = len(wrdResponse)
+        serialStats.done(wrdBytes >= 2)
         if wrdBytes >= 2:
-            wrdResponse = wx.read(2)
             if wrdResponse[0] == 0x06:
                 stationType = wrdResponse[1]
                 wxDict['STATIONMODEL'] = getDavisType(stationType) + ' ID: ' + idStr
@@ -3014,6 +4919,7 @@ if __name__ == '__main__':
             print(tStamp() + 'Ignoring %d WRD bytes received from the console.' % wrdBytes)
             wxDict['STATIONMODEL'] = 'Unknown.'
         setWxTime()
+        backfillArchive()
     except Exception as e:
         if hasattr(e, 'value'):
             errMsg = str(sys.exc_info()[0]) + ' / ' + str(e.value)
@@ -3026,6 +4932,10 @@ if __name__ == '__main__':
     wxDict['FREEZE'] = None
     import wxshared
     while True:
+        if shutdownRequested:
+            shutdown()
+        if serialStatsRequested:
+            writeSerialStats()
         try:
             wxDict['DATAERROR'] = False
             wxDict['COMMISSIONDATE'] = COMMISSIONDATE
@@ -3037,8 +4947,6 @@ if __name__ == '__main__':
                 if wxDict['BATTERYSTATUS'] != 0:
                     print(tStamp() + 'THE ISS BATTERY SHOULD BE REPLACED NOW !')
                     writeBatteryLog(BATTERYLOGFILE)
-                if cnt % 2880 == 0:
-                    setWxTime()
                 if datetime.datetime.now() - prevCSV >= intervalCSV and wxDict['DATAERROR'] == False:
                     prevCSV = datetime.datetime.now()
                     writeWxDataAsCSV(CSVPATH + lastWxYearMonth + '-' + CSVFILESUFFIX)
@@ -3174,7 +5082,12 @@ if __name__ == '__main__':
             wx = None
             time.sleep(0.3)
 
-        time.sleep(30)
+        if LOOPSTREAM and wx != None:
+            streamWxData(30)
+        elif WXASYNC and wx != None:
+            runAsync(pollWxData(30))
+        else:
+            pause(30)
         os.system('clear')
         timeDelta = datetime.datetime.now() - upSince
         deltaDays = timeDelta.days // 1
@@ -3190,13 +5103,20 @@ if __name__ == '__main__':
         if cnt >= REBOOTINTERVAL:
             print(tStamp() + 'Now rebooting.')
             cnt = 0
-            wx.close()
+            if wx != None:
+                wx.close()
             os.system(REBOOTCOMMAND)
         if wx == None:
-            wx = openWxComm()
             try:
-                setWxTime()
-            except Exception as e:
-                print(tStamp() + 'This message should never be displayed.')
+                wx = openWxComm()
+            except WxError as e:
+                print(tStamp() + 'Could not connect to the console (%s), retrying in the next cycle.' % e.value)
+                wx = None
+            if wx != None:
+                try:
+                    setWxTime()
+                    backfillArchive()
+                except Exception as e:
+                    print(tStamp() + 'This message should never be displayed.')
 
     wx.close()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# Micro benchmarks for the WOSPi packet decoders
+#
+# Uses the packets of the console emulator (wxemu.py), no console required.
+# The acquire benchmark runs readWxData() against wxemu.py on a pty, with and without faults.
+#
+#   python3 wxbench.py                    # run all benchmarks
+#   python3 wxbench.py --number 20000 loop
+#   python3 wxbench.py --cycles 200 acquire
+import io
+import os
+import sys
+import time
+import struct
+import datetime
+import timeit
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+import wospi
+import wxemu
+
+
+def perField(schema, payload, start=2):
+    """Decode all schema fields with one struct.unpack_from() call each (the previous decoders)."""
+    s = payload[start:]
+    return {name: struct.unpack_from(code, s, offset)[0]
+            for name, offset, code, scale, unit, sentinel in schema.fields}
+
+
+def benchLoop(number):
+    """LOOP/LOOP2 field extraction: per-field unpack_from vs. compiled schema, and the full decoders."""
+    loop1 = wxemu.packLoop1(0)
+    loop2 = wxemu.packLoop2(0)
+    wospi.wxDict.clear()
+    return [
+        ('LOOP1 per-field unpack_from', lambda: perField(wospi.LOOP1SCHEMA, loop1)),
+        ('LOOP1 schema unpack', lambda: wospi.LOOP1SCHEMA.unpack(loop1, 2)),
+        ('LOOP2 per-field unpack_from', lambda: perField(wospi.LOOP2SCHEMA, loop2)),
+        ('LOOP2 schema unpack', lambda: wospi.LOOP2SCHEMA.unpack(loop2, 2)),
+        ('decodeLoop1 + decodeLoop2', lambda: (wospi.decodeLoop1(loop1), wospi.decodeLoop2(loop2))),
+        ]
+
+
+def benchHiLows(number):
+    """HILOWS field extraction: per-field unpack_from vs. compiled schema, and the full decoder."""
+    t = b'\x06' + wxemu.packHiLows()
+    wospi.wxDict.update(OUTTEMP_C=10.0, DAYRAIN_MM=0.0, OUTHUM_P=50)
+    return [
+        ('HILOWS per-field unpack_from', lambda: perField(wospi.HILOWSSCHEMA, t, 1)),
+        ('HILOWS schema unpack', lambda: wospi.HILOWSSCHEMA.unpack(t, 1)),
+        ('decodeHiLows', lambda: wospi.decodeHiLows(t)),
+        ]
+
+
+def benchLookup(number):
+    """Text lookups of one LOOP + LOOP2 cycle (5 Beaufort, 2 cardinal, forecast rule and icon), worst case values."""
+    def cycle():
+        for kts in (70.0, 64.2, 55.1, 48.0, 70.0):
+            wospi.getBeaufortIndex(kts)
+        wospi.getCardinalDirection(350)
+        wospi.getCardinalDirection(349)
+        wospi.FCRULETEXT[196]
+        wospi.FCICONTEXT.get(23)
+    loop1 = bytearray(wxemu.packLoop1(0))
+    loop1[90] = 196
+    return [
+        ('lookups per cycle', cycle),
+        ('decodeLoop1, forecast rule 196', lambda: wospi.decodeLoop1(loop1)),
+        ]
+
+
+def benchCRC(number):
+    """CRC of a LOOP packet and of a DMPAFT page: Python table vs. binascii.crc_hqx."""
+    loop1 = memoryview(wxemu.packLoop1(0))
+    page = memoryview(bytes(range(256)) + bytes(11))
+    return [
+        ('LOOP (99 bytes) table', lambda: wospi.crcTable(loop1)),
+        ('LOOP (99 bytes) CRC', lambda: wospi.CRC(loop1)),
+        ('DMPAFT page (267 bytes) table', lambda: wospi.crcTable(page)),
+        ('DMPAFT page (267 bytes) CRC', lambda: wospi.CRC(page)),
+        ]
+
+
+def benchUnits(number):
+    """One LOOP + LOOP2 cycle with the derived units (DERIVEDUNITS) left lazy, and with all of them read."""
+    loop1 = wxemu.packLoop1(0)
+    loop2 = wxemu.packLoop2(0)
+    derived = [key for key in wospi.OBSERVATIONKEYS if wospi.slotName(key) in wospi.Observation.DERIVED]
+
+    def readAll():
+        wospi.decodeLoop1(loop1)
+        wospi.decodeLoop2(loop2)
+        for key in derived:
+            wospi.wxDict[key]
+    wospi.wxDict.clear()
+    return [
+        ('decode, derived units not read', lambda: (wospi.decodeLoop1(loop1), wospi.decodeLoop2(loop2))),
+        ('decode, all %d derived units read' % len(derived), readAll),
+        ('snapshot (wxDict.copy)', wospi.wxDict.copy),
+        ]
+
+
+def checkArchiveBatch(archive):
+    """Raise WxError unless decodeArchiveBatch() and decodeArchiveRecord() agree on the rain of every record in archive."""
+    batch = wospi.decodeArchiveBatch(archive)
+    for i in range(len(archive) // 52):
+        d = wospi.decodeArchiveRecord(archive[i * 52:i * 52 + 52])
+        if abs(batch['RAIN_MM'][i] - d['RAIN_MM']) > 1e-9 or batch['RAINRATE_MMHR'][i] != d['RAINRATE_MMHR']:
+            raise wospi.WxError('Archive record %d: batch RAIN_MM %s, RAINRATE_MMHR %s, scalar %s, %s'
+                                % (i, batch['RAIN_MM'][i], batch['RAINRATE_MMHR'][i], d['RAIN_MM'], d['RAINRATE_MMHR']))
+
+
+def benchBatch(number):
+    """
+    1000 recorded LOOP packets: CRC check and schema unpack per packet vs. the NumPy batch decoder,
+    1000 archive records (0.2 mm collector, type bits set): decodeArchiveRecord() vs. decodeArchiveBatch().
+    """
+    loop1 = b''.join(wxemu.packLoop1(t) for t in range(1000))
+    start = datetime.datetime(2025, 1, 1)
+    archive = b''.join(wxemu.packArchive(start + datetime.timedelta(minutes=10 * t), t) for t in range(1000))
+
+    def scalar():
+        for i in range(0, len(loop1), 99):
+            packet = loop1[i:i + 99]
+            if wospi.CRC(packet) == 0:
+                wospi.LOOP1SCHEMA.unpack(packet, 2)
+    try:
+        wospi.numpyModule()
+    except wospi.WxError as e:
+        print('  skipped: %s' % e.value)
+        return []
+    checkArchiveBatch(archive)
+    return [
+        ('1000 x LOOP1 CRC + schema unpack', scalar),
+        ('1000 x LOOP1 decodeDumps', lambda: wospi.decodeDumps(loop1, 'LOOP1')),
+        ('1000 x decodeArchiveRecord', lambda: [wospi.decodeArchiveRecord(archive[i:i + 52]) for i in range(0, len(archive), 52)]),
+        ('1000 x decodeArchiveBatch', lambda: wospi.decodeArchiveBatch(archive)),
+        ]
+
+
+# emulator scenarios of the acquire benchmark: label, wxemu.py options
+ACQUIRESCENARIOS = (
+    ('no faults', []),
+    ('latency 20 ms + jitter 10 ms', ['--latency', '0.02', '--jitter', '0.01']),
+    ('5% dropped bytes', ['--drop', '0.05']),
+    ('5% corrupted packets', ['--corrupt', '0.05']),
+    )
+
+
+def acquire(cycles, emuArgs):
+    """Run cycles readWxData() calls against wxemu.py (started with emuArgs) on a pty, returns (seconds, good cycles)."""
+    link = os.path.join(tempfile.mkdtemp(), 'tty')
+    emu = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wxemu.py'),
+                            '--link', link, '--interval', '0.2', '--frozen'] + emuArgs, stdout=subprocess.PIPE, text=True)
+    try:
+        # the emulator prints one line once the pty is ready
+        emu.stdout.readline()
+        wospi.WXHOST = ''
+        wospi.WXPORT = link
+        wospi.serialStats = wospi.SerialStats()
+        wospi.wxLatency.clear()
+        good = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            wospi.wx = wospi.openWxComm()
+            t0 = time.monotonic()
+            for i in range(cycles):
+                if wospi.readWxData() == 100 and wospi.wxDict['CRC-CALC'] == 0:
+                    good += 1
+            seconds = time.monotonic() - t0
+        return seconds, good
+    finally:
+        if wospi.wx is not None:
+            wospi.wx.close()
+            wospi.wx = None
+        emu.terminate()
+        emu.wait()
+        os.unlink(link)
+        os.rmdir(os.path.dirname(link))
+
+
+def benchAcquire(cycles):
+    """Acquisition throughput and retries of readWxData() (request_packet) over a pty, for the ACQUIRESCENARIOS."""
+    for label, emuArgs in ACQUIRESCENARIOS:
+        seconds, good = acquire(cycles, emuArgs)
+        stats = wospi.serialStats.commands.values()
+        print('  %-36s %7.1f cycles/s  ok %d/%d  retries %d  failures %d  CRC errors %d' % (
+            label, cycles / seconds, good, cycles, sum(c.retries for c in stats),
+            sum(c.failures for c in stats), sum(c.crcErrors for c in stats)))
+    return []
+
+
+BENCHMARKS = {
+    'loop': benchLoop,
+    'hilows': benchHiLows,
+    'lookup': benchLookup,
+    'crc': benchCRC,
+    'units': benchUnits,
+    'batch': benchBatch,
+    'acquire': benchAcquire,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro benchmarks for the WOSPi packet decoders.')
+    parser.add_argument('--number', type=int, default=10000, help='calls per measurement')
+    parser.add_argument('--repeat', type=int, default=5, help='measurements, the best one is reported')
+    parser.add_argument('--cycles', type=int, default=50, help='readWxData() cycles per scenario of the acquire benchmark')
+    parser.add_argument('names', nargs='*', help='benchmarks to run (default: all of %s)' % ', '.join(BENCHMARKS))
+    args = parser.parse_args()
+
+    for name in args.names or BENCHMARKS:
+        print('%s:' % name)
+        for label, func in BENCHMARKS[name](args.cycles if name == 'acquire' else args.number):
+            # the decoders print range warnings, keep them out of the results
+            with contextlib.redirect_stdout(io.StringIO()):
+                best = min(timeit.repeat(func, number=args.number, repeat=args.repeat))
+            print('  %-36s %8.2f us' % (label, best / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
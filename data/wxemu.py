@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+# Davis Vantage console emulator for WOSPi
+#
+# Serves the Davis serial command set on a pseudo-terminal (or on a TCP port,
+# like a WeatherLink IP), so wospi.py can be exercised and benchmarked without a console.
+#
+#   python3 wxemu.py                      # prints the pty device to use as WXPORT
+#   python3 wxemu.py --latency 0.05 --jitter 0.02 --drop 0.01 --corrupt 0.01
+#   python3 wxemu.py --tcp 22222          # serves WXHOST = 'localhost'
+import os
+import sys
+import time
+import random
+import select
+import socket
+import struct
+import binascii
+import argparse
+import datetime
+import tty
+
+ACK = b'\x06'
+NAK = b'\x21'
+CANCEL = b'\x18'
+LFCR = b'\n\r'
+
+BARDATA = (b'BAR 29775\n\rELEVATION 27\n\rDEW POINT 56\n\rVIRTUAL TEMP 92\n\r'
+           b'C 29\n\rR 1001\n\rBARCAL 0\n\rGAIN 1533\n\rOFFSET 18110\n\r')
+
+
+def tStamp():
+    """Returns timestamp string (LOCAL TIME)."""
+    return datetime.datetime.now().ctime() + ' LT: '
+
+
+def CRC(data):
+    """CCITT-16 CRC as used by the Davis console."""
+    return binascii.crc_hqx(bytes(data), 0)
+
+
+def withCRC(data):
+    """Append the big-endian CRC to data."""
+    return bytes(data) + struct.pack('>H', CRC(data))
+
+
+def packLoop1(t):
+    """Build a 99-byte LOOP packet for time offset t (seconds since start)."""
+    p = bytearray(97)
+    p[0:3] = b'LOO'
+    p[3] = 0                                           # bar trend
+    p[4] = 0                                           # packet type: LOOP
+    struct.pack_into('<H', p, 7, 29920 + int(t) % 50)  # barometer, inHg/1000
+    struct.pack_into('<H', p, 9, 712)                  # inside temp, F/10
+    p[11] = 41                                         # inside humidity
+    struct.pack_into('<H', p, 12, 543 + int(t) % 7)    # outside temp, F/10
+    p[14] = 7                                          # wind speed, mph
+    p[15] = 5                                          # 10 min avg wind, mph
+    struct.pack_into('<H', p, 16, 225)                 # wind direction
+    p[33] = 82                                         # outside humidity
+    struct.pack_into('<H', p, 41, 3)                   # rain rate, clicks/h
+    p[43] = 12                                         # UV index/10
+    struct.pack_into('<H', p, 44, 345)                 # solar radiation
+    struct.pack_into('<H', p, 46, 11)                  # storm rain
+    struct.pack_into('<H', p, 48, (5 << 12) | (17 << 7) | 24)  # storm start
+    struct.pack_into('<H', p, 50, 4)                   # day rain
+    struct.pack_into('<H', p, 52, 77)                  # month rain
+    struct.pack_into('<H', p, 54, 1234)                # year rain
+    struct.pack_into('<H', p, 56, 12)                  # day ET
+    struct.pack_into('<H', p, 58, 140)                 # month ET
+    struct.pack_into('<H', p, 60, 1900)                # year ET
+    p[86] = 0                                          # transmitter battery
+    struct.pack_into('<H', p, 87, 780)                 # console voltage
+    p[89] = 6                                          # forecast icon
+    p[90] = 44                                         # forecast rule
+    struct.pack_into('<H', p, 91, 612)                 # sunrise
+    struct.pack_into('<H', p, 93, 2041)                # sunset
+    p[95:97] = LFCR
+    return withCRC(p)
+
+
+def packLoop2(t):
+    """Build a 99-byte LOOP2 packet for time offset t (seconds since start)."""
+    p = bytearray(97)
+    p[0:3] = b'LOO'
+    p[3] = 0
+    p[4] = 1                                           # packet type: LOOP2
+    p[5:7] = b'\x7f\x7f'
+    struct.pack_into('<H', p, 7, 29920 + int(t) % 50)
+    struct.pack_into('<H', p, 9, 712)
+    p[11] = 41
+    struct.pack_into('<H', p, 12, 543 + int(t) % 7)
+    p[14] = 7
+    struct.pack_into('<H', p, 16, 225)
+    struct.pack_into('<H', p, 18, 53)                  # 10 min avg wind, mph/10
+    struct.pack_into('<H', p, 20, 61)                  # 2 min avg wind, mph/10
+    struct.pack_into('<H', p, 22, 15)                  # 10 min gust, mph
+    struct.pack_into('<H', p, 24, 270)                 # gust direction
+    struct.pack_into('<H', p, 30, 49)                  # dew point, F
+    p[33] = 82
+    struct.pack_into('<H', p, 35, 54)                  # heat index, F
+    struct.pack_into('<H', p, 37, 52)                  # wind chill, F
+    struct.pack_into('<H', p, 39, 57)                  # THSW, F
+    struct.pack_into('<H', p, 41, 3)
+    p[43] = 12
+    struct.pack_into('<H', p, 44, 345)
+    struct.pack_into('<H', p, 52, 1)                   # last 15 min rain
+    struct.pack_into('<H', p, 54, 2)                   # last hour rain
+    struct.pack_into('<H', p, 58, 9)                   # last 24 hours rain
+    p[95:97] = LFCR
+    return withCRC(p)
+
+
+def packHiLows():
+    """Build the 438-byte HILOWS packet (436 data bytes + CRC)."""
+    p = bytearray(436)
+    for off, val in ((0, 29750), (2, 30010), (4, 29400), (6, 30250), (8, 28900), (10, 30600),
+                     (12, 412), (14, 1003)):
+        struct.pack_into('<H', p, off, val)
+    p[16] = 21
+    struct.pack_into('<H', p, 17, 1322)
+    p[19] = 38
+    p[20] = 55
+    for off, val in ((47, 481), (49, 667), (51, 533), (53, 1450), (55, 802), (57, 311),
+                     (59, 912), (61, 44), (63, 45), (65, 55), (67, 612), (69, 1402),
+                     (71, 58), (73, 30), (75, 66), (77, 5)):
+        struct.pack_into('<H', p, off, val)
+    for off, val in ((103, 812), (105, 1301), (107, 944), (109, 1101)):
+        struct.pack_into('<H', p, off, val)
+    p[111] = 54
+    struct.pack_into('<H', p, 112, 1255)
+    p[114] = 71
+    p[115] = 93
+    for off, val in ((116, 14), (118, 1433), (120, 3), (122, 220), (124, 410)):
+        struct.pack_into('<H', p, off, val)
+    p[276] = 58
+    p[284] = 97
+    struct.pack_into('<H', p, 292, 1512)
+    struct.pack_into('<H', p, 308, 512)
+    p[324] = 100
+    p[332] = 22
+    p[340] = 100
+    p[348] = 12
+    return withCRC(p)
+
+
+def packArchive(ts, t):
+    """Build a 52-byte Rev B archive record for datetime ts."""
+    r = bytearray(52)
+    struct.pack_into('<H', r, 0, ts.day + ts.month * 32 + (ts.year - 2000) * 512)
+    struct.pack_into('<H', r, 2, ts.hour * 100 + ts.minute)
+    struct.pack_into('<h', r, 4, 543 + int(t) % 7)     # outside temp
+    struct.pack_into('<h', r, 6, 551)                  # high outside temp
+    struct.pack_into('<h', r, 8, 538)                  # low outside temp
+    struct.pack_into('<H', r, 10, 0x2001)              # rain clicks (0.2 mm collector)
+    struct.pack_into('<H', r, 12, 3)                   # high rain rate
+    struct.pack_into('<H', r, 14, 29920)               # barometer
+    struct.pack_into('<H', r, 16, 345)                 # solar radiation
+    struct.pack_into('<H', r, 18, 240)                 # wind samples
+    struct.pack_into('<h', r, 20, 712)                 # inside temp
+    r[22] = 41
+    r[23] = 82
+    r[24] = 5                                          # average wind speed
+    r[25] = 15                                         # high wind speed
+    r[26] = 12                                         # direction of high wind (WNW)
+    r[27] = 10                                         # prevailing direction (SW)
+    r[28] = 12                                         # average UV
+    r[29] = 1                                          # ET, in/1000
+    struct.pack_into('<H', r, 30, 501)                 # high solar radiation
+    r[32] = 14                                         # high UV
+    r[33] = 44                                         # forecast rule
+    r[42] = 0x00                                       # Rev B record
+    return bytes(r)
+
+
+class Console:
+    """State machine for one emulated Davis console."""
+
+    def __init__(self, fd, args):
+        self.fd = fd
+        self.args = args
+        self.rx = b''
+        self.start = time.time()
+        self.lastActivity = time.monotonic()
+        self.awake = True
+        self.stream = None          # [mask, remaining, next_due, next_type]
+        self.pending = None         # state for multi-phase commands
+        self.archive = []
+        self.stats = {'commands': 0, 'bytes_out': 0, 'wakeups': 0}
+        now = datetime.datetime.now().replace(second=0, microsecond=0)
+        ts = now - datetime.timedelta(minutes=args.archive_interval * args.archive_records)
+        for i in range(args.archive_records):
+            ts += datetime.timedelta(minutes=args.archive_interval)
+            self.archive.append((ts, packArchive(ts, i)))
+        self.clockOffset = datetime.timedelta(seconds=args.clock_offset)
+
+    def send(self, data, corruptible=False):
+        """Write data to the host, applying latency, jitter, drops and corruption."""
+        a = self.args
+        delay = a.latency + random.uniform(0, a.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        data = bytearray(data)
+        if corruptible and a.corrupt > 0 and random.random() < a.corrupt:
+            i = random.randrange(len(data))
+            data[i] ^= 0x5A
+        if a.drop > 0 and len(data) > 1 and random.random() < a.drop:
+            del data[random.randrange(len(data))]
+        if self.fd is None:
+            # TCP mode without a connected client
+            return
+        try:
+            os.write(self.fd, bytes(data))
+        except OSError:
+            return
+        self.stats['bytes_out'] += len(data)
+
+    def consoleTime(self):
+        return datetime.datetime.now() + self.clockOffset
+
+    def feed(self, data):
+        """Handle bytes received from the host."""
+        now = time.monotonic()
+        if self.args.sleep_after and now - self.lastActivity > self.args.sleep_after:
+            self.awake = False
+        self.lastActivity = now
+        if self.stream is not None:
+            # any character received cancels a running LOOP/LPS stream
+            self.stream = None
+            data = data.lstrip(b'\n')
+            self.rx = b''
+            if not data:
+                return
+        if self.pending is not None:
+            self.rx += data
+            self.handlePending()
+            return
+        if not self.awake:
+            # a sleeping console drops everything until it sees a line feed
+            i = data.find(b'\n')
+            if i < 0:
+                return
+            self.awake = True
+            self.stats['wakeups'] += 1
+            self.send(LFCR)
+            data = data[i + 1:]
+        self.rx += data
+        while self.pending is None and b'\n' in self.rx:
+            line, self.rx = self.rx.split(b'\n', 1)
+            self.command(line.rstrip(b'\r'))
+        if self.pending is not None and self.rx:
+            self.handlePending()
+
+    def command(self, line):
+        """Dispatch one command line."""
+        self.stats['commands'] += 1
+        if line == b'':
+            self.stats['wakeups'] += 1
+            self.send(LFCR)
+            return
+        if line.startswith(b'WRD'):
+            self.send(ACK + bytes([self.args.station_type]))
+            return
+        words = line.decode('ascii', errors='replace').split()
+        cmd = words[0].upper()
+        if cmd == 'TEST':
+            self.send(b'\n\rTEST\n\r')
+        elif cmd == 'VER':
+            self.send(b'\n\rOK\n\rApr 24 2002\n\r')
+        elif cmd == 'NVER':
+            self.send(b'\n\rOK\n\r' + self.args.firmware.encode('ascii') + LFCR)
+        elif cmd == 'ID':
+            self.send(b'\n\rOK\n\r4711\n\r')
+        elif cmd == 'RXCHECK':
+            self.send(b'\n\rOK\n\r 21629 15 0 3204 128\n\r')
+        elif cmd == 'BARDATA':
+            self.send(b'\n\rOK\n\r' + BARDATA)
+        elif cmd == 'GETTIME':
+            t = self.consoleTime()
+            self.send(ACK + withCRC(bytes([t.second, t.minute, t.hour, t.day, t.month, t.year - 1900])), True)
+        elif cmd == 'SETTIME':
+            self.send(ACK)
+            self.pending = ('SETTIME',)
+        elif cmd == 'HILOWS':
+            self.send(ACK + packHiLows(), True)
+        elif cmd == 'LOOP' and len(words) == 2:
+            self.startStream(1, int(words[1]))
+        elif cmd == 'LPS' and len(words) == 3:
+            if float(self.args.firmware) < 1.90:
+                self.send(NAK)
+                return
+            self.startStream(int(words[1]), int(words[2]))
+        elif cmd == 'DMPAFT':
+            self.send(ACK)
+            self.pending = ('DMPAFT',)
+        else:
+            self.send(b'\n\r')
+
+    def startStream(self, mask, count):
+        """Start sending count LOOP/LOOP2 packets."""
+        self.send(ACK)
+        first = 0 if mask & 1 else 1
+        self.stream = [mask, count, time.monotonic(), first]
+
+    def tick(self):
+        """Emit the next streamed packet if due, return seconds until the next one."""
+        if self.stream is None:
+            return None
+        mask, remaining, due, kind = self.stream
+        now = time.monotonic()
+        if now < due:
+            return due - now
+        t = 0 if self.args.frozen else time.time() - self.start
+        self.send(packLoop1(t) if kind == 0 else packLoop2(t), True)
+        remaining -= 1
+        if remaining <= 0:
+            self.stream = None
+            return None
+        if mask == 3:
+            kind ^= 1
+        self.stream = [mask, remaining, due + self.args.interval, kind]
+        return self.args.interval
+
+    def handlePending(self):
+        """Handle the binary phases of SETTIME and DMPAFT."""
+        state = self.pending
+        if state[0] == 'SETTIME':
+            if len(self.rx) < 8:
+                return
+            data, self.rx = self.rx[:8], self.rx[8:]
+            if CRC(data) != 0:
+                self.send(CANCEL)
+            else:
+                sec, mn, hr, day, mon, yr = struct.unpack('6B', data[:6])
+                target = datetime.datetime(yr + 1900, mon, day, hr, mn, sec)
+                self.clockOffset = target - datetime.datetime.now()
+                self.send(ACK)
+            self.pending = None
+        elif state[0] == 'DMPAFT':
+            if len(self.rx) < 6:
+                return
+            data, self.rx = self.rx[:6], self.rx[6:]
+            if CRC(data) != 0:
+                self.send(CANCEL)
+                self.pending = None
+                return
+            d, t = struct.unpack('<HH', data[:4])
+            records = [r for ts, r in self.archive
+                       if (ts.year - 2000) * 512 + ts.month * 32 + ts.day > d
+                       or ((ts.year - 2000) * 512 + ts.month * 32 + ts.day == d and ts.hour * 100 + ts.minute > t)]
+            if d == 0 and t == 0:
+                records = [r for ts, r in self.archive]
+            first = 0
+            pages = [records[i:i + 5] for i in range(0, len(records), 5)]
+            self.send(ACK + withCRC(struct.pack('<HH', len(pages), first)))
+            self.pending = ('DMPAFT-PAGE', pages, 0)
+        elif state[0] == 'DMPAFT-PAGE':
+            while self.rx and self.pending is not None:
+                c, self.rx = self.rx[:1], self.rx[1:]
+                pages, n = self.pending[1], self.pending[2]
+                if c == ACK:
+                    if n >= len(pages):
+                        self.pending = None
+                        return
+                    self.sendPage(pages, n)
+                    self.pending = ('DMPAFT-PAGE', pages, n + 1)
+                elif c == NAK and n > 0:
+                    self.sendPage(pages, n - 1)
+                else:
+                    # ESC or anything else cancels the download
+                    self.pending = None
+
+    def sendPage(self, pages, n):
+        """Send archive page n (sequence byte, five records, four unused bytes, CRC)."""
+        records = list(pages[n])
+        while len(records) < 5:
+            records.append(b'\xff' * 52)
+        page = bytes([n % 256]) + b''.join(records) + b'\x00' * 4
+        self.send(withCRC(page), True)
+
+
+def serveTCP(args):
+    """Serve the emulated console on a TCP port. A new client replaces the connected one, the console state is kept."""
+    host, _, port = args.tcp.rpartition(':')
+    listener = socket.create_server((host or 'localhost', int(port)))
+    print(tStamp() + 'Emulated console listening on %s:%d' % listener.getsockname()[:2], flush=True)
+    console = Console(None, args)
+    conn = None
+    wait = None
+    try:
+        while True:
+            r, _, _ = select.select([listener] + ([conn] if conn else []), [], [], wait)
+            if listener in r:
+                if conn:
+                    conn.close()
+                conn, peer = listener.accept()
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                console.fd = conn.fileno()
+                console.rx = b''
+                print(tStamp() + 'Client connected from %s:%d' % peer[:2], flush=True)
+            elif conn in r:
+                try:
+                    data = conn.recv(4096)
+                except OSError:
+                    data = b''
+                if not data:
+                    print(tStamp() + 'Client disconnected.', flush=True)
+                    conn.close()
+                    conn = console.fd = None
+                else:
+                    console.feed(data)
+            wait = console.tick()
+    except KeyboardInterrupt:
+        pass
+    print(tStamp() + 'Emulator stats: %s' % console.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Davis Vantage console emulator for WOSPi.')
+    parser.add_argument('--latency', type=float, default=0.0, help='fixed response latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random extra latency in seconds')
+    parser.add_argument('--drop', type=float, default=0.0, help='probability of dropping one byte of a response')
+    parser.add_argument('--corrupt', type=float, default=0.0, help='probability of corrupting a binary packet')
+    parser.add_argument('--interval', type=float, default=2.0, help='LOOP packet interval in seconds')
+    parser.add_argument('--sleep-after', type=float, default=0.0, help='console goes to sleep after this many idle seconds (0 = never)')
+    parser.add_argument('--firmware', default='1.90', help='NVER firmware version (LPS requires >= 1.90)')
+    parser.add_argument('--station-type', type=int, default=16, help='WRD station type')
+    parser.add_argument('--clock-offset', type=float, default=0.0, help='console clock offset in seconds')
+    parser.add_argument('--archive-records', type=int, default=12, help='number of archive records for DMPAFT')
+    parser.add_argument('--archive-interval', type=int, default=10, help='archive interval in minutes')
+    parser.add_argument('--frozen', action='store_true', help='serve constant readings (for regression tests)')
+    parser.add_argument('--link', default='', help='create a symlink to the pty device at this path')
+    parser.add_argument('--tcp', default='', metavar='[HOST:]PORT', help='listen on a TCP port instead of a pty (one client at a time)')
+    args = parser.parse_args()
+
+    if args.tcp:
+        serveTCP(args)
+        return
+
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    name = os.ttyname(slave)
+    if args.link:
+        if os.path.lexists(args.link):
+            os.unlink(args.link)
+        os.symlink(name, args.link)
+        name = args.link
+    print(tStamp() + 'Emulated console listening on %s' % name, flush=True)
+    console = Console(master, args)
+    wait = None
+    try:
+        while True:
+            r, _, _ = select.select([master], [], [], wait)
+            if r:
+                data = os.read(master, 4096)
+                if not data:
+                    break
+                console.feed(data)
+            wait = console.tick()
+    except KeyboardInterrupt:
+        pass
+    print(tStamp() + 'Emulator stats: %s' % console.stats)
+
+
+if __name__ == '__main__':
+    main()